@@ -2,6 +2,8 @@
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -67,17 +69,95 @@ WSGI_APPLICATION = "inventory.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_ENGINE=postgres for multi-node deployments, sqlite (the default) for a single node.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    # Django's native pool (psycopg 3) replaces persistent connections; the two
+    # cannot be combined, so CONN_MAX_AGE only applies with DB_POOL off
+    DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get('DB_NAME', 'inventory'),
+            "USER": os.environ.get('DB_USER', 'inventory'),
+            "PASSWORD": os.environ.get('DB_PASSWORD', ''),
+            "HOST": os.environ.get('DB_HOST', 'localhost'),
+            "PORT": os.environ.get('DB_PORT', '5432'),
+            "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    "max_size": int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                    "timeout": int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    # WAL lets readers run alongside the single writer, IMMEDIATE takes the write
+    # lock at BEGIN so transactions queue on the busy timeout instead of failing
+    # with "database is locked" when they upgrade from a read
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get('DB_NAME', BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                "timeout": int(os.environ.get('DB_TIMEOUT', 20)),
+                "transaction_mode": "IMMEDIATE",
+                "init_command": (
+                    "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"
+                    if os.environ.get('DB_SQLITE_WAL', '1') == '1' else ""
+                ),
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE: {DB_ENGINE}")
+
+# Covering indexes (Index.include) are PostgreSQL-only; SQLite builds them on the key columns alone
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
+# Broker behind live updates such as the sales ticker (oye.pubsub). The in-process
+# broker only reaches watchers connected to the same process
+OYE_PUBSUB = {
+    'BACKEND': 'oye.pubsub.InProcessBroker',
+    'OPTIONS': {'queue_size': 100},
 }
 
+# Lets the benchmark command run against a file database instead of SQLite's in-memory test database
+if os.environ.get('DB_TEST_NAME'):
+    DATABASES["default"]["TEST"] = {"NAME": os.environ['DB_TEST_NAME']}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
+# Password hashing policy. New passwords are hashed with PASSWORD_HASHER; hashes
+# made with another hasher or other cost parameters still verify and are
+# rehashed in the background on the next successful login.
+PASSWORD_HASHER_CHOICES = {
+    'scrypt': 'oye.hashers.ScryptPasswordHasher',
+    'argon2': 'oye.hashers.Argon2PasswordHasher',  # needs argon2-cffi
+    'pbkdf2': 'oye.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+]
+PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', 870000)),
+    'SCRYPT_WORK_FACTOR': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 14)),
+    'SCRYPT_BLOCK_SIZE': int(os.environ.get('SCRYPT_BLOCK_SIZE', 8)),
+    'SCRYPT_PARALLELISM': int(os.environ.get('SCRYPT_PARALLELISM', 1)),
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 102400)),
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 8)),
+}
+PASSWORD_REHASH_ASYNC = True
+PASSWORD_REHASH_WORKERS = 1
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -117,9 +197,38 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'oye.authentication.TokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    # orjson-backed, same output as DRF's JSON renderer and parser (which they fall back to)
+    'DEFAULT_RENDERER_CLASSES': [
+        'oye.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'oye.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# In-process token -> user cache used by oye.authentication
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+# Seconds a token stays valid after login
+AUTH_TOKEN_LIFETIME = int(os.environ.get('AUTH_TOKEN_LIFETIME', 30 * 24 * 60 * 60))
+
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Profile picture uploads over these limits are refused before anything decodes them
+PROFILE_PICTURE_MAX_BYTES = 5 * 1024 * 1024
+PROFILE_PICTURE_MAX_PIXELS = 24_000_000
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3001",
     "http://localhost:3000",
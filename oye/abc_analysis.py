@@ -0,0 +1,183 @@
+"""
+ABC, margin and capital analysis of a shop's catalog.
+
+Each item's stock and its sales totals (summed per item from the daily
+rollups) come back from two indexed queries, as columns of NumPy arrays; every
+measure is then computed over whole arrays, so a 50k-item catalog costs two
+queries and a few milliseconds of arithmetic instead of a query per item. The arrays are
+cached until the shop's catalog version changes, and only the items actually
+listed are read in full.
+
+Items are ranked by revenue: class A items make up the first 80% of it, class B
+the next 15% and class C the rest, along with everything that did not sell.
+"""
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import CharField, F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .catalog import get_catalog_version
+from .models import Item, SalesDailyRollup
+
+CACHE_TIMEOUT = 300
+CLASSES = ('A', 'B', 'C')
+# Cumulative revenue share at which classes A and B end
+CLASS_BOUNDS = (0.8, 0.95)
+ORDERINGS = ('revenue', 'profit', 'unit_margin', 'margin_percent', 'sell_through', 'stock_value')
+# One row of the catalog query; ids stay text, converted back to UUIDs only for listed items
+ROW_DTYPE = np.dtype([('id', 'S36')] + [
+    (name, np.float64) for name in ('quantity', 'cost_price', 'selling_price', 'units_sold', 'revenue', 'cost')
+])
+
+
+def _as_float(expression):
+    return Cast(expression, FloatField())
+
+
+def _catalog_rows(shop_id, since=None):
+    # The items and their rollups summed per item are read apart, each through
+    # a (shop, ...) index, and joined here: grouping the joined tables by item
+    # has the database walk every item of every shop in id order instead
+    items = Item.objects.filter(shop_id=shop_id).values_list(
+        Cast('id', CharField()), 'quantity', _as_float(F('cost_price')), _as_float(F('selling_price')),
+    )
+    rollups = SalesDailyRollup.objects.filter(shop_id=shop_id)
+    if since is not None:
+        rollups = rollups.filter(date__gte=since)
+    totals = rollups.values(item_key=Cast('item_id', CharField())).annotate(
+        units_sold=_as_float(Sum('quantity')),
+        revenue=_as_float(Sum('revenue')),
+        cost=_as_float(Sum('cost')),
+    ).order_by().values_list('item_key', 'units_sold', 'revenue', 'cost')
+    sold = {item_key: row for item_key, *row in totals}
+    unsold = (0.0, 0.0, 0.0)
+    return [(*item, *sold.get(item[0], unsold)) for item in items]
+
+
+def _ratio(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _descending(values):
+    """Indexes of `values`, largest first; ties in id order."""
+    return np.argsort(-values, kind='stable')
+
+
+def _ranks(order):
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+class CatalogAnalysis:
+    """The measures of every item of one shop, as arrays indexed alike."""
+
+    def __init__(self, rows):
+        table = np.array(list(rows), dtype=ROW_DTYPE)
+        # In id order, so ties rank alike whatever order the rows came in
+        table = table[np.argsort(table['id'], kind='stable')]
+        numbers = {name: np.ascontiguousarray(table[name]) for name in ROW_DTYPE.names}
+        self.ids = numbers['id']
+        self.quantity = numbers['quantity']
+        self.units_sold = numbers['units_sold']
+        self.revenue = numbers['revenue']
+        self.profit = numbers['revenue'] - numbers['cost']
+        self.unit_margin = numbers['selling_price'] - numbers['cost_price']
+        self.margin_percent = _ratio(self.unit_margin, numbers['selling_price']) * 100
+        on_hand = np.clip(self.quantity, 0, None)
+        self.stock_value = on_hand * numbers['cost_price']
+        self.sell_through = _ratio(self.units_sold, self.units_sold + on_hand)
+
+        self.total_revenue = float(self.revenue.sum())
+        by_revenue = _descending(self.revenue)
+        self.revenue_rank = _ranks(by_revenue)
+        self.stock_value_rank = _ranks(_descending(self.stock_value))
+        cumulative = np.cumsum(self.revenue[by_revenue])
+        self.revenue_share = _ratio(self.revenue, np.full_like(self.revenue, self.total_revenue))
+        self.cumulative_share = np.empty_like(self.revenue)
+        self.cumulative_share[by_revenue] = _ratio(cumulative, np.full_like(cumulative, self.total_revenue))
+        # An item is in the class its first unit of revenue falls in
+        share_before = self.cumulative_share - self.revenue_share
+        self.abc_class = np.searchsorted(CLASS_BOUNDS, share_before, side='right')
+        self.abc_class[self.revenue <= 0] = len(CLASSES) - 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    def summary(self):
+        """Items, revenue, profit and stock value per class, and over the whole catalog."""
+        def per_class(weights=None):
+            return np.bincount(self.abc_class, weights=weights, minlength=len(CLASSES))
+
+        counts, revenue, profit, stock_value = (
+            per_class(), per_class(self.revenue), per_class(self.profit), per_class(self.stock_value)
+        )
+        return {
+            'items': len(self),
+            'revenue': self.total_revenue,
+            'profit': float(self.profit.sum()),
+            'stock_value': float(self.stock_value.sum()),
+            # Capital tied up in items that did not sell at all
+            'dead_stock_value': float(self.stock_value[self.units_sold <= 0].sum()),
+            'classes': {
+                name: {
+                    'items': int(counts[index]),
+                    'revenue': float(revenue[index]),
+                    'profit': float(profit[index]),
+                    'stock_value': float(stock_value[index]),
+                }
+                for index, name in enumerate(CLASSES)
+            },
+        }
+
+    def select(self, abc_class=None, order='revenue'):
+        """Indexes of the items of `abc_class` (all by default), largest `order` first."""
+        indexes = _descending(getattr(self, order))
+        if abc_class is not None:
+            indexes = indexes[self.abc_class[indexes] == CLASSES.index(abc_class)]
+        return indexes
+
+    def items(self, indexes):
+        """The measures of the items at `indexes`, with their names read in one query."""
+        indexes = indexes.tolist()
+        ids = [uuid.UUID(self.ids[index].decode()) for index in indexes]
+        names = Item.objects.in_bulk(ids)
+        return [
+            {
+                'id': item_id,
+                'item_name': names[item_id].item_name,
+                'category': names[item_id].category,
+                'abc_class': CLASSES[self.abc_class[index]],
+                'quantity': int(self.quantity[index]),
+                'units_sold': int(self.units_sold[index]),
+                'revenue': self.revenue[index],
+                'profit': self.profit[index],
+                'unit_margin': self.unit_margin[index],
+                'margin_percent': round(float(self.margin_percent[index]), 2),
+                'sell_through': round(float(self.sell_through[index]), 4),
+                'stock_value': self.stock_value[index],
+                'revenue_share': round(float(self.revenue_share[index]), 6),
+                'cumulative_share': round(float(self.cumulative_share[index]), 6),
+                'revenue_rank': int(self.revenue_rank[index]),
+                'stock_value_rank': int(self.stock_value_rank[index]),
+            }
+            for item_id, index in zip(ids, indexes)
+            if item_id in names
+        ]
+
+
+def analyse_catalog(shop_id, since=None):
+    """CatalogAnalysis of the shop's items, counting the sales made on or after the date `since`."""
+    return CatalogAnalysis(_catalog_rows(shop_id, since))
+
+
+def catalog_analysis(shop_id, since=None):
+    """analyse_catalog, cached until the shop's next Item, Sale or Restock write."""
+    key = f'oye:catalog-analysis:{shop_id}:{get_catalog_version(shop_id)}:{since}'
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = analyse_catalog(shop_id, since)
+        cache.set(key, analysis, CACHE_TIMEOUT)
+    return analysis
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, UserProfile, Shop, Item, Restock, Sale
+from .models import (User, AuthToken, UserProfile, Shop, Item, Restock, Sale, SalesDailyRollup, StockAlert, Tombstone,
+                     ReorderSuggestion, Task)
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -8,11 +9,18 @@ class UserAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'is_staff', 'is_superuser')
     ordering = ('date_joined',)
 
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created_at', 'expires_at')
+    search_fields = ('user__username', 'user__email')
+    ordering = ('-created_at',)
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'phone_number', 'date_of_birth')
     search_fields = ('user__username', 'user__email', 'phone_number')
     list_filter = ('date_of_birth',)
+    readonly_fields = ('renditions',)
 
 @admin.register(Shop)
 class ShopAdmin(admin.ModelAdmin):
@@ -41,4 +49,38 @@ class SaleAdmin(admin.ModelAdmin):
     search_fields = ('item__item_name', 'shop__shop_name')
     list_filter = ('payment_method', 'sold_at')
     ordering = ('sold_at',)
-    
+
+@admin.register(SalesDailyRollup)
+class SalesDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'shop', 'item', 'payment_method', 'quantity', 'revenue', 'cost')
+    search_fields = ('item__item_name', 'shop__shop_name')
+    list_filter = ('payment_method', 'date')
+    ordering = ('-date',)
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = ('item', 'shop', 'kind', 'quantity', 'threshold', 'created_at')
+    search_fields = ('item__item_name', 'shop__shop_name')
+    list_filter = ('kind', 'created_at')
+    ordering = ('-created_at',)
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'shop', 'deleted_at')
+    search_fields = ('object_id', 'shop__shop_name')
+    list_filter = ('model', 'deleted_at')
+    ordering = ('-deleted_at',)
+
+@admin.register(ReorderSuggestion)
+class ReorderSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('item', 'shop', 'daily_demand', 'reorder_point', 'reorder_quantity', 'quantity_on_hand', 'computed_at')
+    search_fields = ('item__item_name', 'shop__shop_name')
+    list_filter = ('method', 'computed_at')
+    ordering = ('-computed_at',)
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'enqueued_at', 'finished_at', 'worker')
+    search_fields = ('name', 'last_error')
+    list_filter = ('status', 'name')
+    ordering = ('-enqueued_at',)
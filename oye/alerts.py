@@ -0,0 +1,190 @@
+"""
+Low-stock tracking and the stock alert feed.
+
+Item.is_low_stock is kept in step with the quantity instead of being counted on
+demand: after every quantity change the stock ledger calls `refresh_low_stock`,
+which looks only at the changed items, flips the flag of those that crossed
+their reorder level and records a StockAlert for each crossing. Usually that is
+a single SELECT that finds nothing; otherwise one UPDATE per direction and one
+INSERT, however many items crossed.
+
+Once the alerts are committed, the shops they belong to are notified: long
+polls of the shop wait on its own condition variable, and its event streams
+are subscribed to its pubsub channel, so an alert wakes the watchers of its
+shop and nobody else. The conditions are per process, so waits are sliced
+into POLL_INTERVAL chunks that re-check the database and also pick up alerts
+written by other nodes.
+"""
+import asyncio
+import threading
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import Item, StockAlert
+from .pubsub import get_broker
+from .renderers import FastJSONRenderer
+from .serializers import StockAlertSerializer
+
+POLL_INTERVAL = 5
+MAX_WAIT = 30
+STREAM_SECONDS = 300
+
+_alerts_lock = threading.Lock()
+# shop id -> [version, condition]; the conditions share _alerts_lock
+_alerts_recorded = {}
+
+
+def reorder_level():
+    """An item's own reorder level, or its shop's low-stock threshold."""
+    return Coalesce(F('reorder_level'), F('shop__low_stock_threshold'))
+
+
+def refresh_low_stock(item_ids=None, shop_id=None):
+    """Bring is_low_stock up to date for the given items or a whole shop; returns the new alerts."""
+    items = Item.objects.all()
+    if item_ids is not None:
+        items = items.filter(pk__in=list(item_ids))
+    if shop_id is not None:
+        items = items.filter(shop_id=shop_id)
+    going_low = Q(is_low_stock=False, quantity__lt=reorder_level())
+    recovering = Q(is_low_stock=True, quantity__gte=reorder_level())
+
+    with transaction.atomic():
+        # Locked until the flags are flipped, so writers racing over the same
+        # crossing record it once
+        crossed = list(
+            items.select_for_update(of=('self',))
+            .filter(going_low | recovering)
+            .values_list('id', 'shop_id', 'quantity', 'is_low_stock', reorder_level())
+        )
+        if not crossed:
+            return []
+        # One UPDATE per direction however many items crossed (updated_at too,
+        # so offline clients syncing by it pick up the new flag)
+        now = timezone.now()
+        for was_low, crossing in ((False, going_low), (True, recovering)):
+            if any(item[3] == was_low for item in crossed):
+                items.filter(crossing).update(is_low_stock=not was_low, updated_at=now)
+        alerts = StockAlert.objects.bulk_create([
+            StockAlert(
+                shop_id=item_shop_id,
+                item_id=item_id,
+                kind=StockAlert.RECOVERED if was_low else StockAlert.LOW,
+                quantity=quantity,
+                threshold=threshold,
+            )
+            for item_id, item_shop_id, quantity, was_low, threshold in crossed
+        ])
+        shop_ids = {item[1] for item in crossed}
+        for item_shop_id in shop_ids:
+            # The flag is part of the item lists behind the catalog ETags
+            bump_catalog_version(item_shop_id)
+        transaction.on_commit(partial(notify_alerts, shop_ids))
+    return alerts
+
+
+def alerts_channel(shop_id):
+    return f'oye:alerts:{shop_id}'
+
+
+def _recorded(shop_id):
+    # Called with _alerts_lock held
+    recorded = _alerts_recorded.get(shop_id)
+    if recorded is None:
+        recorded = _alerts_recorded[shop_id] = [0, threading.Condition(_alerts_lock)]
+    return recorded
+
+
+def notify_alerts(shop_ids):
+    """Wake the long polls and event streams of the given shops."""
+    broker = get_broker()
+    for shop_id in shop_ids:
+        with _alerts_lock:
+            recorded = _recorded(shop_id)
+            recorded[0] += 1
+            recorded[1].notify_all()
+        channel = alerts_channel(shop_id)
+        if broker.has_subscribers(channel):
+            # Only a wake-up call: the streams read the alerts from the feed
+            broker.publish(channel, b'')
+
+
+def alerts_version(shop_id):
+    with _alerts_lock:
+        return _recorded(shop_id)[0]
+
+
+def wait_for_alerts(shop_id, version, timeout):
+    """
+    Block until alerts of the shop are recorded after `version` was read, or
+    for `timeout` seconds; True if woken.
+    """
+    with _alerts_lock:
+        recorded = _recorded(shop_id)
+        return recorded[1].wait_for(lambda: recorded[0] != version, timeout)
+
+
+def alerts_after(shop_id, position, pagination):
+    """The next page of a shop's alerts after the cursor `position` (None for the first one)."""
+    alerts = StockAlert.objects.filter(shop_id=shop_id).select_related('item').order_by(*pagination.ordering)
+    if position is not None:
+        alerts = alerts.filter(pagination.position_filter(position))
+    return list(alerts[:pagination.page_size])
+
+
+def stream_alerts(shop_id, position, pagination, seconds=STREAM_SECONDS):
+    """
+    Server-sent events for a shop's alerts after `position`. Each event id is a
+    feed cursor, so a reconnecting EventSource resumes from Last-Event-ID. The
+    stream ends after `seconds` and the client reconnects. Meant to be served
+    by inventory.asgi, where a watcher costs no thread.
+    """
+    response = StreamingHttpResponse(
+        alert_events(shop_id, position, pagination, seconds), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def alert_events(shop_id, position, pagination, seconds=STREAM_SECONDS):
+    renderer = FastJSONRenderer()
+
+    def render(alerts):
+        return [
+            f'id: {pagination.encode_cursor(alert)}\nevent: {alert.kind}\n'
+            f'data: {renderer.render(StockAlertSerializer(alert).data).decode()}\n\n'
+            for alert in alerts
+        ]
+
+    def next_page(cursor):
+        alerts = alerts_after(shop_id, cursor, pagination)
+        return alerts, render(alerts)
+
+    cursor = position
+    deadline = time.monotonic() + seconds
+    # Subscribed before the first read, so no alert can fall in between
+    async with get_broker().subscribe(alerts_channel(shop_id)) as subscription:
+        yield 'retry: 2000\n\n'
+        while True:
+            alerts, events = await sync_to_async(next_page)(cursor)
+            for event in events:
+                yield event
+            if alerts:
+                cursor = [alerts[-1].created_at, alerts[-1].id]
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(anext(subscription), min(POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Func, IntegerField, Q, Sum, Window
+from django.db.models.functions import RowNumber
+
+from .models import Item, Restock, Sale
+
+CACHE_TIMEOUT = 60
+
+
+class WindowSum(Func):
+    """SUM() usable over an aggregate, e.g. SUM(SUM(quantity)) OVER ()."""
+    function = 'SUM'
+    window_compatible = True
+
+
+def _cache_key(shop_id):
+    return f'oye:inventory-analysis:{shop_id}'
+
+
+def _ranked_sales(shop_id):
+    # One grouped pass over the shop's sales: per-item totals, ranked both ways,
+    # with the shop-wide totals carried on every row as window sums.
+    return (
+        Sale.objects.filter(shop_id=shop_id)
+        .values('item__item_name')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            profit=Sum(F('total_price') - F('cost_price')),
+        )
+        .annotate(
+            most_rank=Window(RowNumber(), order_by=F('total_quantity').desc()),
+            least_rank=Window(RowNumber(), order_by=F('total_quantity').asc()),
+            total_sold=Window(WindowSum(F('total_quantity'), output_field=IntegerField())),
+            total_profit=Window(WindowSum(F('profit'), output_field=DecimalField())),
+        )
+        .filter(Q(most_rank=1) | Q(least_rank=1))
+    )
+
+
+def _sales_summary(ranked):
+    summary = {
+        'total_sold': 0,
+        'total_profit': 0,
+        'most_bought_item': None,
+        'least_bought_item': None,
+    }
+    for row in ranked:
+        summary['total_sold'] = row['total_sold']
+        summary['total_profit'] = row['total_profit']
+        item = {'item__item_name': row['item__item_name'], 'total_quantity': row['total_quantity']}
+        if row['most_rank'] == 1:
+            summary['most_bought_item'] = item
+        if row['least_rank'] == 1:
+            summary['least_bought_item'] = item
+    return summary
+
+
+def _item_totals():
+    return {
+        'total_items': Sum('quantity'),
+        'items_to_restock': Count('id', filter=Q(is_low_stock=True)),
+    }
+
+
+def _analysis(items, restocks, sales):
+    return {
+        'total_items': items['total_items'] or 0,
+        'total_restocked': restocks['total_restocked'] or 0,
+        'total_sold': sales['total_sold'],
+        'total_profit': sales['total_profit'],
+        'items_to_restock': items['items_to_restock'],
+        'most_bought_item': sales['most_bought_item'],
+        'least_bought_item': sales['least_bought_item'],
+    }
+
+
+def compute_inventory_analysis(shop_id):
+    """Compute the inventory analysis of a shop with one query per table."""
+    items = Item.objects.filter(shop_id=shop_id).aggregate(**_item_totals())
+    restocks = Restock.objects.filter(shop_id=shop_id).aggregate(total_restocked=Sum('quantity'))
+    sales = _sales_summary(_ranked_sales(shop_id))
+    return _analysis(items, restocks, sales)
+
+
+async def acompute_inventory_analysis(shop_id):
+    """compute_inventory_analysis on the async ORM."""
+    items = await Item.objects.filter(shop_id=shop_id).aaggregate(**_item_totals())
+    restocks = await Restock.objects.filter(shop_id=shop_id).aaggregate(total_restocked=Sum('quantity'))
+    sales = _sales_summary([row async for row in _ranked_sales(shop_id)])
+    return _analysis(items, restocks, sales)
+
+
+def inventory_analysis(shop_id):
+    """Cached inventory analysis of a shop, recomputed after any stock write."""
+    key = _cache_key(shop_id)
+    data = cache.get(key)
+    if data is None:
+        data = compute_inventory_analysis(shop_id)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+async def ainventory_analysis(shop_id):
+    key = _cache_key(shop_id)
+    data = await cache.aget(key)
+    if data is None:
+        data = await acompute_inventory_analysis(shop_id)
+        await cache.aset(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_inventory_analysis(shop_id):
+    cache.delete(_cache_key(shop_id))
@@ -6,4 +6,5 @@ class OyeConfig(AppConfig):
     name = "oye"
 
     def ready(self):
-        import oye.signals
\ No newline at end of file
+        import oye.signals
+        import oye.jobs
@@ -0,0 +1,148 @@
+"""
+Token authentication for oye.User.
+
+Clients send `Authorization: Token <key>`. Only the SHA-256 digest of a key is
+stored, and the digest to user mapping is kept in a per-process LRU cache with a
+TTL, so an authenticated request normally resolves its user without touching
+the database or hashing a password. Revoking tokens evicts them from this
+process straight away; other processes drop them when their entries expire.
+Tokens expire AUTH_TOKEN_LIFETIME seconds after they are issued, and a cache
+entry never outlives its token.
+"""
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import AuthToken, User
+
+TOKEN_CACHE_SIZE = getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+TOKEN_CACHE_TTL = getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields]
+
+
+class TokenCache:
+    """Thread-safe LRU mapping with a per-entry time to live."""
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Cache `value` for `ttl` seconds, or the cache's TTL if that is shorter or `ttl` is None."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Evict every entry whose value matches `predicate`; returns how many were evicted."""
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+def _digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_token(user):
+    """Create a token for `user` and return its key; only the digest is stored."""
+    key = secrets.token_urlsafe(32)
+    AuthToken.objects.create(key=_digest(key), user=user)
+    return key
+
+
+def revoke_token(key):
+    digest = _digest(key)
+    token_cache.delete(digest)
+    AuthToken.objects.filter(key=digest).delete()
+
+
+def forget_user(user_id):
+    """Drop a user's cached token entries so the next request reloads the user."""
+    pk_index = USER_FIELDS.index(User._meta.pk.attname)
+    return token_cache.delete_where(lambda values: str(values[pk_index]) == str(user_id))
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token of a user, e.g. after a password change."""
+    forget_user(user_id)
+    AuthToken.objects.filter(user_id=user_id).delete()
+
+
+class TokenAuthentication(BaseAuthentication):
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid token header.")
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed("Invalid token header.")
+        return self.authenticate_credentials(key), key
+
+    def authenticate_credentials(self, key):
+        digest = _digest(key)
+        values = token_cache.get(digest)
+        if values is None:
+            token = AuthToken.objects.select_related('user').filter(key=digest).first()
+            if token is None:
+                raise AuthenticationFailed("Invalid token.")
+            remaining = (token.expires_at - timezone.now()).total_seconds()
+            if remaining <= 0:
+                token.delete()
+                raise AuthenticationFailed("Token has expired.")
+            values = tuple(getattr(token.user, name) for name in USER_FIELDS)
+            token_cache.set(digest, values, ttl=remaining)
+        # Every request gets its own instance, so nothing one request loads onto or
+        # changes on its user leaks into the cache
+        user = User.from_db(None, USER_FIELDS, values)
+        if not user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        return user
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,813 @@
+"""
+Benchmark scenarios, run with ``python manage.py benchmark <scenario>``.
+
+Every scenario runs against a throwaway test database created from the
+configured DATABASES settings, so the real data is never touched.
+"""
+import asyncio
+import io
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import send_mail
+from django.core.mail.backends import locmem
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.test import AsyncClient, Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.http import urlencode
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from django.utils import timezone
+from PIL import Image, ImageCms, ImageOps
+
+from .models import User, Shop, Item, Restock, Sale, Task
+from .readers import item_reader, restock_reader, sale_reader
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import ItemSerializer, RestockSerializer, SaleSerializer
+from . import abc_analysis, chatbot, forecasting, images, jobs, rollups, stock, sync, tasks, ticker
+from .analysis import compute_inventory_analysis, inventory_analysis
+from .pubsub import get_broker
+from .authentication import TokenAuthentication, issue_token, token_cache
+from .stock import InsufficientStock
+from .tests.helpers import LEGACY_HASHER, TRANSACTION_SQL, retry_locked, run_threads, seed_shop
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+@contextmanager
+def benchmark_database():
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat=20):
+    """Call `func` `repeat` times and return (result, query count of one call, latency stats in ms)."""
+    with CaptureQueriesContext(connection) as queries:
+        result = func()
+    # Count now: the captured queries are read lazily and a later request resets the log
+    query_count = len(queries)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, query_count, latency_stats(timings)
+
+
+def latency_stats(timings):
+    """p50/p99/mean of a list of latencies in ms."""
+    timings = sorted(timings)
+    return {
+        'p50': statistics.median(timings),
+        'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'mean': statistics.fmean(timings),
+    }
+
+
+def format_stats(label, query_count, stats):
+    return (
+        f"{label:<28} queries={query_count:<3} "
+        f"p50={stats['p50']:.2f}ms p99={stats['p99']:.2f}ms mean={stats['mean']:.2f}ms"
+    )
+
+
+def _legacy_inventory_analysis(shop):
+    # The seven-query implementation InventoryAnalysisView used before the analysis engine
+    return {
+        'total_items': Item.objects.filter(shop=shop).aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0,
+        'total_restocked': Restock.objects.filter(shop=shop).aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0,
+        'total_sold': Sale.objects.filter(shop=shop).aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0,
+        'total_profit': Sale.objects.filter(shop=shop).aggregate(
+            total_profit=Sum(F('total_price') - F('cost_price'))
+        )['total_profit'] or 0,
+        'items_to_restock': Item.objects.filter(shop=shop, quantity__lt=10).count(),
+        'most_bought_item': Sale.objects.filter(shop=shop).values('item__item_name').annotate(
+            total_quantity=Sum('quantity')).order_by('-total_quantity').first(),
+        'least_bought_item': Sale.objects.filter(shop=shop).values('item__item_name').annotate(
+            total_quantity=Sum('quantity')).order_by('total_quantity').first(),
+    }
+
+
+@scenario('inventory_analysis')
+def bench_inventory_analysis(out, items=1000, sales=1_000_000, repeat=20, **options):
+    out(f"Seeding a shop with {items} items and {sales} sales...")
+    _, shop, _ = seed_shop(items=items, sales=sales, restocks=items)
+
+    legacy, count, stats = measure(lambda: _legacy_inventory_analysis(shop), repeat)
+    out(format_stats('legacy (7 queries)', count, stats))
+
+    engine, count, stats = measure(lambda: compute_inventory_analysis(shop.pk), repeat)
+    out(format_stats('engine, uncached', count, stats))
+
+    cache.clear()
+    inventory_analysis(shop.pk)
+    _, count, stats = measure(lambda: inventory_analysis(shop.pk), repeat)
+    out(format_stats('engine, cached', count, stats))
+
+    # SQLite sums decimals as floats, so compare profits to the cent
+    profits = [round(Decimal(result['total_profit']), 2) for result in (legacy, engine)]
+    if legacy['total_sold'] != engine['total_sold'] or profits[0] != profits[1]:
+        out(f"MISMATCH: legacy={legacy} engine={engine}")
+
+
+def _legacy_sell(shop, item_id, quantity):
+    # The read-modify-write the sale views used before the stock ledger
+    item = Item.objects.get(id=item_id)
+    if item.quantity < quantity:
+        raise InsufficientStock()
+    item.quantity -= quantity
+    item.save()
+    Sale.objects.create(shop=shop, item=item, quantity=quantity, total_price=item.selling_price * quantity,
+                        cost_price=item.cost_price * quantity, payment_method='cash')
+
+
+def _ledger_sell(shop, item_id, quantity):
+    item = Item(id=item_id, shop=shop, selling_price=Decimal('1.00'), cost_price=Decimal('0.50'))
+    stock.sell(shop, item, quantity)
+
+
+@scenario('stock_contention')
+def bench_stock_contention(out, items=1, threads=8, stock_level=500, **options):
+    for label, sell in (('legacy read-modify-write', _legacy_sell), ('stock ledger', _ledger_sell)):
+        _, shop, item_rows = seed_shop(items=items, sales=0)
+        Item.objects.filter(shop=shop).update(quantity=stock_level)
+        item_ids = [item.id for item in item_rows]
+
+        def worker(index):
+            # Every thread keeps buying until all the items it targets are sold out
+            remaining = list(item_ids)
+            while remaining:
+                item_id = random.choice(remaining)
+                try:
+                    retry_locked(lambda: sell(shop, item_id, 1))
+                except InsufficientStock:
+                    remaining.remove(item_id)
+
+        elapsed = run_threads(worker, threads)
+        sold = Sale.objects.filter(shop=shop).aggregate(total=Sum('quantity'))['total'] or 0
+        left = Item.objects.filter(shop=shop).aggregate(total=Sum('quantity'))['total']
+        available = stock_level * len(item_ids)
+        out(
+            f"{label:<26} threads={threads} sold={sold}/{available} left={left} "
+            f"oversold={max(0, sold - available)} stock_drift={sold + left - available} "
+            f"sales/s={sold / elapsed:.0f}"
+        )
+
+
+@scenario('auth')
+def bench_auth(out, repeat=200, **options):
+    client = Client()
+    owner, _, _ = seed_shop(items=0, sales=0)
+    credentials = {'username': owner.username, 'password': 'benchmark-password'}
+
+    _, count, stats = measure(lambda: client.post(reverse('login'), credentials, content_type='application/json'), repeat)
+    out(format_stats('login (password hash)', count, stats) + f" logins/s={1000 / stats['mean']:.0f}")
+
+    def password_lookup():
+        # What identifying a user cost before tokens: load by username and check the password
+        User.objects.get(username=owner.username).check_password('benchmark-password')
+
+    _, count, stats = measure(password_lookup, repeat)
+    out(format_stats('auth by password', count, stats))
+
+    key = issue_token(owner)
+    backend = TokenAuthentication()
+
+    def token_lookup_cold():
+        token_cache.clear()
+        backend.authenticate_credentials(key)
+
+    _, count, stats = measure(token_lookup_cold, repeat)
+    out(format_stats('auth by token, cache miss', count, stats))
+
+    backend.authenticate_credentials(key)
+    _, count, stats = measure(lambda: backend.authenticate_credentials(key), repeat)
+    out(format_stats('auth by token, cache hit', count, stats))
+
+    url = reverse('user-account-update')
+    response, count, stats = measure(lambda: client.get(url, HTTP_AUTHORIZATION=f'Token {key}'), repeat)
+    out(format_stats(f'GET account (status {response.status_code})', count, stats))
+
+
+@scenario('login_load')
+def bench_login_load(out, threads=8, repeat=10, **options):
+    """Login latency and throughput per hasher with `threads` clients logging in `repeat` times each."""
+    policies = {'pbkdf2 (Django default)': LEGACY_HASHER}
+    policies.update(settings.PASSWORD_HASHER_CHOICES)
+    for label, hasher in policies.items():
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            try:
+                users = [seed_shop(items=0, sales=0)[0] for _ in range(threads)]
+            except ValueError as e:
+                out(f"{label:<28} skipped: {e}")
+                continue
+            timings = []
+
+            def worker(index):
+                client = Client()
+                credentials = {'username': users[index].username, 'password': 'benchmark-password'}
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    client.post(reverse('login'), credentials, content_type='application/json')
+                    timings.append((time.perf_counter() - started) * 1000)
+
+            elapsed = run_threads(worker, threads)
+            stats = latency_stats(timings)
+            out(
+                f"{label:<28} threads={threads} p50={stats['p50']:.1f}ms p99={stats['p99']:.1f}ms "
+                f"logins/s={len(timings) / elapsed:.1f}"
+            )
+
+    # A user with a legacy hash logs in under the configured policy: the login
+    # pays for one verification only and the rehash lands shortly after
+    with override_settings(PASSWORD_HASHERS=[LEGACY_HASHER]):
+        user = seed_shop(items=0, sales=0)[0]
+    client = Client()
+    started = time.perf_counter()
+    client.post(reverse('login'), {'username': user.username, 'password': 'benchmark-password'},
+                content_type='application/json')
+    login_ms = (time.perf_counter() - started) * 1000
+    legacy_hash = user.password
+    deadline = time.monotonic() + 5
+    while user.password == legacy_hash and time.monotonic() < deadline:
+        time.sleep(0.05)
+        user.refresh_from_db(fields=['password'])
+    out(f"legacy hash login {login_ms:.1f}ms, stored hash is now {identify_hasher(user.password).algorithm}")
+
+
+def describe_database():
+    settings_dict = connection.settings_dict
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        return (f"sqlite journal_mode={journal_mode} "
+                f"transaction_mode={settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED')}")
+    pool = settings_dict['OPTIONS'].get('pool')
+    return f"{connection.vendor} pool={pool or 'off'} CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}"
+
+
+@scenario('sale_writes')
+def bench_sale_writes(out, threads=8, repeat=200, **options):
+    """
+    Sale-write throughput of the configured database: `threads` clerks each ring
+    up `repeat` sales. Compare configurations by running it under different
+    environments, e.g. DB_TEST_NAME=/tmp/bench.sqlite3 with DB_SQLITE_WAL=0/1,
+    or DB_ENGINE=postgres with DB_POOL=0/1.
+    """
+    out(describe_database())
+    _, shop, item_rows = seed_shop(items=threads, sales=0)
+    Item.objects.filter(shop=shop).update(quantity=threads * repeat)
+    timings = []
+    retries = []
+
+    def worker(index):
+        item = item_rows[index]
+        for _ in range(repeat):
+            started = time.perf_counter()
+            retry_locked(lambda: stock.sell(shop, item, 1), attempts=200, on_retry=lambda: retries.append(1))
+            timings.append((time.perf_counter() - started) * 1000)
+
+    elapsed = run_threads(worker, threads)
+    stats = latency_stats(timings)
+    out(
+        f"threads={threads} sales={len(timings)} sales/s={len(timings) / elapsed:.0f} "
+        f"p50={stats['p50']:.2f}ms p99={stats['p99']:.2f}ms lock_retries={len(retries)}"
+    )
+
+
+@scenario('sales_ticker')
+def bench_sales_ticker(out, subscribers=1000, sales=50, **options):
+    """Fan-out of committed sales to `subscribers` live watchers of one shop, all on one event loop."""
+    _, shop, item_rows = seed_shop(items=1, sales=0)
+    item = item_rows[0]
+    Item.objects.filter(pk=item.pk).update(quantity=sales)
+    channel = ticker.sales_channel(shop.pk)
+    broker = get_broker()
+    published_at = []
+    latencies = []
+    query_counts = []
+
+    def sell_all():
+        try:
+            for _ in range(sales):
+                with CaptureQueriesContext(connection) as queries:
+                    published_at.append(time.perf_counter())
+                    stock.sell(shop, item, 1)
+                query_counts.append(sum(1 for query in queries if not TRANSACTION_SQL.match(query['sql'])))
+        finally:
+            connection.close()
+
+    async def watch(subscribed):
+        async with broker.subscribe(channel) as subscription:
+            subscribed.release()
+            for index in range(sales):
+                await anext(subscription)
+                latencies.append((time.perf_counter() - published_at[index]) * 1000)
+            return subscription.dropped
+
+    async def run():
+        subscribed = asyncio.Semaphore(0)
+        watchers = [asyncio.create_task(watch(subscribed)) for _ in range(subscribers)]
+        for _ in range(subscribers):
+            await subscribed.acquire()
+        started = time.perf_counter()
+        await asyncio.to_thread(sell_all)
+        dropped = await asyncio.gather(*watchers)
+        return time.perf_counter() - started, sum(dropped)
+
+    elapsed, dropped = asyncio.run(run())
+    out(
+        f"subscribers={subscribers} sales={sales} deliveries={len(latencies)} dropped={dropped} "
+        f"deliveries/s={len(latencies) / elapsed:.0f} queries/sale={statistics.fmean(query_counts):.1f}"
+    )
+    if latencies:
+        stats = latency_stats(latencies)
+        out(f"sale to delivery p50={stats['p50']:.2f}ms p99={stats['p99']:.2f}ms")
+
+
+HTTP_LOAD_ENDPOINTS = ('shop-items-list', 'shop-sales-list', 'shop-sales-for-day', 'inventory-analysis')
+
+
+@scenario('http_load')
+def bench_http_load(out, items=200, sales=5000, threads=32, repeat=20, **options):
+    """
+    Sync (WSGI, one thread per in-flight request) against async (ASGI, one event
+    loop) for the read endpoints, with `threads` concurrent clients making
+    `repeat` requests each. Both stacks run in process, so this compares request
+    handling rather than servers; for a real run serve inventory.asgi with uvicorn
+    and inventory.wsgi with a threaded WSGI server against the same database.
+    """
+    owner, shop, _ = seed_shop(items=items, sales=sales, restocks=items)
+    kwargs = {'shop_id': shop.id, 'user_id': owner.id}
+
+    for name in HTTP_LOAD_ENDPOINTS:
+        sync_url = reverse(name, kwargs=kwargs)
+        async_url = reverse(f'async-{name}', kwargs=kwargs)
+        # Only the `next` links may differ, by their async/ prefix
+        if Client().get(sync_url).content != Client().get(async_url).content.replace(b'/async/', b'/'):
+            out(f"{name}: async response differs from the sync one")
+
+        sync_timings = []
+
+        def worker(index):
+            client = Client()
+            for _ in range(repeat):
+                started = time.perf_counter()
+                client.get(sync_url)
+                sync_timings.append((time.perf_counter() - started) * 1000)
+
+        sync_elapsed = run_threads(worker, threads)
+
+        async_timings = []
+
+        async def async_worker():
+            client = AsyncClient()
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await client.get(async_url)
+                async_timings.append((time.perf_counter() - started) * 1000)
+
+        async def run_async():
+            started = time.perf_counter()
+            await asyncio.gather(*(async_worker() for _ in range(threads)))
+            return time.perf_counter() - started
+
+        async_elapsed = asyncio.run(run_async())
+
+        for label, timings, elapsed in (('sync', sync_timings, sync_elapsed), ('async', async_timings, async_elapsed)):
+            stats = latency_stats(timings)
+            out(
+                f"{name:<22} {label:<5} concurrency={threads} req/s={len(timings) / elapsed:.0f} "
+                f"p50={stats['p50']:.1f}ms p99={stats['p99']:.1f}ms"
+            )
+
+
+@scenario('conditional_get')
+def bench_conditional_get(out, items=1000, sales=1000, repeat=50, **options):
+    """Full list responses against If-None-Match revalidations of an unchanged catalog."""
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=items, sales=sales, restocks=items)
+    kwargs = {'shop_id': shop.id, 'user_id': owner.id}
+
+    for name in ('shop-items-list', 'shop-items-by-category', 'shop-sales-list'):
+        url = reverse(name, kwargs=kwargs)
+        response = client.get(url)  # warms the owner cache
+        etag = response['ETag']
+        full, count, stats = measure(lambda: client.get(url), repeat)
+        out(format_stats(f'{name} 200', count, stats) + f" bytes={len(full.content)}")
+        revalidated, count, stats = measure(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag), repeat)
+        out(format_stats(f'{name} {revalidated.status_code}', count, stats) + f" bytes={len(revalidated.content)}")
+
+    # Any write must change the ETag
+    url = reverse('shop-items-list', kwargs=kwargs)
+    etag = client.get(url)['ETag']
+    stock.restock(shop, item_rows[0], 1)
+    status_after_write = client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+    out(f"after a restock the old ETag gets {status_after_write}")
+
+
+@scenario('sync')
+def bench_sync(out, items=1000, sales=100_000, repeat=20, **options):
+    """An offline client's first sync against resyncs after changes of growing size, and upload retries."""
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=items, sales=sales, restocks=items)
+    kwargs = {'shop_id': shop.id, 'user_id': owner.id}
+    # Age the seeded history past the sync overlap, as a shop's past would be
+    earlier = timezone.now() - timedelta(days=1)
+    Item.objects.filter(shop=shop).update(quantity=1_000_000, updated_at=earlier)
+    Sale.objects.filter(shop=shop).update(sold_at=earlier)
+    Restock.objects.filter(shop=shop).update(restocked_at=earlier)
+    url = reverse('shop-sync', kwargs=kwargs)
+
+    started = time.perf_counter()
+    token, pages, rows = None, 0, 0
+    while True:
+        data = client.get(url, {'since': token} if token else {}).json()
+        token, pages = data['token'], pages + 1
+        rows += sum(len(data[key]) for key in ('items', 'sales', 'restocks', 'deleted'))
+        if not data['has_more']:
+            break
+    out(f"{'first sync':<28} pages={pages} rows={rows} {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    # Move the client's position out of the overlap window, as if it synced a while ago
+    positions = {key: (earlier + timedelta(hours=1), None) for key in sync.decode_token(token)}
+    since = sync.encode_token(positions)
+    for changed in (0, 10, 100, 1000):
+        for item in random.choices(item_rows, k=changed):
+            stock.sell(shop, item, 1)
+        response, count, stats = measure(lambda: client.get(url, {'since': since}), repeat)
+        data = response.json()
+        got = sum(len(data[key]) for key in ('items', 'sales', 'restocks', 'deleted'))
+        out(format_stats(f'resync after +{changed} sales', count, stats) + f" rows={got}")
+
+    upload_url = reverse('shop-sync-sales', kwargs=kwargs)
+    body = {'sales': [
+        {'client_id': str(uuid.uuid4()), 'item_id': str(random.choice(item_rows).id), 'quantity': 1}
+        for _ in range(100)
+    ]}
+    for label in ('upload 100 sales', 'retry same upload'):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.post(upload_url, body, content_type='application/json')
+            elapsed = (time.perf_counter() - started) * 1000
+        statuses = Counter(line['status'] for line in response.json()['results'])
+        count = sum(1 for query in queries if not TRANSACTION_SQL.match(query['sql']))
+        out(f"{label:<28} queries={count:<4} {elapsed:.1f}ms {dict(statuses)}")
+
+
+@scenario('serializers')
+def bench_serializers(out, items=10_000, sales=10_000, repeat=5, **options):
+    """
+    Rows/sec of the DRF serializers against the values()-based readers on the
+    same rows: serialization alone, then end to end with the query and rendering.
+    """
+    owner, shop, item_rows = seed_shop(items=items, sales=sales, restocks=items)
+    renderer = JSONRenderer()
+    cases = [
+        ('items', ItemSerializer, item_reader, Item.objects.filter(shop=shop)),
+        ('sales', SaleSerializer, sale_reader, Sale.objects.filter(shop=shop)),
+        ('restocks', RestockSerializer, restock_reader, Restock.objects.filter(shop=shop).select_related('item')),
+    ]
+
+    def rate(rows, stats):
+        return f" rows/s={rows / stats['p50'] * 1000:,.0f}"
+
+    for name, serializer_class, reader, queryset in cases:
+        queryset = queryset.order_by('id')
+        instances, rows = list(queryset), list(reader.values(queryset))
+        _, _, stats = measure(lambda: serializer_class(instances, many=True).data, repeat)
+        out(format_stats(f'{name} serialize drf', 0, stats) + rate(len(rows), stats))
+        _, _, stats = measure(lambda: reader.serialize(rows), repeat)
+        out(format_stats(f'{name} serialize reader', 0, stats) + rate(len(rows), stats))
+
+        drf, count, stats = measure(lambda: renderer.render(serializer_class(queryset.all(), many=True).data), repeat)
+        out(format_stats(f'{name} end-to-end drf', count, stats) + rate(len(rows), stats))
+        fast, count, stats = measure(lambda: renderer.render(reader.serialize(reader.values(queryset))), repeat)
+        out(format_stats(f'{name} end-to-end reader', count, stats) + rate(len(rows), stats))
+        out(f"{name} output identical: {drf == fast}")
+
+
+@scenario('json')
+def bench_json(out, sales=10_000, repeat=20, **options):
+    """Encoding and decoding throughput of DRF's JSON classes against the orjson-backed ones."""
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=100, sales=sales)
+    kwargs = {'shop_id': shop.id, 'user_id': owner.id}
+    day_page = client.get(reverse('shop-sales-for-day', kwargs=kwargs)).data
+    payloads = [
+        ('sales page of 100', day_page),
+        (f'sales list of {sales}', sale_reader.serialize(sale_reader.values(Sale.objects.filter(shop=shop)))),
+    ]
+    for name, data in payloads:
+        expected = JSONRenderer().render(data)
+        for label, renderer in (('drf', JSONRenderer()), ('fast', FastJSONRenderer())):
+            rendered, _, stats = measure(lambda: renderer.render(data), repeat)
+            out(format_stats(f'{name} {label}', 0, stats)
+                + f" MB/s={len(rendered) / stats['p50'] / 1000:.0f} identical={rendered == expected}")
+
+    body = JSONRenderer().render({'sales': [
+        {'client_id': str(uuid.uuid4()), 'item_id': str(random.choice(item_rows).id), 'quantity': 1}
+        for _ in range(1000)
+    ]})
+    expected = JSONParser().parse(io.BytesIO(body))
+    for label, parser in (('drf', JSONParser()), ('fast', FastJSONParser())):
+        parsed, _, stats = measure(lambda: parser.parse(io.BytesIO(body)), repeat)
+        out(format_stats(f'parse 1000-line upload {label}', 0, stats) + f" identical={parsed == expected}")
+
+
+@scenario('chatbot')
+def bench_chatbot(out, items=1000, repeat=200, **options):
+    """Chatbot commands/sec: name resolution in memory against a query per name, and whole messages."""
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=items, sales=0)
+    Item.objects.filter(shop=shop).update(quantity=1_000_000)
+    names = [item.item_name for item in random.choices(item_rows, k=repeat)]
+    typed = [name.lower() for name in names]
+
+    def rate(commands, elapsed):
+        return f"commands/s={commands / elapsed:,.0f}"
+
+    index = chatbot.get_index(shop.pk)
+    started = time.perf_counter()
+    for name in typed:
+        chatbot.parse_message(f'@sales 1 {name} to Ada: card')
+        index.resolve(name)
+    out(f"{'parse + resolve (index)':<28} {rate(repeat, time.perf_counter() - started)}")
+    started = time.perf_counter()
+    for name in typed:
+        Item.objects.filter(shop=shop, item_name__iexact=name).values_list('id', flat=True).first()
+    out(f"{'resolve (query per name)':<28} {rate(repeat, time.perf_counter() - started)}")
+    started, resolved = time.perf_counter(), 0
+    for name in typed:
+        try:
+            index.resolve(name + 'x')  # a typo, left to the fuzzy fallback
+            resolved += 1
+        except chatbot.UnknownProduct:
+            pass
+    out(f"{'resolve with a typo (fuzzy)':<28} {rate(repeat, time.perf_counter() - started)} "
+        f"resolved={resolved}/{repeat}")
+
+    url = reverse('chatbot', kwargs={'shop_id': shop.id, 'user_id': owner.id})
+    for per_message in (1, 10, 50):
+        messages = [
+            '\n'.join(f'@sales 1 {name}' for name in typed[start:start + per_message])
+            for start in range(0, repeat, per_message)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            client.post(url, {'message': messages[0]}, content_type='application/json')
+        query_count = sum(1 for query in queries if not TRANSACTION_SQL.match(query['sql']))
+        started = time.perf_counter()
+        for message in messages:
+            response = client.post(url, {'message': message}, content_type='application/json')
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - started
+        out(f"{f'{per_message} command(s) per message':<28} {rate(len(messages) * per_message, elapsed)} "
+            f"queries/message={query_count}")
+
+
+@scenario('timeseries')
+def bench_timeseries(out, items=100, sales=100_000, repeat=20, **options):
+    """A chart from the bucketed series endpoint against exporting every sale to bucket it client-side."""
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=items, sales=sales)
+    kwargs = {'shop_id': shop.id, 'user_id': owner.id}
+    # Spread the seeded sales over the past year, a day's worth per update
+    now = timezone.now()
+    ids = list(Sale.objects.filter(shop=shop).values_list('id', flat=True))
+    per_day = len(ids) // 365 + 1
+    with transaction.atomic():
+        for day in range(365):
+            chunk = ids[day * per_day:(day + 1) * per_day]
+            Sale.objects.filter(pk__in=chunk).update(sold_at=now - timedelta(days=day, minutes=random.randrange(1440)))
+    Shop.objects.filter(pk=shop.pk).update(timezone='America/New_York')
+
+    url = reverse('shop-sales-series', kwargs=kwargs)
+    year_ago = (now - timedelta(days=365)).date().isoformat()
+    week_ago = (now - timedelta(days=7)).date().isoformat()
+    for label, params in (
+        ('series day x year', {'bucket': 'day', 'from': year_ago}),
+        ('series hour x week', {'bucket': 'hour', 'from': week_ago}),
+        ('series month x year', {'bucket': 'month', 'from': year_ago}),
+    ):
+        response, count, stats = measure(lambda: client.get(url, params), repeat)
+        data = response.json()
+        out(format_stats(label, count, stats) + f" points={len(data['series'])} bytes={len(response.content)} "
+            f"sales={data['totals']['sales']}")
+
+    export_url = reverse('shop-sales-list', kwargs=kwargs)
+    response, count, stats = measure(
+        lambda: b''.join(client.get(export_url, {'export': 'ndjson'}).streaming_content), max(1, repeat // 10)
+    )
+    out(format_stats('ndjson export x year', count, stats) + f" bytes={len(response)}")
+
+
+@scenario('abc')
+def bench_abc(out, items=50_000, sales=200_000, repeat=10, **options):
+    """The catalog analysis of a large shop: its one query, the array arithmetic, and the whole endpoint."""
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=items, sales=sales)
+    rollups.rebuild_rollups(shop)
+    kwargs = {'shop_id': shop.id, 'user_id': owner.id}
+
+    rows, count, stats = measure(lambda: list(abc_analysis._catalog_rows(shop.id)), repeat)
+    out(format_stats('query', count, stats) + f" rows={len(rows)}")
+    analysis, _, stats = measure(lambda: abc_analysis.CatalogAnalysis(rows), repeat)
+    out(format_stats('arrays + measures', 0, stats))
+    _, _, stats = measure(lambda: (analysis.summary(), analysis.items(analysis.select('C', 'stock_value')[:50])), repeat)
+    out(format_stats('summary + top 50', 0, stats))
+    _, count, stats = measure(lambda: abc_analysis.catalog_analysis(shop.id).summary(), repeat)
+    out(format_stats('catalog_analysis (cached)', count, stats) + f" under 100ms={stats['p50'] < 100}")
+
+    url = reverse('catalog-analysis', kwargs=kwargs)
+    response, count, stats = measure(lambda: client.get(url), repeat)
+    summary = response.json()['summary']
+    out(format_stats('endpoint', count, stats) + " classes="
+        + ' '.join(f"{name}:{values['items']}" for name, values in summary['classes'].items()))
+    stock.sell(shop, item_rows[0], 1)
+    started = time.perf_counter()
+    client.get(url)
+    out(f"{'endpoint after a sale':<28} {(time.perf_counter() - started) * 1000:.0f}ms (recomputed)")
+
+
+@scenario('forecast')
+def bench_forecast(out, items=20_000, sales=200_000, threads=4, **options):
+    """
+    Items/sec of the reorder-point job over `threads` shops, in this process and
+    in a pool of `threads` processes. The pool needs a database the workers can
+    open too: run with DB_TEST_NAME set to a file on SQLite.
+    """
+    today = timezone.localdate()
+    shops = []
+    for _ in range(threads):
+        owner, shop, item_rows = seed_shop(items=items // threads, sales=sales // threads)
+        ids = list(Sale.objects.filter(shop=shop).values_list('id', flat=True))
+        per_day = len(ids) // 90 + 1
+        with transaction.atomic():
+            for day in range(90):
+                sold_at = timezone.make_aware(datetime.combine(today - timedelta(days=day + 1), datetime.min.time()))
+                Sale.objects.filter(pk__in=ids[day * per_day:(day + 1) * per_day]).update(sold_at=sold_at)
+        Item.objects.filter(shop=shop).update(created_at=timezone.now() - timedelta(days=365))
+        rollups.rebuild_rollups(shop)
+        shops.append((owner, shop))
+    shop_ids = [shop.id for _, shop in shops]
+
+    runs = [('in process', 1)]
+    if not connection.is_in_memory_db():
+        runs.append((f'{threads} processes', threads))
+    for method in forecasting.FORECAST_METHODS:
+        for label, processes in runs:
+            report = forecasting.compute_reorder_points(shop_ids, forecasting.ForecastOptions(method=method), processes)
+            out(f"{f'{method} {label}':<28} items={report.items} {report.elapsed:.2f}s "
+                f"items/s={report.items_per_second:,.0f} errors={len(report.errors)}")
+    if len(runs) == 1:
+        out("process pool skipped: the test database is in memory (set DB_TEST_NAME to a file)")
+
+    owner, shop = shops[0]
+    url = reverse('shop-reorder-suggestions', kwargs={'shop_id': shop.id, 'user_id': owner.id})
+    client = Client()
+    for params in ({}, {'due': '1'}):
+        response, count, stats = measure(lambda: client.get(url, params), 5)
+        out(format_stats(f"api {urlencode(params) or 'all'}", count, stats) + f" rows={len(response.json())}")
+
+
+class SlowEmailBackend(locmem.EmailBackend):
+    """Django's locmem backend with the delay of a slow SMTP server."""
+    delay = 0.5
+
+    def send_messages(self, messages):
+        time.sleep(self.delay)
+        return super().send_messages(messages)
+
+
+@scenario('tasks')
+def bench_tasks(out, repeat=200, threads=4, **options):
+    """
+    A password reset request that sends its email inline against one that
+    queues it, then the worker's throughput and queue latency on `repeat` tasks.
+    """
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=1, sales=0)
+    url = reverse('password_reset_request')
+    with override_settings(EMAIL_BACKEND='oye.benchmarks.SlowEmailBackend'):
+        started = time.perf_counter()
+        send_mail('Password Reset Request', 'inline', None, [owner.email])
+        out(f"{'reset email sent inline':<28} {(time.perf_counter() - started) * 1000:.0f}ms")
+        _, count, stats = measure(lambda: client.post(url, {'email': owner.email}, content_type='application/json'), 5)
+        out(format_stats('reset request (queued)', count, stats))
+        mail.outbox = []
+        ran = tasks.run_pending_tasks()
+        out(f"queued emails sent by run_pending_tasks: {ran} ran, {len(mail.outbox)} in the outbox")
+
+    Task.objects.all().delete()
+    for n in range(repeat):
+        tasks.enqueue(jobs.send_email, subject=f'Bench {n}', message='Hello', recipient_list=[owner.email])
+    # Threads of an in-memory SQLite database lock each other's tables out rather than wait
+    pools = (1,) if connection.is_in_memory_db() else (1, threads)
+    with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+        for concurrency in pools:
+            Task.objects.update(status=Task.PENDING, run_at=timezone.now(), started_at=None, finished_at=None)
+            started = time.perf_counter()
+            ran = tasks.Worker(concurrency=concurrency, poll_interval=0.05).run(once=True)
+            elapsed = time.perf_counter() - started
+            stats = tasks.queue_stats()
+            out(f"{f'worker x{concurrency}':<28} tasks={ran} tasks/s={ran / elapsed:,.0f} "
+                f"latency p50={stats['latency_p50'] * 1000:.0f}ms p99={stats['latency_p99'] * 1000:.0f}ms "
+                f"(draining a backlog of {repeat})")
+    if len(pools) == 1:
+        out("thread pool skipped: the test database is in memory (set DB_TEST_NAME to a file)")
+
+
+def _photo(width, height):
+    """A JPEG camera photo: noisy enough to compress like one, with EXIF (GPS included) and an ICC profile."""
+    image = Image.effect_noise((width // 8, height // 8), 64).convert('RGB').resize((width, height))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    exif[0x8825] = {1: 'N', 2: (5.0, 36.0, 0.0)}  # GPS latitude
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=92, exif=exif, icc_profile=icc_profile)
+    return buffer.getvalue()
+
+
+def _legacy_renditions(data):
+    """Each rendition fitted from the fully decoded original, as a plain Pillow pipeline would."""
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert('RGB')
+    for size in images.RENDITIONS.values():
+        ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS).save(io.BytesIO(), 'WEBP', quality=80)
+
+
+@scenario('images')
+def bench_images(out, width=4000, height=3000, repeat=5, **options):
+    """
+    Rendering a camera-sized upload, what the renditions weigh against the
+    original, and the upload request, which only reads the header.
+    """
+    client = Client()
+    owner, shop, item_rows = seed_shop(items=1, sales=0)
+    key = issue_token(owner)
+    data = _photo(width, height)
+    out(f"{'upload':<28} {width}x{height} bytes={len(data):,}")
+
+    with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+        _, _, stats = measure(lambda: _legacy_renditions(data), repeat)
+        out(format_stats('full decode + fit', 0, stats))
+        renditions, _, stats = measure(lambda: images.render_renditions(io.BytesIO(data), owner.userprofile.pk), repeat)
+        out(format_stats('render_renditions', 0, stats))
+        for name, rendition in renditions.items():
+            sizes, kept = [], []
+            for output_format in images.OUTPUT_FORMATS:
+                with default_storage.open(rendition[output_format]) as file:
+                    sizes.append(f"{output_format}={file.size:,}")
+                    info = Image.open(file).info
+                    kept += [key for key in ('exif', 'icc_profile', 'xmp') if key in info]
+            dimensions = f"{rendition['width']}x{rendition['height']}" if name == 'original' else f"{rendition['size']}px"
+            out(f"{name:<28} {dimensions} {' '.join(sizes)} metadata={kept or 'none'}")
+
+        url = reverse('user-account-update')
+        headers = {'HTTP_AUTHORIZATION': f'Token {key}'}
+
+        def upload(content):
+            body = encode_multipart(BOUNDARY, {'profile.profile_picture': SimpleUploadedFile('me.jpg', content)})
+            return client.patch(url, body, content_type=MULTIPART_CONTENT, **headers)
+
+        response, count, stats = measure(lambda: upload(data), repeat)
+        out(format_stats('upload request', count, stats) + f" status={response.status_code} "
+            f"queued={Task.objects.filter(name=jobs.render_profile_picture.task_name).count()}")
+        started = time.perf_counter()
+        ran = tasks.run_pending_tasks()
+        out(f"{'renditions made by the queue':<28} {ran} task(s) in {(time.perf_counter() - started) * 1000:.0f}ms, "
+            f"{len(default_storage.listdir(images.rendition_dir(owner.userprofile.pk))[1])} files kept")
+        profile = client.get(reverse('user-profile-detail', kwargs={'user_id': owner.id})).json()
+        out(f"{'profile thumbnail':<28} {profile['renditions']['thumbnail']['webp']}")
+
+        with override_settings(PROFILE_PICTURE_MAX_PIXELS=width * height - 1):
+            response, _, stats = measure(lambda: upload(data), repeat)
+        out(format_stats('oversized upload refused', 0, stats) + f" status={response.status_code} "
+            f"error={response.json()['profile']['profile_picture'][0]!r}")
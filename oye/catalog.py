@@ -0,0 +1,71 @@
+"""
+Per-shop catalog version for conditional GETs.
+
+Shop.catalog_version is bumped after every committed Item, Sale or Restock
+write, low-stock flag flip and Shop change, so list endpoints can derive an
+ETag from that one column and answer a matching If-None-Match with 304
+without reading any of the rows they list.
+"""
+import hashlib
+import zoneinfo
+from functools import partial, update_wrapper
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Shop
+
+
+def bump_catalog_version(shop_id):
+    """Mark the shop's lists as changed once the current transaction commits."""
+    # After commit, so the bump neither holds the shop row locked for the rest
+    # of the transaction nor announces data that other readers cannot see yet.
+    # Once per transaction is enough, however many of its writes ask for it.
+    connection = transaction.get_connection()
+    for _, callback, _ in connection.run_on_commit:
+        if isinstance(callback, partial) and callback.func is _bump and callback.args == (shop_id,):
+            return
+    # robust: a caller told that its committed write failed would retry it. Named
+    # after _bump, as Django logs a failed robust callback by its __qualname__.
+    transaction.on_commit(update_wrapper(partial(_bump, shop_id), _bump), robust=True)
+
+
+def _bump(shop_id):
+    Shop.objects.filter(pk=shop_id).update(catalog_version=F('catalog_version') + 1)
+
+
+def get_catalog_version(shop_id):
+    return Shop.objects.filter(pk=shop_id).values_list('catalog_version', flat=True).first()
+
+
+def _etag(request, version, *extra):
+    variant = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    return '"' + '-'.join([str(version), hashlib.blake2b(variant.encode(), digest_size=8).hexdigest(), *extra]) + '"'
+
+
+def catalog_etag(request, shop_id, **kwargs):
+    """ETag of a shop list response: the catalog version plus what the request asked for."""
+    version = get_catalog_version(shop_id)
+    if version is None:
+        return None
+    return _etag(request, version)
+
+
+def dated_catalog_etag(request, shop_id, **kwargs):
+    """
+    catalog_etag for windows relative to today, which change at midnight without
+    any write: the shop's midnight for what is bucketed in its time zone, and
+    the project's for the daily rollups.
+    """
+    shop = Shop.objects.filter(pk=shop_id).values_list('catalog_version', 'timezone').first()
+    if shop is None:
+        return None
+    version, tz_name = shop
+    shop_today = timezone.localdate(timezone=zoneinfo.ZoneInfo(tz_name))
+    return _etag(request, version, f'{shop_today:%Y%m%d}', f'{timezone.localdate():%Y%m%d}')
+
+
+def window_etag(request, version, start, end):
+    """ETag of a response over the window [start, end) of a shop whose catalog is at `version`."""
+    return _etag(request, version, f'{start.timestamp():.0f}', f'{end.timestamp():.0f}')
@@ -0,0 +1,338 @@
+"""
+Command engine for the shop chatbot.
+
+A message holds one command per line:
+
+    @sales <quantity> <product> [to <customer>][: <payment method>]
+    @add <quantity> <product>
+    @inventory [<quantity>] <product>
+    @new <name> <category> <quantity> <cost price> <selling price> [<description>]
+
+Every line is parsed against precompiled grammars before anything runs, then
+the commands run in order in one transaction, so a failing line rolls back the
+whole message. Products are named the way users type them and resolved through
+a per-shop in-memory index of item names (exact name, then unique prefix, then
+closest spelling), so a name costs no query once the shop's index is loaded.
+"""
+import difflib
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+
+from . import stock
+from .models import Item, Sale, Shop
+from .permissions import get_shop_owner_id
+
+MAX_COMMANDS = 100
+INDEX_CACHE_SIZE = 256
+INDEX_TTL = 300
+# An unknown name reloads an index at most this often, to pick up items created elsewhere
+MISS_RELOAD_SECONDS = 5
+FUZZY_CUTOFF = 0.75
+# How much closer than the runner-up a misspelt name must be to the best match to resolve to it
+FUZZY_MARGIN = 0.05
+
+COMMAND = re.compile(r'@(?P<command>\w+)(?:\s+(?P<args>.*?))?\s*')
+GRAMMARS = {
+    'sales': re.compile(
+        r'(?P<quantity>\d+)\s+(?P<product>.+?)'
+        r'(?:\s+to\s+(?P<customer>.+?))?(?:\s*:\s*(?P<payment_method>\w+))?'
+    ),
+    'add': re.compile(r'(?P<quantity>\d+)\s+(?P<product>.+?)'),
+    'inventory': re.compile(r'(?:(?P<quantity>\d+)\s+)?(?P<product>.+?)'),
+    'new': re.compile(
+        r'(?P<item_name>"[^"]+"|\S+)\s+(?P<category>\w+)\s+(?P<quantity>\d+)\s+'
+        r'(?P<cost_price>\d+(?:\.\d{1,2})?)\s+(?P<selling_price>\d+(?:\.\d{1,2})?)(?:\s+(?P<description>.+))?'
+    ),
+}
+PAYMENT_METHODS = dict(Sale.PAYMENT_METHODS)
+CATEGORIES = dict(Item.ITEM_CATEGORIES)
+CENT = Decimal('0.01')
+
+Command = namedtuple('Command', 'line name args')
+
+
+class CommandError(Exception):
+    def __init__(self, message, status=400, line=None):
+        super().__init__(message)
+        self.status = status
+        self.line = line
+
+
+class UnknownProduct(CommandError):
+    def __init__(self, name, suggestions=()):
+        message = f"No product called {name!r} in this shop."
+        if suggestions:
+            message += f" Did you mean {', '.join(suggestions)}?"
+        super().__init__(message, status=404)
+
+
+def normalize(name):
+    return ' '.join(name.casefold().split())
+
+
+class NameIndex:
+    """One shop's item names, normalized, for exact, prefix and fuzzy lookups."""
+
+    def __init__(self, items=()):
+        self._names = None
+        self.ids = {}
+        self.display = {}
+        for item_id, name in items:
+            self.add(item_id, name)
+        self.loaded_at = time.monotonic()
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = sorted(self.ids)
+        return self._names
+
+    def add(self, item_id, name):
+        key = normalize(name)
+        self.ids.setdefault(key, []).append(item_id)
+        self.display.setdefault(key, name)
+        self._names = None
+
+    def copy(self):
+        index = NameIndex()
+        index.ids = {key: list(ids) for key, ids in self.ids.items()}
+        index.display = dict(self.display)
+        index.loaded_at = self.loaded_at
+        return index
+
+    def resolve(self, name):
+        """Id of the item called `name`; raises UnknownProduct if there is no single best match."""
+        key = normalize(name)
+        if key in self.ids:
+            ids = self.ids[key]
+            if len(ids) > 1:
+                raise CommandError(f"{len(ids)} products are called {name!r}; rename one of them.")
+            return ids[0]
+
+        names = self.names
+        start = bisect_left(names, key)
+        matches = []
+        for candidate in names[start:start + 4]:
+            if not candidate.startswith(key):
+                break
+            matches.append(candidate)
+        if len(matches) == 1:
+            return self.resolve(matches[0])
+        if not matches:
+            scored = _closest(key, names)
+            if scored and (len(scored) == 1 or scored[0][0] - scored[1][0] >= FUZZY_MARGIN):
+                return self.resolve(scored[0][1])
+            matches = [match for _, match in scored]
+        raise UnknownProduct(name, [self.display[match] for match in matches])
+
+
+def _closest(key, names, n=3):
+    """difflib.get_close_matches, keeping the scores: (ratio, name) pairs, best first."""
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(key)
+    scored = []
+    for name in names:
+        matcher.set_seq1(name)
+        if (matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.quick_ratio() >= FUZZY_CUTOFF
+                and matcher.ratio() >= FUZZY_CUTOFF):
+            scored.append((matcher.ratio(), name))
+    return heapq.nlargest(n, scored)
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(shop_id, refresh=False):
+    key = str(shop_id)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and not refresh and time.monotonic() - index.loaded_at < INDEX_TTL:
+            _indexes.move_to_end(key)
+            return index
+    index = NameIndex(Item.objects.filter(shop_id=shop_id).values_list('id', 'item_name').iterator())
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def forget_index(shop_id):
+    with _indexes_lock:
+        _indexes.pop(str(shop_id), None)
+
+
+def _clean(name, args):
+    if args.get('quantity') is not None:
+        args['quantity'] = int(args['quantity'])
+    if name == 'sales':
+        payment_method = (args['payment_method'] or 'cash').lower()
+        if payment_method not in PAYMENT_METHODS:
+            raise CommandError(f"Unknown payment method {payment_method!r}; use one of {', '.join(PAYMENT_METHODS)}.")
+        args['payment_method'] = payment_method
+    elif name == 'new':
+        args['item_name'] = args['item_name'].strip('"')
+        args['category'] = args['category'].lower()
+        if args['category'] not in CATEGORIES:
+            raise CommandError(f"Unknown category {args['category']!r}; use one of {', '.join(CATEGORIES)}.")
+        # At the scale the columns store them, as a sale of the new item in the
+        # same message prices itself from the unsaved values
+        args['cost_price'] = Decimal(args['cost_price']).quantize(CENT)
+        args['selling_price'] = Decimal(args['selling_price']).quantize(CENT)
+    return args
+
+
+def parse_message(message, allowed=GRAMMARS):
+    """The commands in `message`, one per non-blank line; raises CommandError for the first bad line."""
+    lines = [(number, line.strip()) for number, line in enumerate(message.splitlines(), 1) if line.strip()]
+    if not lines:
+        raise CommandError(f"Invalid command: {message}")
+    if len(lines) > MAX_COMMANDS:
+        raise CommandError(f"At most {MAX_COMMANDS} commands per message.")
+
+    commands = []
+    for number, text in lines:
+        match = COMMAND.fullmatch(text)
+        name = match and match['command'].lower()
+        args = name in allowed and GRAMMARS[name].fullmatch(match['args'] or '')
+        if not args:
+            raise CommandError(f"Invalid command: {text}", line=number)
+        try:
+            commands.append(Command(number, name, _clean(name, args.groupdict())))
+        except CommandError as e:
+            e.line = number
+            raise
+    return commands
+
+
+class CommandRunner:
+    """Runs parsed commands for one shop. `item` stands in for every product, for chats opened on an item."""
+
+    def __init__(self, shop, item=None):
+        self.shop = shop
+        self.item = item
+        self.index = None
+        self.items = {}
+
+    def run(self, commands):
+        # Load every product the message names with one query; names only an
+        # earlier @new in the same message creates are looked up as they come
+        if self.item is None:
+            ids = set()
+            for command in commands:
+                if 'product' in command.args:
+                    try:
+                        ids.add(self.resolve(command.args['product']))
+                    except CommandError:
+                        pass
+            self.items = Item.objects.filter(shop=self.shop).in_bulk(ids)
+
+        results = []
+        with transaction.atomic():
+            for command in commands:
+                try:
+                    results.append(getattr(self, f'run_{command.name}')(**command.args))
+                except CommandError as e:
+                    e.line = command.line
+                    raise
+        return results
+
+    def resolve(self, product):
+        if self.index is None:
+            self.index = get_index(self.shop.pk)
+        try:
+            return self.index.resolve(product)
+        except UnknownProduct:
+            if time.monotonic() - self.index.loaded_at < MISS_RELOAD_SECONDS:
+                raise
+            self.index = get_index(self.shop.pk, refresh=True)
+            return self.index.resolve(product)
+
+    def get_item(self, product):
+        if self.item is not None:
+            return self.item
+        item_id = self.resolve(product)
+        if item_id not in self.items:
+            item = Item.objects.filter(shop=self.shop, pk=item_id).first()
+            if item is None:
+                raise UnknownProduct(product)
+            self.items[item_id] = item
+        return self.items[item_id]
+
+    def run_sales(self, quantity, product, customer, payment_method):
+        item = self.get_item(product)
+        try:
+            sale = stock.sell(self.shop, item, quantity, payment_method=payment_method, customer=customer)
+        except stock.InsufficientStock:
+            raise CommandError(f"Not enough {item.item_name} in stock.")
+        except ValueError as e:
+            raise CommandError(str(e))
+        to_customer = f" to {customer}" if customer else ""
+        return {"message": f"✅ Sold {quantity} {item.item_name}{to_customer}.", "total_amount": sale.total_price}
+
+    def run_add(self, quantity, product):
+        item = self.get_item(product)
+        try:
+            stock.restock(self.shop, item, quantity)
+        except ValueError as e:
+            raise CommandError(str(e))
+        return {"message": f"✅ Added {quantity} {item.item_name} to inventory."}
+
+    def run_inventory(self, quantity, product):
+        item = self.get_item(product)
+        # Read now, so earlier commands of the same message are counted
+        left = Item.objects.filter(pk=item.pk).values_list('quantity', flat=True).get()
+        return {"message": f"📊 {item.item_name} stock: {left} left"}
+
+    def run_new(self, item_name, category, quantity, cost_price, selling_price, description):
+        item = Item.objects.create(
+            shop=self.shop,
+            item_name=item_name,
+            category=category,
+            description=description,
+            cost_price=cost_price,
+            selling_price=selling_price,
+            quantity=quantity,
+        )
+        # A private copy: the shared index must not see the item before it commits
+        self.index = (self.index or get_index(self.shop.pk)).copy()
+        self.index.add(item.pk, item.item_name)
+        self.items[item.pk] = item
+        return {"message": f"✅ Added new product {item_name} to the shop.", "item_id": item.pk}
+
+
+def handle_message(shop_id, user_id, message, item_id=None, allowed=GRAMMARS):
+    """Run a chat message for the shop's owner; returns (response data, status)."""
+    owner_id = get_shop_owner_id(shop_id)
+    if owner_id is None:
+        return {"error": "Shop not found"}, 404
+    if str(owner_id) != str(user_id):
+        return {"error": "You do not have permission to perform this action"}, 403
+
+    try:
+        commands = parse_message(message, allowed)
+        shop = Shop.objects.get(pk=shop_id)
+        item = None
+        if item_id is not None:
+            item = Item.objects.filter(pk=item_id, shop_id=shop_id).first()
+            if item is None:
+                return {"error": "Item not found"}, 404
+        results = CommandRunner(shop, item).run(commands)
+    except CommandError as e:
+        error = {"error": str(e)}
+        if e.line is not None and len(message.splitlines()) > 1:
+            error["line"] = e.line
+        return error, e.status
+
+    if len(results) == 1:
+        return results[0], 200
+    return {"message": "\n".join(result["message"] for result in results), "results": results}, 200
@@ -0,0 +1,55 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+SALE_EXPORT_FIELDS = ['id', 'shop', 'item', 'quantity', 'total_price', 'cost_price', 'profit', 'payment_method', 'sold_at']
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _sale_rows(queryset):
+    rows = queryset.values_list(
+        'id', 'shop_id', 'item_id', 'quantity', 'total_price', 'cost_price', 'payment_method', 'sold_at'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for sale_id, shop_id, item_id, quantity, total_price, cost_price, payment_method, sold_at in rows:
+        sold_at = sold_at.isoformat()
+        if sold_at.endswith('+00:00'):
+            sold_at = sold_at[:-6] + 'Z'
+        yield [
+            str(sale_id), str(shop_id), str(item_id), quantity, str(total_price),
+            str(cost_price), str(total_price - cost_price), payment_method, sold_at,
+        ]
+
+
+def _ndjson_lines(queryset):
+    for row in _sale_rows(queryset):
+        yield json.dumps(dict(zip(SALE_EXPORT_FIELDS, row))) + '\n'
+
+
+def _csv_lines(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(SALE_EXPORT_FIELDS)
+    for row in _sale_rows(queryset):
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', _ndjson_lines),
+    'csv': ('text/csv', _csv_lines),
+}
+
+
+def stream_sales(queryset, export_format, filename='sales'):
+    """Stream every sale in `queryset` as NDJSON or CSV without materializing the result."""
+    content_type, lines = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(lines(queryset), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,240 @@
+"""
+Demand forecasts and reorder points for every item of every shop.
+
+For a chunk of a shop's items, the daily units sold over the last
+`history_days` days (read from the daily rollups) become one items x days
+matrix; forecasts are then fitted for the whole chunk at once, looping over
+days rather than items. Each item gets:
+
+    reorder point    = demand x lead time + safety stock
+    reorder quantity = enough to reach demand x (lead time + review period)
+                       + safety stock from what is on hand
+
+where the safety stock covers SERVICE_LEVEL_Z deviations of demand over the
+lead time. Days before an item was created are left out of its history.
+
+Shops are independent, so compute_reorder_points spreads them over a process
+pool; each worker opens its own database connection.
+"""
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import django
+import numpy as np
+from django.db import connections, transaction
+from django.db.models import CharField, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Item, ReorderSuggestion, SalesDailyRollup, Shop
+
+FORECAST_METHODS = dict(ReorderSuggestion.FORECAST_METHODS)
+HISTORY_DAYS = 90
+LEAD_TIME_DAYS = 7
+REVIEW_DAYS = 14
+SMOOTHING = 0.2
+# About a 95% chance of not running out during the lead time
+SERVICE_LEVEL_Z = 1.65
+CHUNK_SIZE = 2000
+SUGGESTION_FIELDS = (
+    'method', 'daily_demand', 'demand_deviation', 'history_days', 'lead_time_days',
+    'reorder_point', 'reorder_quantity', 'quantity_on_hand', 'computed_at',
+)
+
+
+@dataclass
+class ForecastOptions:
+    method: str = 'ses'
+    history_days: int = HISTORY_DAYS
+    lead_time_days: int = LEAD_TIME_DAYS
+    review_days: int = REVIEW_DAYS
+    smoothing: float = SMOOTHING
+    chunk_size: int = CHUNK_SIZE
+
+
+@dataclass
+class ForecastReport:
+    shops: int = 0
+    items: int = 0
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def items_per_second(self):
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+
+def _id_text(field):
+    # Ids as the database spells them, skipping a UUID conversion per row
+    return Cast(field, CharField())
+
+
+def demand_matrix(item_ids, start, days):
+    """
+    Units sold per item (rows, in the order of `item_ids`, as _id_text spells
+    them) and day (columns, from `start`).
+    """
+    rows = {item_id: row for row, item_id in enumerate(item_ids)}
+    sold = (
+        SalesDailyRollup.objects.filter(item_id__in=item_ids, date__gte=start, date__lt=start + timedelta(days=days))
+        .values_list(_id_text('item_id'), 'date')
+        .annotate(units=Sum('quantity'))
+        .order_by()
+    )
+    item_index, day_index, units = [], [], []
+    for item_id, date, quantity in sold:
+        item_index.append(rows[item_id])
+        day_index.append((date - start).days)
+        units.append(quantity)
+    matrix = np.zeros((len(item_ids), days))
+    matrix[item_index, day_index] = units
+    return matrix
+
+
+def forecast(demand, active, method='ses', smoothing=SMOOTHING):
+    """
+    Daily demand and its standard deviation per row of `demand`, counting only
+    the days `active` marks. 'ses' smooths exponentially, starting from the
+    mean; 'sma' is the plain mean over the active days.
+    """
+    days = active.sum(axis=1)
+    seen = np.maximum(days, 1)
+    mean = (demand * active).sum(axis=1) / seen
+    deviation = np.sqrt((((demand - mean[:, None]) * active) ** 2).sum(axis=1) / np.maximum(days - 1, 1))
+    if method == 'sma':
+        return mean, deviation
+    level = mean
+    for day in range(demand.shape[1]):
+        level = np.where(active[:, day], level + smoothing * (demand[:, day] - level), level)
+    return level, deviation
+
+
+def reorder_levels(daily_demand, deviation, on_hand, lead_time_days, review_days):
+    """(reorder point, reorder quantity) arrays, in whole units."""
+    safety_stock = SERVICE_LEVEL_Z * deviation * math.sqrt(lead_time_days)
+    reorder_point = np.ceil(daily_demand * lead_time_days + safety_stock)
+    order_up_to = np.ceil(daily_demand * (lead_time_days + review_days) + safety_stock)
+    reorder_quantity = np.maximum(order_up_to - np.maximum(on_hand, 0), 0)
+    return reorder_point.astype(np.int64), reorder_quantity.astype(np.int64)
+
+
+def _suggest(shop_id, items, today, options):
+    """ReorderSuggestions for one chunk of (id, quantity, created_at) item rows."""
+    item_ids = [item_id for item_id, _, _ in items]
+    start = today - timedelta(days=options.history_days)
+    demand = demand_matrix(item_ids, start, options.history_days)
+    # Days from each item's creation on; an item created today still gets its one day
+    first_day = np.array([
+        min((timezone.localdate(created_at) - start).days, options.history_days - 1) for _, _, created_at in items
+    ])
+    active = np.arange(options.history_days)[None, :] >= first_day[:, None]
+    daily_demand, deviation = forecast(demand, active, options.method, options.smoothing)
+    on_hand = np.array([quantity for _, quantity, _ in items])
+    reorder_point, reorder_quantity = reorder_levels(
+        daily_demand, deviation, on_hand, options.lead_time_days, options.review_days
+    )
+
+    computed_at = timezone.now()
+    return [
+        ReorderSuggestion(
+            shop_id=shop_id,
+            item_id=item_id,
+            method=options.method,
+            daily_demand=round(demand_value, 4),
+            demand_deviation=round(deviation_value, 4),
+            history_days=history,
+            lead_time_days=options.lead_time_days,
+            reorder_point=point,
+            reorder_quantity=quantity,
+            quantity_on_hand=stock,
+            computed_at=computed_at,
+        )
+        for item_id, demand_value, deviation_value, history, point, quantity, stock in zip(
+            item_ids, daily_demand.tolist(), deviation.tolist(), active.sum(axis=1).tolist(),
+            reorder_point.tolist(), reorder_quantity.tolist(), on_hand.tolist(),
+        )
+    ]
+
+
+def compute_shop_reorder_points(shop_id, options=None):
+    """Forecast every item of a shop, a chunk at a time; returns the number of items."""
+    options = options or ForecastOptions()
+    # Full days only: today's sales are still coming in
+    today = timezone.localdate()
+    items = Item.objects.filter(shop_id=shop_id).order_by('id').values_list(_id_text('id'), 'quantity', 'created_at')
+    count = 0
+    last_id = None
+    while True:
+        chunk = items.filter(id__gt=last_id) if last_id is not None else items
+        chunk = list(chunk[:options.chunk_size])
+        if not chunk:
+            return count
+        with transaction.atomic():
+            ReorderSuggestion.objects.bulk_create(
+                _suggest(shop_id, chunk, today, options),
+                update_conflicts=True,
+                unique_fields=['item'],
+                update_fields=SUGGESTION_FIELDS,
+            )
+        count += len(chunk)
+        last_id = chunk[-1][0]
+
+
+def _compute(shop_id, options):
+    """(shop id, items, seconds, error) for one shop; a failing shop does not stop the others."""
+    started = time.perf_counter()
+    try:
+        return shop_id, compute_shop_reorder_points(shop_id, options), time.perf_counter() - started, None
+    except Exception as e:
+        return shop_id, 0, time.perf_counter() - started, f"{type(e).__name__}: {e}"
+
+
+def _compute_in_worker(shop_id, options):
+    try:
+        return _compute(shop_id, options)
+    finally:
+        connections.close_all()
+
+
+def _init_worker():
+    # Needed where workers are spawned rather than forked
+    django.setup()
+
+
+def compute_reorder_points(shop_ids=None, options=None, processes=None, on_shop=None):
+    """
+    Compute the reorder suggestions of the given shops (every shop by default)
+    in a pool of `processes` worker processes, or in this process with 1.
+    `on_shop(shop_id, items, seconds, error)` is called as each shop finishes.
+    """
+    options = options or ForecastOptions()
+    if options.method not in FORECAST_METHODS:
+        raise ValueError(f"Unknown forecast method {options.method!r}.")
+    if shop_ids is None:
+        shop_ids = list(Shop.objects.order_by('id').values_list('id', flat=True))
+    report = ForecastReport()
+    started = time.perf_counter()
+
+    def finished(shop_id, items, seconds, error):
+        report.shops += 1
+        report.items += items
+        if error is not None:
+            report.errors.append((shop_id, error))
+        if on_shop is not None:
+            on_shop(shop_id, items, seconds, error)
+
+    if processes == 1 or len(shop_ids) <= 1:
+        for shop_id in shop_ids:
+            finished(*_compute(shop_id, options))
+    else:
+        # Forked workers must not inherit this process's open connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+            futures = [pool.submit(_compute_in_worker, shop_id, options) for shop_id in shop_ids]
+            for future in as_completed(futures):
+                finished(*future.result())
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,73 @@
+"""
+Password hashers with their cost taken from settings.PASSWORD_HASHING, and
+rehashing of outdated hashes off the request path.
+
+The hashers keep Django's algorithm names, so hashes they write stay readable
+by the stock hashers and vice versa. Django asks for a rehash whenever a hash
+was made with another algorithm or other parameters than the preferred
+hasher's; `schedule_rehash` does that on a background thread so the login that
+noticed it does not pay for a second hash.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+def _param(name, default):
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, default)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = _param('PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = _param('SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+    block_size = _param('SCRYPT_BLOCK_SIZE', hashers.ScryptPasswordHasher.block_size)
+    parallelism = _param('SCRYPT_PARALLELISM', hashers.ScryptPasswordHasher.parallelism)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Needs the argon2-cffi package, like Django's own Argon2 hasher."""
+    time_cost = _param('ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = _param('ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = _param('ARGON2_PARALLELISM', hashers.Argon2PasswordHasher.parallelism)
+
+
+_rehash_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PASSWORD_REHASH_WORKERS', 1),
+    thread_name_prefix='password-rehash',
+)
+
+
+def rehash_password(user_id, old_encoded, raw_password):
+    """Store a fresh hash of `raw_password` unless the password changed in the meantime."""
+    from .models import User
+
+    # .update() rather than save(): no signals, and the old hash in the filter
+    # keeps a password reset that raced with this login from being overwritten
+    return User.objects.filter(pk=user_id, password=old_encoded).update(
+        password=hashers.make_password(raw_password),
+    )
+
+
+def _rehash_in_background(user_id, old_encoded, raw_password):
+    close_old_connections()
+    try:
+        rehash_password(user_id, old_encoded, raw_password)
+    except Exception:
+        logger.exception("Could not rehash the password of user %s", user_id)
+    finally:
+        connection.close()
+
+
+def schedule_rehash(user_id, old_encoded, raw_password):
+    """The `setter` for check_password: rehash later, or right away when PASSWORD_REHASH_ASYNC is off."""
+    if getattr(settings, 'PASSWORD_REHASH_ASYNC', True):
+        return _rehash_executor.submit(_rehash_in_background, user_id, old_encoded, raw_password)
+    rehash_password(user_id, old_encoded, raw_password)
@@ -0,0 +1,190 @@
+"""
+Profile picture renditions.
+
+An upload is checked before it is stored. The checks cover its size, its
+format and its dimensions, and they read only the header, so a request never
+decodes an image. The render_profile_picture task then decodes the picture
+once and saves it as both WebP and JPEG: re-encoded whole, within
+ORIGINAL_SIZE pixels a side, and cropped square at every RENDITIONS size.
+JPEGs decode straight at a fraction of their size. The renditions keep no
+EXIF, ICC or XMP data; colours are converted to sRGB first.
+
+The upload itself, which may carry the camera's metadata (GPS position
+included), is never served: the profile API does not return it, and the task
+deletes it once the renditions are made.
+
+Rendition files are named after a hash of their content, under a directory of
+their profile. A URL therefore always serves the same bytes and can be cached
+forever. UserProfile.renditions records them as
+{name: {'size': pixels, 'webp': path, 'jpeg': path}}, and the whole picture as
+{'original': {'width': pixels, 'height': pixels, 'webp': path, 'jpeg': path}}.
+A profile has none until the task has run.
+"""
+import hashlib
+import io
+import logging
+import math
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageCms, ImageOps
+
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Square renditions, largest first: each is scaled down from the one before
+RENDITIONS = {'large': 512, 'medium': 256, 'small': 128, 'thumbnail': 64}
+# The whole picture is kept at most this many pixels wide and high, twice the largest square
+ORIGINAL_SIZE = 1024
+OUTPUT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+# Only these decoders are ever run on an upload
+INPUT_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+RENDITION_DIR = 'profile_pictures/renditions'
+MAX_BYTES = 5 * 1024 * 1024
+MAX_PIXELS = 24_000_000
+SRGB = ImageCms.createProfile('sRGB')
+
+
+def _limit(name, default):
+    return getattr(settings, f'PROFILE_PICTURE_{name}', default)
+
+
+def open_image(file):
+    """
+    Open `file` as one of INPUT_FORMATS, reading its header only, and refuse
+    it if it has more than PROFILE_PICTURE_MAX_PIXELS pixels. Raises ValidationError.
+    """
+    try:
+        image = Image.open(file, formats=INPUT_FORMATS)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Upload a JPEG, PNG, WebP or GIF image.", code='invalid_image')
+    max_pixels = _limit('MAX_PIXELS', MAX_PIXELS)
+    if image.width * image.height > max_pixels:
+        raise ValidationError(
+            f"The image is {image.width}x{image.height}; images may have at most {max_pixels:,} pixels.",
+            code='too_many_pixels',
+        )
+    return image
+
+
+def validate_profile_picture(upload):
+    """Field validator: the size, format and dimensions of an uploaded picture."""
+    max_bytes = _limit('MAX_BYTES', MAX_BYTES)
+    if upload.size > max_bytes:
+        raise ValidationError(f"Pictures may be at most {max_bytes // 1024:,} KB.", code='too_large')
+    try:
+        open_image(upload)
+    finally:
+        upload.seek(0)
+
+
+def _decode(file, original_size):
+    """The picture in `file`, upright, in sRGB, as RGB or (if it has transparency) RGBA."""
+    image = open_image(file)
+    # A JPEG decodes at 1/2, 1/4 or 1/8 scale when that still covers both the
+    # picture bounded to `original_size` and the largest square rendition
+    scale = max(min(1, original_size / max(image.size)), min(1, max(RENDITIONS.values()) / min(image.size)))
+    image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    if icc_profile:
+        try:
+            image = ImageCms.profileToProfile(image, ImageCms.ImageCmsProfile(io.BytesIO(icc_profile)), SRGB)
+        except (ImageCms.PyCMSError, OSError):
+            logger.warning("Ignoring an unreadable ICC profile")
+    return image
+
+
+def _encode(image, output_format):
+    image_format, options = OUTPUT_FORMATS[output_format]
+    if image_format == 'JPEG' and image.mode == 'RGBA':
+        flat = Image.new('RGB', image.size, 'white')
+        flat.paste(image, mask=image.getchannel('A'))
+        image = flat
+    buffer = io.BytesIO()
+    # Nothing is copied from the upload: only what is passed here is written
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def rendition_dir(profile_id):
+    return posixpath.join(RENDITION_DIR, str(profile_id))
+
+
+def _save(image, profile_id, name):
+    """Save `image` in every OUTPUT_FORMATS; returns the path of each."""
+    paths = {}
+    for output_format in OUTPUT_FORMATS:
+        data = _encode(image, output_format)
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        path = posixpath.join(rendition_dir(profile_id), f'{name}-{digest}.{output_format}')
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(data))
+        paths[output_format] = path
+    return paths
+
+
+def render_renditions(file, profile_id):
+    """Save every rendition of the picture in `file`; returns them as UserProfile.renditions stores them."""
+    original_size = _limit('ORIGINAL_SIZE', ORIGINAL_SIZE)
+    image = _decode(file, original_size)
+    image.thumbnail((original_size, original_size), Image.Resampling.LANCZOS)
+    renditions = {'original': {'width': image.width, 'height': image.height, **_save(image, profile_id, 'original')}}
+    for name, size in RENDITIONS.items():
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        renditions[name] = {'size': size, **_save(image, profile_id, name)}
+    return renditions
+
+
+def _prune(profile_id, keep):
+    """Delete the rendition files of a profile that are not in `keep`."""
+    directory = rendition_dir(profile_id)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        path = posixpath.join(directory, filename)
+        if path not in keep:
+            default_storage.delete(path)
+
+
+def _paths(renditions):
+    return {path for rendition in renditions.values() for key, path in rendition.items() if key in OUTPUT_FORMATS}
+
+
+def make_renditions(profile_id, picture):
+    """
+    Render the profile's picture, if it is still `picture`, record the
+    renditions in its place, delete the upload and the renditions it no longer
+    uses. A picture replaced in the meantime is only deleted: its replacement
+    has a task of its own.
+    """
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None or (profile.profile_picture.name or '') != picture:
+        if picture:
+            default_storage.delete(picture)
+        return
+    renditions = {}
+    if picture:
+        try:
+            with profile.profile_picture.open('rb') as file:
+                renditions = render_renditions(file, profile_id)
+        except ValidationError as e:
+            # Not worth retrying: the file is what it is
+            logger.warning("Profile %s has an unusable picture %s: %s", profile_id, picture, e.messages[0])
+    UserProfile.objects.filter(pk=profile_id, profile_picture=picture).update(renditions=renditions, profile_picture='')
+    # Rendered or replaced by now, the upload is not needed either way
+    if picture:
+        default_storage.delete(picture)
+    current = UserProfile.objects.filter(pk=profile_id).values_list('renditions', flat=True).first() or {}
+    _prune(profile_id, _paths(current))
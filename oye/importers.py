@@ -0,0 +1,213 @@
+"""
+Bulk item import from CSV or JSON Lines.
+
+Rows are read lazily and validated and written one chunk at a time, so memory
+stays bounded by the chunk size no matter how large the file is. A bad row is
+reported and skipped; it never aborts the rest of the file.
+"""
+import csv
+import json
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from itertools import islice
+
+from django.db import transaction
+
+from .alerts import refresh_low_stock
+from .analysis import invalidate_inventory_analysis
+from .catalog import bump_catalog_version
+from .chatbot import forget_index
+from .models import Item
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+ITEM_UPDATE_FIELDS = ['category', 'description', 'cost_price', 'selling_price', 'quantity', 'updated_at']
+
+CATEGORIES = {choice for choice, _ in Item.ITEM_CATEGORIES}
+CATEGORY_LABELS = {label.lower(): choice for choice, label in Item.ITEM_CATEGORIES}
+PRICE_LIMIT = Decimal('100000000')  # max_digits=10, decimal_places=2
+CENT = Decimal('0.01')
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(self, max_errors=1000):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.failed
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def read_rows(stream, file_format):
+    """Yield `(line_number, row)` pairs from a text stream; `row` is a RowError for unreadable lines."""
+    line_number = 0
+    try:
+        for line_number, row in _parse_rows(stream, file_format):
+            yield line_number, row
+    except UnicodeDecodeError as e:
+        # The stream cannot be read past the bad bytes; the rows before them stand
+        yield line_number + 1, RowError(
+            f"The file is not valid UTF-8 ({e.reason}); nothing from line {line_number + 1} on was imported."
+        )
+
+
+def _parse_rows(stream, file_format):
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = RowError(f"Invalid JSON: {e}")
+            else:
+                if not isinstance(row, dict):
+                    row = RowError("Each line must be a JSON object.")
+            yield line_number, row
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _price(row, field):
+    value = row.get(field)
+    if value in (None, ''):
+        return Decimal('0.00')
+    try:
+        price = Decimal(str(value)).quantize(CENT)
+    except (InvalidOperation, ValueError):
+        raise RowError(f"{field} must be a number.")
+    if not price.is_finite():
+        raise RowError(f"{field} must be a number.")
+    if not 0 <= price < PRICE_LIMIT:
+        raise RowError(f"{field} must be between 0 and {PRICE_LIMIT}.")
+    return price
+
+
+def clean_row(row):
+    """Validate one raw row and return the Item field values, or raise RowError."""
+    item_name = str(row.get('item_name') or '').strip()
+    if not item_name:
+        raise RowError("item_name is required.")
+    if len(item_name) > 255:
+        raise RowError("item_name must not exceed 255 characters.")
+
+    category = str(row.get('category') or 'other').strip().lower()
+    category = CATEGORY_LABELS.get(category, category)
+    if category not in CATEGORIES:
+        raise RowError(f"'{category}' is not a valid category.")
+
+    try:
+        quantity = int(row.get('quantity') or 0)
+    except (TypeError, ValueError):
+        raise RowError("quantity must be a whole number.")
+    if quantity < 0:
+        raise RowError("quantity must not be negative.")
+
+    return {
+        'item_name': item_name,
+        'category': category,
+        'description': row.get('description') or None,
+        'cost_price': _price(row, 'cost_price'),
+        'selling_price': _price(row, 'selling_price'),
+        'quantity': quantity,
+    }
+
+
+def _write_chunk(shop, cleaned, upsert, report):
+    """Write one chunk of cleaned rows; returns the ids of the items written."""
+    if not upsert:
+        items = Item.objects.bulk_create([Item(shop=shop, **values) for values in cleaned])
+        report.created += len(cleaned)
+        return [item.pk for item in items]
+
+    # Later rows for the same name win, both within and across chunks
+    by_name = {values['item_name']: values for values in cleaned}
+    report.updated += len(cleaned) - len(by_name)
+    existing = dict(
+        Item.objects.filter(shop=shop, item_name__in=list(by_name)).values_list('item_name', 'id')
+    )
+    # Rows for existing names reuse the item's id, so a single INSERT ... ON CONFLICT (id)
+    # DO UPDATE writes the whole chunk; created_at is left out of the update and survives
+    items = Item.objects.bulk_create(
+        [Item(id=existing.get(name, uuid.uuid4()), shop=shop, **values) for name, values in by_name.items()],
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=ITEM_UPDATE_FIELDS,
+    )
+    report.updated += len(existing)
+    report.created += len(by_name) - len(existing)
+    return [item.pk for item in items]
+
+
+def import_items(shop, rows, upsert=False, chunk_size=1000, max_errors=1000, on_chunk=None):
+    """
+    Import `(line_number, row)` pairs into `shop` in chunks of `chunk_size`.
+
+    With `upsert`, rows whose item_name already exists in the shop update that
+    item instead of creating a duplicate. Returns an ImportReport.
+    """
+    report = ImportReport(max_errors=max_errors)
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        cleaned = []
+        for line_number, row in chunk:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                cleaned.append(clean_row(row))
+            except RowError as e:
+                report.add_error(line_number, str(e))
+        with transaction.atomic():
+            written = _write_chunk(shop, cleaned, upsert, report)
+            # bulk writes bypass the stock ledger, so catch up on the flags of the items just written
+            refresh_low_stock(written)
+
+        report.elapsed = time.perf_counter() - report.started
+        if on_chunk is not None:
+            on_chunk(report)
+
+    report.elapsed = time.perf_counter() - report.started
+    # bulk_create skips the post_save signals that normally clear these
+    transaction.on_commit(partial(invalidate_inventory_analysis, shop.pk))
+    transaction.on_commit(partial(forget_index, shop.pk))
+    bump_catalog_version(shop.pk)
+    return report
@@ -0,0 +1,48 @@
+"""
+Background tasks of the oye app, run by `manage.py run_tasks` (see tasks.py).
+Imported when the app is ready, so every process knows the registered names.
+"""
+from django.core.mail import send_mail
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from . import forecasting, images, rollups
+from .models import Shop, User
+from .tasks import task
+from .utils import password_reset_token
+
+
+@task(max_attempts=8)
+def send_email(subject, message, recipient_list, from_email=None):
+    # fail_silently=False: an SMTP error is retried with backoff
+    send_mail(subject, message, from_email, recipient_list)
+
+
+@task(max_attempts=8)
+def send_password_reset(user_id):
+    # The token is made here rather than by the request, so the reset link is
+    # never stored with the queued task
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = password_reset_token.make_token(user)
+    reset_url = f'http://127.0.0.1:8000/reset-password/{uid}/{token}/'
+    message = f'Hi {user.email},\n\nPlease click the following link to reset your password:\n{reset_url}'
+    send_mail('Password Reset Request', message, 'richmond.kessie@kintampo-hrc.org', [user.email])
+
+
+@task
+def refresh_reorder_points(shop_id):
+    forecasting.compute_shop_reorder_points(shop_id)
+
+
+@task
+def rebuild_sales_rollups(shop_id=None):
+    shop = Shop.objects.get(pk=shop_id) if shop_id is not None else None
+    rollups.rebuild_rollups(shop=shop)
+
+
+@task(max_attempts=3)
+def render_profile_picture(profile_id, picture):
+    images.make_renditions(profile_id, picture)
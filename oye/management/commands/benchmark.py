@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from oye.benchmarks import SCENARIOS, benchmark_database
+
+SCENARIO_OPTIONS = ('items', 'sales', 'repeat', 'threads', 'subscribers')
+
+
+class Command(BaseCommand):
+    help = "Run a benchmark scenario against a throwaway test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument('--items', type=int, help="Number of items to seed.")
+        parser.add_argument('--sales', type=int, help="Number of sales to seed.")
+        parser.add_argument('--repeat', type=int, help="Number of timed calls per measurement.")
+        parser.add_argument('--threads', type=int, help="Number of concurrent worker threads.")
+        parser.add_argument('--subscribers', type=int, help="Number of live-update subscribers.")
+
+    def handle(self, *args, **options):
+        run = SCENARIOS[options['scenario']]
+        scenario_options = {
+            name: value for name, value in options.items()
+            if name in SCENARIO_OPTIONS and value is not None
+        }
+        with benchmark_database():
+            run(self.stdout.write, **scenario_options)
@@ -0,0 +1,70 @@
+import argparse
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from oye.forecasting import FORECAST_METHODS, ForecastOptions, compute_reorder_points
+from oye.models import Shop
+
+
+def at_least(minimum):
+    def parse(value):
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, not {number}")
+        return number
+    parse.__name__ = 'integer'
+    return parse
+
+
+class Command(BaseCommand):
+    help = "Forecast each item's daily demand and store its reorder point and quantity (run it nightly, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        defaults = ForecastOptions()
+        parser.add_argument('--shop', action='append', help="Only this shop; may be given more than once.")
+        parser.add_argument('--method', choices=FORECAST_METHODS, default=defaults.method,
+                            help="ses: exponential smoothing, sma: moving average.")
+        parser.add_argument('--history-days', type=at_least(1), default=defaults.history_days)
+        parser.add_argument('--lead-time-days', type=at_least(0), default=defaults.lead_time_days)
+        parser.add_argument('--review-days', type=at_least(0), default=defaults.review_days)
+        parser.add_argument('--chunk-size', type=at_least(1), default=defaults.chunk_size)
+        parser.add_argument('--processes', type=at_least(1), help="Worker processes; defaults to the number of CPUs.")
+
+    def handle(self, *args, **options):
+        shop_ids = None
+        if options['shop']:
+            wanted = set()
+            for shop_id in options['shop']:
+                try:
+                    wanted.add(uuid.UUID(shop_id))
+                except ValueError:
+                    raise CommandError(f"Shop {shop_id} does not exist.")
+            shop_ids = list(Shop.objects.filter(id__in=wanted).values_list('id', flat=True))
+            missing = wanted - set(shop_ids)
+            if missing:
+                raise CommandError(f"Shop {', '.join(sorted(map(str, missing)))} does not exist.")
+
+        forecast_options = ForecastOptions(
+            method=options['method'],
+            history_days=options['history_days'],
+            lead_time_days=options['lead_time_days'],
+            review_days=options['review_days'],
+            chunk_size=options['chunk_size'],
+        )
+
+        def progress(shop_id, items, seconds, error):
+            if error is not None:
+                self.stderr.write(f"shop {shop_id}: {error}")
+            elif options['verbosity'] > 1:
+                self.stdout.write(f"shop {shop_id}: {items} items in {seconds:.1f}s")
+
+        report = compute_reorder_points(shop_ids, forecast_options, processes=options['processes'], on_shop=progress)
+        style = self.style.WARNING if report.errors else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Forecast {report.items} items of {report.shops} shops in {report.elapsed:.1f}s "
+            f"({report.items_per_second:.0f} items/sec), {len(report.errors)} failed."
+        ))
+        if report.errors:
+            # A non-zero exit status, so cron and schedulers notice
+            raise CommandError(f"{len(report.errors)} of {report.shops} shops failed.")
@@ -0,0 +1,76 @@
+import re
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from oye.benchmarks import benchmark_database
+from oye.tests.helpers import TRANSACTION_SQL, endpoint_requests, seed_shop
+from oye.models import Item, Restock, Sale, SalesDailyRollup
+
+# Tables that grow with the business; a full scan of any of them is a regression
+HOT_TABLES = {model._meta.db_table for model in (Item, Restock, Sale, SalesDailyRollup)}
+# SQLite: "SCAN oye_sale" / "SCAN oye_sale USING INDEX ...", PostgreSQL: "Seq Scan on oye_sale"
+FULL_SCAN = re.compile(r'\b(?:SCAN|Seq Scan on) (\w+)')
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, call every shop endpoint, EXPLAIN each query it runs "
+        "and flag full scans of the hot tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shops', type=int, default=5, help="Number of shops to seed.")
+        parser.add_argument('--items', type=int, default=500, help="Items per shop.")
+        parser.add_argument('--sales', type=int, default=5000, help="Sales per shop.")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not just flagged ones.")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            flagged = self.explain_endpoints(options)
+        if flagged:
+            raise CommandError(f"{flagged} quer{'y' if flagged == 1 else 'ies'} scan a hot table.")
+        self.stdout.write(self.style.SUCCESS("No full scans of hot tables."))
+
+    def explain_endpoints(self, options):
+        # Several shops so a shop_id filter is selective, and fresh statistics for the planner
+        seeded = [
+            seed_shop(items=options['items'], sales=options['sales'], restocks=options['items'])
+            for _ in range(options['shops'])
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        owner, shop, item_rows = seeded[0]
+        item = item_rows[0]
+        Item.objects.filter(pk=item.pk).update(quantity=1_000_000)
+
+        client = Client()
+        flagged = 0
+        for name, method, kwargs, body in endpoint_requests(owner, shop, item):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                getattr(client, method)(reverse(name, kwargs=kwargs), body, content_type='application/json')
+            for query in list(queries):
+                sql = query['sql']
+                if TRANSACTION_SQL.match(sql) or sql.lstrip().upper().startswith('INSERT'):
+                    continue
+                plan = self.explain(sql)
+                scans = sorted({table for table in FULL_SCAN.findall(plan) if table in HOT_TABLES})
+                flagged += bool(scans)
+                if scans:
+                    self.stdout.write(self.style.WARNING(f"{name}: full scan of {', '.join(scans)}"))
+                if scans or options['verbose_plans']:
+                    self.stdout.write(f"  {sql}\n  " + plan.replace('\n', '\n  '))
+        return flagged
+
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+        # SQLite returns (id, parent, notused, detail) rows, PostgreSQL one text column
+        return '\n'.join(str(row[-1]) for row in rows)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from oye.importers import IMPORT_FORMATS, import_items, read_rows
+from oye.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Bulk import items into a shop from a CSV or JSON Lines file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('shop_id')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--upsert', action='store_true', help="Update items whose name already exists in the shop.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            shop = Shop.objects.get(id=options['shop_id'])
+        except (Shop.DoesNotExist, ValidationError):
+            raise CommandError(f"Shop {options['shop_id']} does not exist.")
+
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot tell the format of {path}; pass --format.")
+
+        def progress(report):
+            self.stdout.write(f"{report.rows} rows, {report.failed} failed, {report.rows_per_second:.0f} rows/sec")
+
+        if path == '-':
+            report = import_items(shop, read_rows(sys.stdin, file_format), upsert=options['upsert'],
+                                  chunk_size=options['chunk_size'], on_chunk=progress)
+        else:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                report = import_items(shop, read_rows(stream, file_format), upsert=options['upsert'],
+                                      chunk_size=options['chunk_size'], on_chunk=progress)
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f"... and {report.failed - len(report.errors)} more errors")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.created}, updated {report.updated}, failed {report.failed} "
+            f"in {report.elapsed:.1f}s ({report.rows_per_second:.0f} rows/sec)."
+        ))
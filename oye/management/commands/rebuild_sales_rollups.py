@@ -0,0 +1,24 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from oye.models import Shop
+from oye.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollups from the raw Sale rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help="Only rebuild the rollups of the shop with this id.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        shop = None
+        if options['shop']:
+            try:
+                shop = Shop.objects.get(id=options['shop'])
+            except (Shop.DoesNotExist, ValidationError):
+                raise CommandError(f"Shop {options['shop']} does not exist.")
+
+        created = rebuild_rollups(shop=shop, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} daily sales rollup rows."))
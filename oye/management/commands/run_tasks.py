@@ -0,0 +1,51 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from oye.tasks import Worker, queue_stats
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks (emails, refreshes) until stopped with Ctrl-C or SIGTERM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Tasks run at once.")
+        parser.add_argument('--pool', choices=('thread', 'process'), default='thread',
+                            help="Run tasks on threads (I/O-bound work such as email) or processes (CPU-bound work).")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between checks of an idle queue.")
+        parser.add_argument('--once', action='store_true', help="Exit once no task is due.")
+        parser.add_argument('--stats', action='store_true', help="Print the queue's size and latency, then exit.")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_stats()
+            return
+
+        worker = Worker(options['concurrency'], options['pool'], options['poll_interval'])
+
+        def stop(signum, frame):
+            self.stdout.write("Finishing the running tasks...")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        def progress(task_id, status):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"task {task_id}: {status}")
+
+        ran = worker.run(once=options['once'], on_task=progress)
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} tasks."))
+        self.print_stats()
+
+    def print_stats(self):
+        stats = queue_stats()
+
+        def seconds(value):
+            return '-' if value is None else f"{value:.2f}s"
+
+        self.stdout.write(
+            f"pending={stats['pending']} running={stats['running']} failed={stats['failed']} "
+            f"oldest due={seconds(stats['oldest_due_seconds'])} | last hour: {stats['finished']} finished, "
+            f"queue latency p50={seconds(stats['latency_p50'])} p99={seconds(stats['latency_p99'])}"
+        )
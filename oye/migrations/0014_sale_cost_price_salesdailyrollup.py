@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:49
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def backfill_sale_cost_price(apps, schema_editor):
+    # Existing sales never stored their cost, so use the item's current cost price.
+    Item = apps.get_model('oye', 'Item')
+    Sale = apps.get_model('oye', 'Sale')
+    item_cost = Item.objects.filter(pk=OuterRef('item_id')).values('cost_price')[:1]
+    Sale.objects.update(cost_price=Subquery(item_cost) * F('quantity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0013_sale_customer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='cost_price',
+            field=models.DecimalField(decimal_places=2, default=0.0, help_text='Total cost price of the sold items at the time of sale.', max_digits=10),
+        ),
+        migrations.RunPython(backfill_sale_cost_price, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='SalesDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(help_text='Day the sales were made on.')),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('card', 'Card'), ('online', 'Online'), ('other', 'Other')], max_length=10)),
+                ('quantity', models.IntegerField(default=0, help_text='Quantity of items sold on the day.')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='oye.item')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='oye.shop')),
+            ],
+            options={
+                'verbose_name': 'Sales Daily Rollup',
+                'verbose_name_plural': 'Sales Daily Rollups',
+                'constraints': [models.UniqueConstraint(fields=('shop', 'date', 'item', 'payment_method'), name='unique_sales_daily_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0014_sale_cost_price_salesdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['shop', 'sold_at', 'id'], name='sale_shop_sold_at_id_idx'),
+        ),
+    ]
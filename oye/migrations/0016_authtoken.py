@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0015_sale_shop_sold_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(help_text='SHA-256 digest of the token.', max_length=64, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to='oye.user')),
+            ],
+            options={
+                'verbose_name': 'Auth Token',
+                'verbose_name_plural': 'Auth Tokens',
+            },
+        ),
+    ]
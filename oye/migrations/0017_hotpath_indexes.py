@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0016_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['shop', 'category'], name='item_shop_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('quantity__lt', 10)), fields=['shop', 'quantity'], name='item_shop_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restock',
+            index=models.Index(fields=['shop', 'restocked_at'], include=('quantity',), name='restock_shop_restocked_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['shop', 'item'], include=('quantity', 'total_price', 'cost_price'), name='sale_shop_item_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:27
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def flag_low_stock_items(apps, schema_editor):
+    Item = apps.get_model('oye', 'Item')
+    Item.objects.filter(
+        quantity__lt=Coalesce(F('reorder_level'), F('shop__low_stock_threshold')),
+    ).update(is_low_stock=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0017_hotpath_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('low', 'Low on stock'), ('recovered', 'Back in stock')], max_length=10)),
+                ('quantity', models.IntegerField(help_text='Quantity of the item right after the crossing.')),
+                ('threshold', models.PositiveIntegerField(help_text='Reorder level that was crossed.')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_shop_low_stock_idx',
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='is_low_stock',
+            field=models.BooleanField(default=False, editable=False, help_text='Maintained by the stock ledger: quantity is below the reorder level.'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, help_text="Low-stock threshold for this item; the shop's threshold applies when empty.", null=True),
+        ),
+        migrations.AddField(
+            model_name='shop',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(default=10, help_text='Items with fewer units than this are low on stock, unless they set their own reorder level'),
+        ),
+        migrations.RunPython(flag_low_stock_items, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('is_low_stock', True)), fields=['shop'], name='item_shop_low_stock_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='oye.item'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='oye.shop'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(fields=['shop', 'created_at', 'id'], name='stockalert_shop_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0018_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Bumped on every item, sale or restock write; list endpoints derive their ETags from it'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:33
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0019_shop_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('model', models.CharField(choices=[('item', 'Item'), ('sale', 'Sale'), ('restock', 'Restock')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='client_id',
+            field=models.UUIDField(blank=True, help_text='Id the selling device gave the sale, so offline uploads can be retried safely.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['shop', 'updated_at'], name='item_shop_updated_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sale',
+            constraint=models.UniqueConstraint(fields=('shop', 'client_id'), name='unique_sale_client_id'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='oye.shop'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['shop', 'deleted_at'], name='tombstone_shop_deleted_at_idx'),
+        ),
+    ]
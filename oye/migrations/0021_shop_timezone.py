@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:47
+
+import oye.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0020_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='timezone',
+            field=models.CharField(default='UTC', help_text='IANA time zone the shop trades in (e.g. Africa/Lagos); sales reports bucket days in it', max_length=64, validators=[oye.models.validate_timezone]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:04
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0021_shop_timezone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('method', models.CharField(choices=[('ses', 'Exponential smoothing'), ('sma', 'Moving average')], max_length=3)),
+                ('daily_demand', models.FloatField(help_text='Forecast units sold per day.')),
+                ('demand_deviation', models.FloatField(help_text='Standard deviation of the daily units sold.')),
+                ('history_days', models.PositiveIntegerField(help_text='Days of sales the forecast was fitted on.')),
+                ('lead_time_days', models.PositiveIntegerField()),
+                ('reorder_point', models.PositiveIntegerField(help_text='Reorder when stock falls to this many units.')),
+                ('reorder_quantity', models.PositiveIntegerField(help_text='Units to order to cover the lead time and review period.')),
+                ('quantity_on_hand', models.IntegerField(help_text='Stock of the item when the suggestion was computed.')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestion', to='oye.item')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestions', to='oye.shop')),
+            ],
+            options={
+                'verbose_name': 'Reorder Suggestion',
+                'verbose_name_plural': 'Reorder Suggestions',
+            },
+        ),
+    ]
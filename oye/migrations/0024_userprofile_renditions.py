@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0023_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized copies of the profile picture, made in the background (see images.py).'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:26
+
+import oye.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0024_userprofile_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authtoken',
+            name='expires_at',
+            field=models.DateTimeField(default=oye.models.token_expiry),
+        ),
+    ]
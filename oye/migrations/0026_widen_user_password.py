@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oye', '0025_authtoken_expires_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='password',
+            field=models.CharField(max_length=256),
+        ),
+    ]
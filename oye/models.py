@@ -1,25 +1,30 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
-from django.core.validators import MinLengthValidator, MaxLengthValidator
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from functools import partial
+from .hashers import schedule_rehash
 import uuid
-import random
+import zoneinfo
+from datetime import timedelta
 # Create your models here.
 
 
+def validate_timezone(value):
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(_("%(value)s is not a known time zone."), params={"value": value})
+
+
 class User(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     username = models.CharField(max_length=100, unique=True)
-    password = models.CharField(
-        max_length=100,
-        validators=[
-            MinLengthValidator(8, message=_("Password must be at least 8 characters long.")),
-            MaxLengthValidator(100, message=_("Password must not exceed 100 characters."))
-        ],
-    )
+    # Holds the hash, not the password: scrypt and Argon2 hashes run past 100
+    # characters. The raw password's length is checked by the serializers
+    password = models.CharField(max_length=256)
     email = models.EmailField(max_length=100, unique=True)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -33,8 +38,17 @@ class User(models.Model):
         self.password = make_password(raw_password)
 
     def check_password(self, raw_password):
-        """Checks the user's password."""
-        return check_password(raw_password, self.password)
+        """Checks the user's password, rehashing it in the background if its hash is outdated."""
+        return check_password(raw_password, self.password, setter=partial(schedule_rehash, self.pk, self.password))
+
+    @property
+    def is_authenticated(self):
+        """Always True, so DRF permissions treat an oye User as a logged-in identity."""
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
 
     def __str__(self):
         return self.username
@@ -43,11 +57,32 @@ class User(models.Model):
         verbose_name = "User"
         verbose_name_plural = "Users"
 
+
+def token_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_LIFETIME', 30 * 24 * 60 * 60))
+
+
+class AuthToken(models.Model):
+    key = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 digest of the token.")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="auth_tokens")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=token_expiry)
+
+    class Meta:
+        verbose_name = "Auth Token"
+        verbose_name_plural = "Auth Tokens"
+
+    def __str__(self):
+        return f"Token for {self.user_id}"
+
 class UserProfile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
     profile_picture = models.ImageField(upload_to="profile_pictures", blank=True, null=True)
+    renditions = models.JSONField(
+        default=dict, blank=True, help_text="Resized copies of the profile picture, made in the background (see images.py)."
+    )
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     address = models.TextField(max_length=500, blank=True, null=True)
     date_of_birth = models.DateField(blank=True, null=True)
@@ -101,12 +136,31 @@ class Shop(models.Model):
         help_text="Indicates if the owner has agreed to the privacy policy"
     )
     is_active = models.BooleanField(default=False)
+    catalog_version = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Bumped on every item, sale or restock write; list endpoints derive their ETags from it"
+    )
+    low_stock_threshold = models.PositiveIntegerField(
+        default=10,
+        help_text="Items with fewer units than this are low on stock, unless they set their own reorder level"
+    )
+    timezone = models.CharField(
+        max_length=64,
+        default="UTC",
+        validators=[validate_timezone],
+        help_text="IANA time zone the shop trades in (e.g. Africa/Lagos); sales reports bucket days in it"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.shop_name
 
+    @property
+    def tzinfo(self):
+        return zoneinfo.ZoneInfo(self.timezone)
+
     def total_items_quantity(self):
         return sum(item.quantity for item in self.items.all())
 
@@ -150,6 +204,16 @@ class Item(models.Model):
         default=0, 
         help_text="Stock quantity available in the shop."
     )
+    reorder_level = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Low-stock threshold for this item; the shop's threshold applies when empty."
+    )
+    is_low_stock = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Maintained by the stock ledger: quantity is below the reorder level."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -161,6 +225,17 @@ class Item(models.Model):
     class Meta:
         verbose_name = "Item"
         verbose_name_plural = "Items"
+        indexes = [
+            models.Index(fields=["shop", "category"], name="item_shop_category_idx"),
+            # Delta sync reads a shop's items changed since a point in time
+            models.Index(fields=["shop", "updated_at"], name="item_shop_updated_at_idx"),
+            # Only the few rows that are low on stock
+            models.Index(
+                fields=["shop"],
+                condition=models.Q(is_low_stock=True),
+                name="item_shop_low_stock_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.item_name}"
@@ -174,6 +249,11 @@ class Restock(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Total price of the restocked items.")
     restocked_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["shop", "restocked_at"], include=["quantity"], name="restock_shop_restocked_at_idx"),
+        ]
+
     def __str__(self):
         return f"Restock of {self.quantity} {self.item.item_name} for {self.shop.shop_name} on {self.restocked_at}"
 
@@ -189,9 +269,176 @@ class Sale(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="sales")
     quantity = models.IntegerField(help_text="Quantity of items sold.")
     total_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Total price of the sold items.")
+    cost_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0.00,
+        help_text="Total cost price of the sold items at the time of sale."
+    )
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHODS, help_text="Payment method used for the sale.")
     sold_at = models.DateTimeField(auto_now_add=True)
     customer = models.CharField(max_length=255, blank=True, null=True, help_text="Customer name")
+    client_id = models.UUIDField(
+        blank=True,
+        null=True,
+        help_text="Id the selling device gave the sale, so offline uploads can be retried safely."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["shop", "client_id"], name="unique_sale_client_id"),
+        ]
+        indexes = [
+            # Keyset pagination and windowed reads walk a shop's sales by (sold_at, id)
+            models.Index(fields=["shop", "sold_at", "id"], name="sale_shop_sold_at_id_idx"),
+            # Per-item sales totals of a shop; on PostgreSQL the included columns let
+            # the grouping run as an index-only scan
+            models.Index(
+                fields=["shop", "item"],
+                include=["quantity", "total_price", "cost_price"],
+                name="sale_shop_item_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Sale of {self.quantity} {self.item.item_name} for {self.shop.shop_name} on {self.sold_at}"
+
+
+class StockAlert(models.Model):
+    """An item crossing its reorder level, in either direction."""
+    LOW = "low"
+    RECOVERED = "recovered"
+    KINDS = (
+        (LOW, "Low on stock"),
+        (RECOVERED, "Back in stock"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="stock_alerts")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="stock_alerts")
+    kind = models.CharField(max_length=10, choices=KINDS)
+    quantity = models.IntegerField(help_text="Quantity of the item right after the crossing.")
+    threshold = models.PositiveIntegerField(help_text="Reorder level that was crossed.")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The alert feed reads a shop's alerts forward by (created_at, id)
+            models.Index(fields=["shop", "created_at", "id"], name="stockalert_shop_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} {self.kind} at {self.quantity}"
+
+
+class Tombstone(models.Model):
+    """Marks a deleted item, sale or restock so offline clients can drop their copy."""
+    MODELS = (
+        ("item", "Item"),
+        ("sale", "Sale"),
+        ("restock", "Restock"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="tombstones")
+    model = models.CharField(max_length=10, choices=MODELS)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["shop", "deleted_at"], name="tombstone_shop_deleted_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
+
+
+class SalesDailyRollup(models.Model):
+    """Running per-day sales totals for a shop, one row per item and payment method."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="daily_rollups")
+    date = models.DateField(help_text="Day the sales were made on.")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="daily_rollups")
+    payment_method = models.CharField(max_length=10, choices=Sale.PAYMENT_METHODS)
+    quantity = models.IntegerField(default=0, help_text="Quantity of items sold on the day.")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+
+    class Meta:
+        verbose_name = "Sales Daily Rollup"
+        verbose_name_plural = "Sales Daily Rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["shop", "date", "item", "payment_method"],
+                name="unique_sales_daily_rollup",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} sales for {self.shop_id} on {self.date}"
+
+
+class ReorderSuggestion(models.Model):
+    """When and how much of an item to reorder, from its forecast daily demand."""
+    FORECAST_METHODS = (
+        ("ses", "Exponential smoothing"),
+        ("sma", "Moving average"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="reorder_suggestions")
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, related_name="reorder_suggestion")
+    method = models.CharField(max_length=3, choices=FORECAST_METHODS)
+    daily_demand = models.FloatField(help_text="Forecast units sold per day.")
+    demand_deviation = models.FloatField(help_text="Standard deviation of the daily units sold.")
+    history_days = models.PositiveIntegerField(help_text="Days of sales the forecast was fitted on.")
+    lead_time_days = models.PositiveIntegerField()
+    reorder_point = models.PositiveIntegerField(help_text="Reorder when stock falls to this many units.")
+    reorder_quantity = models.PositiveIntegerField(help_text="Units to order to cover the lead time and review period.")
+    quantity_on_hand = models.IntegerField(help_text="Stock of the item when the suggestion was computed.")
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Reorder Suggestion"
+        verbose_name_plural = "Reorder Suggestions"
+
+    def __str__(self):
+        return f"{self.item_id}: reorder {self.reorder_quantity} at {self.reorder_point}"
+
+
+class Task(models.Model):
+    """A queued call of a function registered with oye.tasks.task, run by `manage.py run_tasks`."""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, help_text="Registered name of the task function.")
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Earliest time the next attempt may start.")
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="A running task still unfinished by then is taken to have lost its worker and runs again."
+    )
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim due tasks in run_at order
+            models.Index(fields=["status", "run_at"], name="task_status_run_at_idx"),
+        ]
 
     def __str__(self):
-        return f"Sale of {self.quantity} {self.item.item_name} for {self.shop.shop_name} on {self.sold_at}"
\ No newline at end of file
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,131 @@
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination over a (timestamp, id) key.
+
+    Each page is fetched with a `WHERE (ts, id) < (cursor)` range condition on
+    the composite index, so deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([obj async for obj in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """The queryset of the requested page plus one row, to tell whether there is a next page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, page):
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def position_filter(self, position):
+        (ts_field, ts_value), (id_field, id_value) = zip(self.field_names, position)
+        lookup = 'lt' if self.ordering[0].startswith('-') else 'gt'
+        return (
+            Q(**{f'{ts_field}__{lookup}': ts_value})
+            | Q(**{ts_field: ts_value, f'{id_field}__{lookup}': id_value})
+        )
+
+    @property
+    def field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        return self.decode_position(encoded, self.model)
+
+    def decode_position(self, encoded, model):
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            values = raw.split('|')
+            if len(values) != len(self.field_names):
+                raise ValueError(raw)
+            return [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.field_names, values)
+            ]
+        except (UnicodeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row):
+        values = []
+        for name in self.field_names:
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        raw = '|'.join(values)
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SaleCursorPagination(KeysetPagination):
+    ordering = ('-sold_at', '-id')
+
+
+class StockAlertFeedPagination(KeysetPagination):
+    """Oldest first, and `next` always points past the last alert seen so clients can keep polling."""
+    ordering = ('created_at', 'id')
+
+    def get_next_link(self):
+        url = self.request.build_absolute_uri()
+        if self.last is not None:
+            return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+        return url
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+from .models import Shop
+
+OWNER_CACHE_TIMEOUT = 30
+NOT_OWNER_MESSAGE = "You do not have permission to access this shop."
+
+
+def _owner_cache_key(shop_id):
+    return f'oye:shop-owner:{shop_id}'
+
+
+def get_shop_owner_id(shop_id):
+    """Id of the shop's owner, or None if there is no such shop. Cached briefly."""
+    key = _owner_cache_key(shop_id)
+    owner_id = cache.get(key)
+    if owner_id is None:
+        owner_id = Shop.objects.filter(id=shop_id).values_list('owner_id', flat=True).first()
+        if owner_id is not None:
+            cache.set(key, owner_id, OWNER_CACHE_TIMEOUT)
+    return owner_id
+
+
+async def aget_shop_owner_id(shop_id):
+    key = _owner_cache_key(shop_id)
+    owner_id = await cache.aget(key)
+    if owner_id is None:
+        owner_id = await Shop.objects.filter(id=shop_id).values_list('owner_id', flat=True).afirst()
+        if owner_id is not None:
+            await cache.aset(key, owner_id, OWNER_CACHE_TIMEOUT)
+    return owner_id
+
+
+def invalidate_shop_owner(shop_id):
+    cache.delete(_owner_cache_key(shop_id))
+
+
+def check_shop_owner(shop_id, user_id, message=NOT_OWNER_MESSAGE):
+    """Raise PermissionDenied unless the shop exists and `user_id` owns it."""
+    owner_id = get_shop_owner_id(shop_id)
+    if owner_id is None:
+        raise PermissionDenied("Shop does not exist.")
+    if str(owner_id) != str(user_id):
+        raise PermissionDenied(message)
+
+
+async def acheck_shop_owner(shop_id, user_id, message=NOT_OWNER_MESSAGE):
+    owner_id = await aget_shop_owner_id(shop_id)
+    if owner_id is None:
+        raise PermissionDenied("Shop does not exist.")
+    if str(owner_id) != str(user_id):
+        raise PermissionDenied(message)
+
+
+class IsShopOwner(BasePermission):
+    """Only lets the user in the URL through if they own the shop in the URL."""
+
+    def has_permission(self, request, view):
+        message = getattr(view, 'permission_denied_message', NOT_OWNER_MESSAGE)
+        check_shop_owner(view.kwargs.get('shop_id'), view.kwargs.get('user_id'), message)
+        return True
+
+
+class ShopOwnerMixin:
+    """
+    For views under shops/<shop_id>/.../<user_id>/ that only the shop's owner may use.
+
+    The ownership check compares the shop's owner_id with the URL user id, usually
+    straight from the cache, so it costs at most one query and never loads the User.
+    """
+    permission_classes = [IsShopOwner]
+    permission_denied_message = NOT_OWNER_MESSAGE
+
+    @property
+    def shop_id(self):
+        return self.kwargs.get('shop_id')
+
+    def get_shop(self):
+        """The shop itself, loaded at most once per request for views that need more than its id."""
+        if not hasattr(self, '_shop'):
+            self._shop = Shop.objects.get(id=self.shop_id)
+        return self._shop
@@ -0,0 +1,97 @@
+"""
+Publish/subscribe for pushing live updates to connected clients.
+
+The broker is chosen with settings.OYE_PUBSUB['BACKEND'], an import path, so a
+broker spanning several app nodes (Redis, Postgres LISTEN/NOTIFY, ...) can
+replace the default in-process one without touching publishers or
+subscribers. A broker implements:
+
+    publish(channel, message)   from any thread, never blocks
+    subscribe(channel)          async context manager yielding an async iterator
+    has_subscribers(channel)    lets publishers skip building unwanted messages
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_PUBSUB = {
+    'BACKEND': 'oye.pubsub.InProcessBroker',
+    'OPTIONS': {},
+}
+
+
+class Subscription:
+    """Messages for one subscriber, buffered on its own event loop."""
+
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def deliver(self, message):
+        # Runs on the subscriber's loop. A subscriber that cannot keep up loses
+        # its oldest messages rather than holding up the publisher or the others.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """Fans messages out to the subscribers of this process only."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def has_subscribers(self, channel):
+        return bool(self._channels.get(channel))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._channels.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has closed; it is unsubscribing
+                pass
+        return len(subscriptions)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._channels.get(channel)
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'OYE_PUBSUB', DEFAULT_PUBSUB)
+                _broker = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _broker
@@ -0,0 +1,171 @@
+"""
+Fast read path for the hot list endpoints.
+
+A FastReadSerializer takes one of the serializers in serializers.py and gives
+exactly its output, but from `.values()` rows: each field turns into a column
+lookup plus a converter picked once per call, instead of a model instance per
+row and DRF's per-field binding and attribute walking on every one of them.
+Rendered to JSON, the result is byte-for-byte the same.
+"""
+import decimal
+from functools import cached_property
+from operator import itemgetter, sub
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .serializers import ItemSerializer, ReorderSuggestionSerializer, RestockSerializer, SaleSerializer
+
+# Fields whose to_representation hands database values back unchanged
+PASSTHROUGH_FIELDS = (
+    fields.BooleanField, fields.CharField, fields.ChoiceField, fields.IntegerField, fields.ReadOnlyField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != fields.ISO_8601 or tz is None:
+        return field.to_representation
+
+    def convert(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return field.to_representation
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        return '{:f}'.format(value.quantize(quantum, rounding=field.rounding, context=context))
+    return convert
+
+
+def _converter(field):
+    """A function of a non-null column value returning what `field` would; None if that is the value itself."""
+    if isinstance(field, fields.UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+    if isinstance(field, fields.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, fields.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, PASSTHROUGH_FIELDS) and not isinstance(field, relations.ManyRelatedField):
+        return None
+    return field.to_representation
+
+
+class FastReadSerializer:
+    """
+    Serializes `.values()` rows as `serializer_class` would serialize the instances.
+
+    `computed` supplies the fields DRF computes in Python (SerializerMethodField),
+    as `{name: (columns, function)}`; the function gets those columns' values.
+    """
+
+    def __init__(self, serializer_class, computed=None):
+        self.serializer_class = serializer_class
+        self.computed = computed or {}
+
+    @cached_property
+    def fields(self):
+        """(name, column, field) per output field, with a list of those for nested serializers."""
+        return self._fields(self.serializer_class(), '')
+
+    def _fields(self, serializer, prefix):
+        result = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if not prefix and name in self.computed:
+                result.append((name, None, self.computed[name]))
+            elif isinstance(field, serializers.BaseSerializer):
+                result.append((name, None, self._fields(field, f"{prefix}{'__'.join(field.source_attrs)}__")))
+            elif isinstance(field, (serializers.SerializerMethodField, serializers.HiddenField)):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} must be given in `computed` to be read from values()."
+                )
+            else:
+                result.append((name, prefix + '__'.join(field.source_attrs), field))
+        return result
+
+    @cached_property
+    def columns(self):
+        columns = {}
+        stack = [self.fields]
+        while stack:
+            for name, column, spec in stack.pop():
+                if column is not None:
+                    columns[column] = None
+                elif isinstance(spec, list):
+                    stack.append(spec)
+                else:
+                    columns.update(dict.fromkeys(spec[0]))
+        return list(columns)
+
+    def values(self, queryset):
+        """`queryset` as the rows `serialize` takes."""
+        return queryset.values(*self.columns)
+
+    def serialize(self, rows):
+        build = self._builder(self.fields)
+        return [build(row) for row in rows]
+
+    def _builder(self, field_specs):
+        # Converters are picked per call, as DRF's depend on the active timezone
+        getters = []
+        for name, column, spec in field_specs:
+            if isinstance(spec, list):
+                getter = self._builder(spec)
+            elif column is None:
+                getter = self._computed_getter(*spec)
+            else:
+                getter = self._column_getter(column, _converter(spec))
+            getters.append((name, getter))
+
+        def build(row):
+            return {name: getter(row) for name, getter in getters}
+        return build
+
+    @staticmethod
+    def _column_getter(column, convert):
+        if convert is None:
+            return itemgetter(column)
+
+        def get(row):
+            value = row[column]
+            return None if value is None else convert(value)
+        return get
+
+    @staticmethod
+    def _computed_getter(columns, function):
+        def get(row):
+            return function(*[row[column] for column in columns])
+        return get
+
+
+class FastListMixin:
+    """For list views: read rows with `fast_serializer` instead of instantiating serializer_class."""
+    fast_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.fast_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_serializer.serialize(page))
+        return Response(self.fast_serializer.serialize(rows))
+
+
+item_reader = FastReadSerializer(ItemSerializer)
+sale_reader = FastReadSerializer(SaleSerializer, computed={'profit': (('total_price', 'cost_price'), sub)})
+restock_reader = FastReadSerializer(RestockSerializer)
+reorder_reader = FastReadSerializer(ReorderSuggestionSerializer)
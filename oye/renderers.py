@@ -0,0 +1,80 @@
+"""
+JSON renderer and parser backed by orjson, with DRF's own as the fallback.
+
+The output is the same as rest_framework's JSONRenderer: serializer fields
+already turn decimals and timestamps into strings, and whatever reaches the
+encoder raw (Decimal totals, datetimes, lazy strings) is converted by the
+same rules as DRF's JSONEncoder. UUIDs are encoded natively by orjson.
+Without orjson installed, or for what it cannot do (indented output, integers
+beyond 64 bits, non-UTF-8 input), both classes behave exactly like DRF's. Two
+differences are left: orjson reads integers beyond 64 bits as floats, and it
+writes NaN and infinite floats as null where DRF's strict renderer raises.
+Finding those floats would mean walking every response, so they are left to
+render as null; NaN and infinite Decimals still raise as with DRF.
+"""
+import datetime
+import decimal
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # The common raw values first, then everything else DRF knows how to encode
+    if isinstance(obj, decimal.Decimal):
+        if not obj.is_finite():
+            # Refused, so DRF's renderer gets to raise its own error
+            raise TypeError(obj)
+        return float(obj)
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        return representation[:-6] + 'Z' if representation.endswith('+00:00') else representation
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not (self.compact and self.strict) or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like DRF, escape U+2028/U+2029 so the output is also valid JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let the stdlib decide: it accepts a little more, and its error message is DRF's
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,155 @@
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Sale, SalesDailyRollup
+
+
+ROLLUP_KEY_FIELDS = ('shop_id', 'date', 'item_id', 'payment_method')
+
+
+def _rollup_key(sale):
+    return {
+        'shop_id': sale.shop_id,
+        'date': timezone.localdate(sale.sold_at),
+        'item_id': sale.item_id,
+        'payment_method': sale.payment_method,
+    }
+
+
+def _add_to_rollup(key, quantity, revenue, cost, create=True):
+    rollups = SalesDailyRollup.objects.filter(**key)
+    changes = {
+        'quantity': F('quantity') + quantity,
+        'revenue': F('revenue') + revenue,
+        'cost': F('cost') + cost,
+    }
+    if rollups.update(**changes) or not create:
+        return
+
+    try:
+        with transaction.atomic():
+            SalesDailyRollup.objects.create(quantity=quantity, revenue=revenue, cost=cost, **key)
+    except IntegrityError:
+        # Another writer created the row between our update and insert
+        rollups.update(**changes)
+
+
+def record_sale(sale):
+    """Add a newly written sale to its daily rollup row."""
+    _add_to_rollup(_rollup_key(sale), sale.quantity, sale.total_price, sale.cost_price)
+
+
+def record_sales(sales):
+    """Add a batch of new sales to their rollup rows with a constant number of queries."""
+    totals = {}
+    for sale in sales:
+        key = tuple(_rollup_key(sale).values())
+        quantity, revenue, cost = totals.get(key, (0, 0, 0))
+        totals[key] = (quantity + sale.quantity, revenue + sale.total_price, cost + sale.cost_price)
+    if not totals:
+        return
+
+    lookups = [dict(zip(ROLLUP_KEY_FIELDS, key)) for key in totals]
+    existing = {
+        tuple(getattr(rollup, field) for field in ROLLUP_KEY_FIELDS): rollup
+        for rollup in SalesDailyRollup.objects.filter(reduce(or_, (Q(**lookup) for lookup in lookups)))
+    }
+    for key, rollup in existing.items():
+        quantity, revenue, cost = totals[key]
+        rollup.quantity = F('quantity') + quantity
+        rollup.revenue = F('revenue') + revenue
+        rollup.cost = F('cost') + cost
+    SalesDailyRollup.objects.bulk_update(existing.values(), ['quantity', 'revenue', 'cost'])
+
+    missing = [key for key in totals if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            SalesDailyRollup.objects.bulk_create([
+                SalesDailyRollup(quantity=totals[key][0], revenue=totals[key][1], cost=totals[key][2],
+                                 **dict(zip(ROLLUP_KEY_FIELDS, key)))
+                for key in missing
+            ])
+    except IntegrityError:
+        # Another writer created some of the rows in the meantime
+        for key in missing:
+            _add_to_rollup(dict(zip(ROLLUP_KEY_FIELDS, key)), *totals[key])
+
+
+def remove_sale(sale):
+    """Take a deleted sale back out of its daily rollup row."""
+    _add_to_rollup(_rollup_key(sale), -sale.quantity, -sale.total_price, -sale.cost_price, create=False)
+
+
+def window_start(days):
+    """Start of a window covering the last `days` calendar days, today included."""
+    first_day = timezone.localdate() - timedelta(days=days - 1)
+    return timezone.make_aware(datetime.combine(first_day, time.min))
+
+
+def _window_rollups(shop_id, days):
+    return SalesDailyRollup.objects.filter(shop_id=shop_id, date__gte=timezone.localdate(window_start(days)))
+
+
+WINDOW_TOTALS = {
+    'total_amount': Sum('revenue'),
+    'total_profit': Sum(F('revenue') - F('cost')),
+}
+
+
+def _or_zero(totals):
+    return {name: value or 0 for name, value in totals.items()}
+
+
+def window_totals(shop_id, days):
+    """Revenue and profit for the last `days` calendar days, read from the rollups."""
+    return _or_zero(_window_rollups(shop_id, days).aggregate(**WINDOW_TOTALS))
+
+
+async def awindow_totals(shop_id, days):
+    return _or_zero(await _window_rollups(shop_id, days).aaggregate(**WINDOW_TOTALS))
+
+
+def rebuild_rollups(shop=None, batch_size=1000):
+    """Recompute the rollups from the raw sales, for one shop or for every shop."""
+    sales = Sale.objects.all()
+    rollups = SalesDailyRollup.objects.all()
+    if shop is not None:
+        sales = sales.filter(shop=shop)
+        rollups = rollups.filter(shop=shop)
+
+    grouped = (
+        sales.annotate(date=TruncDate('sold_at'))
+        .values('shop_id', 'date', 'item_id', 'payment_method')
+        .annotate(total_quantity=Sum('quantity'), revenue=Sum('total_price'), cost=Sum('cost_price'))
+        .order_by()
+    )
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in grouped.iterator(chunk_size=batch_size):
+            batch.append(SalesDailyRollup(
+                shop_id=row['shop_id'],
+                date=row['date'],
+                item_id=row['item_id'],
+                payment_method=row['payment_method'],
+                quantity=row['total_quantity'],
+                revenue=row['revenue'],
+                cost=row['cost'],
+            ))
+            if len(batch) >= batch_size:
+                SalesDailyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        SalesDailyRollup.objects.bulk_create(batch)
+        created += len(batch)
+    return created
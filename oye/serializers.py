@@ -1,10 +1,14 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import User, UserProfile, Shop, Item, Restock, Sale
+from .models import User, UserProfile, Shop, Item, Restock, Sale, StockAlert, Tombstone, ReorderSuggestion
+from .images import OUTPUT_FORMATS, validate_profile_picture
+from .jobs import render_profile_picture
+from .tasks import enqueue
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
-    password = serializers.CharField(write_only=True, required=True, min_length=8)
-    password_confirmation = serializers.CharField(write_only=True, required=True, min_length=8)
+    password = serializers.CharField(write_only=True, required=True, min_length=8, max_length=100)
+    password_confirmation = serializers.CharField(write_only=True, required=True, min_length=8, max_length=100)
 
     class Meta:
         model = User
@@ -25,9 +29,27 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    # {name: {'size': pixels, 'webp': url, 'jpeg': url}} and the whole picture as 'original';
+    # empty until the picture has been processed
+    renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = UserProfile
-        fields = ['bio', 'profile_picture', 'phone_number', 'address', 'date_of_birth']
+        fields = ['bio', 'profile_picture', 'renditions', 'phone_number', 'address', 'date_of_birth']
+        # Upload only: the stored file may still carry its metadata, so clients get the renditions
+        extra_kwargs = {'profile_picture': {'validators': [validate_profile_picture], 'write_only': True}}
+
+    def get_renditions(self, profile):
+        request = self.context.get('request')
+
+        def url(path):
+            url = default_storage.url(path)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return {
+            name: {key: url(value) if key in OUTPUT_FORMATS else value for key, value in rendition.items()}
+            for name, rendition in profile.renditions.items()
+        }
 
 class UserSerializer(serializers.ModelSerializer):
     profile = UserProfileSerializer()
@@ -36,14 +58,14 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'first_name', 'last_name', 'profile']
 
 class UserAccountUpdateSerializer(serializers.ModelSerializer):
-    profile = UserProfileSerializer()
+    profile = UserProfileSerializer(source='userprofile', required=False)
 
     class Meta:
         model = User
         fields = ['username', 'email', 'first_name', 'last_name', 'profile']
 
     def update(self, instance, validated_data):
-        profile_data = validated_data.pop('profile')
+        profile_data = validated_data.pop('userprofile', {})
         profile = instance.userprofile
 
         # Update User fields
@@ -54,12 +76,19 @@ class UserAccountUpdateSerializer(serializers.ModelSerializer):
         instance.save()
 
         # Update UserProfile fields
+        picture = profile.profile_picture.name
         profile.bio = profile_data.get('bio', profile.bio)
         profile.profile_picture = profile_data.get('profile_picture', profile.profile_picture)
+        picture_changed = profile.profile_picture.name != picture
+        if picture_changed:
+            # The old renditions go once the new picture's are made
+            profile.renditions = {}
         profile.phone_number = profile_data.get('phone_number', profile.phone_number)
         profile.address = profile_data.get('address', profile.address)
         profile.date_of_birth = profile_data.get('date_of_birth', profile.date_of_birth)
         profile.save()
+        if picture_changed:
+            enqueue(render_profile_picture, profile_id=str(profile.pk), picture=profile.profile_picture.name or '')
 
         return instance
     
@@ -70,8 +99,8 @@ class PasswordResetRequestSerializer(serializers.Serializer):
 
 
 class PasswordResetSerializer(serializers.Serializer):
-    new_password = serializers.CharField(write_only=True, min_length=5)
-    confirm_password = serializers.CharField(write_only=True, min_length=5)
+    new_password = serializers.CharField(write_only=True, min_length=8, max_length=100)
+    confirm_password = serializers.CharField(write_only=True, min_length=8, max_length=100)
 
     def validate(self, data):
         if data['new_password'] != data['confirm_password']:
@@ -93,7 +122,7 @@ class ShopSerializer(serializers.ModelSerializer):
             'description', 'operating_hours', 'number_of_employees',
              'tax_identification_number',
             'bank_details', 'terms_and_conditions_accepted', 'privacy_policy_accepted',
-            'created_at', 'updated_at'
+            'low_stock_threshold', 'timezone', 'created_at', 'updated_at'
         ]
     
 
@@ -101,8 +130,8 @@ class ItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = Item
         fields = ['id', 'shop', 'item_name', 'category',
-                  'description', 'quantity', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'shop']
+                  'description', 'quantity', 'reorder_level', 'is_low_stock', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'shop', 'is_low_stock']
         
 
 class RestockSerializer(serializers.ModelSerializer):
@@ -125,13 +154,107 @@ class SaleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Sale
-        fields = ['id', 'shop', 'item', 'quantity', 'total_price', 'cost_price', 'profit', 'payment_method', 'sold_at']
-        read_only_fields = ['id', 'shop', 'item', 'total_price', 'cost_price', 'profit', 'sold_at']
+        fields = ['id', 'shop', 'item', 'quantity', 'total_price', 'cost_price', 'profit', 'payment_method', 'sold_at',
+                  'client_id']
+        read_only_fields = ['id', 'shop', 'item', 'total_price', 'cost_price', 'profit', 'sold_at', 'client_id']
 
     def get_profit(self, obj):
         return obj.total_price - obj.cost_price
     
 
+class BasketLineSerializer(serializers.Serializer):
+    item_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class BasketSerializer(serializers.Serializer):
+    lines = BasketLineSerializer(many=True, allow_empty=False)
+    payment_method = serializers.ChoiceField(choices=Sale.PAYMENT_METHODS, default='cash')
+    customer = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+
+
+class StockAlertSerializer(serializers.ModelSerializer):
+    item_name = serializers.ReadOnlyField(source='item.item_name')
+
+    class Meta:
+        model = StockAlert
+        fields = ['id', 'item', 'item_name', 'kind', 'quantity', 'threshold', 'created_at']
+
+
+class ReorderSuggestionSerializer(serializers.ModelSerializer):
+    item_name = serializers.ReadOnlyField(source='item.item_name')
+    quantity = serializers.ReadOnlyField(source='item.quantity')
+
+    class Meta:
+        model = ReorderSuggestion
+        fields = ['item', 'item_name', 'quantity', 'method', 'daily_demand', 'demand_deviation', 'history_days',
+                  'lead_time_days', 'reorder_point', 'reorder_quantity', 'quantity_on_hand', 'computed_at']
+
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tombstone
+        fields = ['model', 'object_id', 'deleted_at']
+
+
+class OfflineSaleSerializer(serializers.Serializer):
+    client_id = serializers.UUIDField()
+    item_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
+    payment_method = serializers.ChoiceField(choices=Sale.PAYMENT_METHODS, default='cash')
+    customer = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+
+
+class OfflineSalesUploadSerializer(serializers.Serializer):
+    sales = OfflineSaleSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class CatalogClassSummarySerializer(serializers.Serializer):
+    items = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    profit = serializers.DecimalField(max_digits=14, decimal_places=2)
+    stock_value = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class CatalogAnalysisSummarySerializer(CatalogClassSummarySerializer):
+    dead_stock_value = serializers.DecimalField(max_digits=14, decimal_places=2)
+    classes = serializers.DictField(child=CatalogClassSummarySerializer())
+
+
+class CatalogAnalysisItemSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    item_name = serializers.CharField()
+    category = serializers.CharField()
+    abc_class = serializers.CharField()
+    quantity = serializers.IntegerField()
+    units_sold = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    profit = serializers.DecimalField(max_digits=14, decimal_places=2)
+    unit_margin = serializers.DecimalField(max_digits=10, decimal_places=2)
+    margin_percent = serializers.FloatField()
+    sell_through = serializers.FloatField()
+    stock_value = serializers.DecimalField(max_digits=14, decimal_places=2)
+    revenue_share = serializers.FloatField()
+    cumulative_share = serializers.FloatField()
+    revenue_rank = serializers.IntegerField()
+    stock_value_rank = serializers.IntegerField()
+
+
+class SalesSeriesTotalsSerializer(serializers.Serializer):
+    sales = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    profit = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class SalesSeriesPointSerializer(SalesSeriesTotalsSerializer):
+    start = serializers.SerializerMethodField()
+
+    def get_start(self, point):
+        # In the series' own time zone, not the server's
+        return point['start'].isoformat()
+
+
 class InventoryAnalysisSerializer(serializers.Serializer):
     total_items = serializers.IntegerField()
     total_restocked = serializers.IntegerField()
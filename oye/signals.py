@@ -1,8 +1,85 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models import Model
 from django.dispatch import receiver
-from .models import User, UserProfile
+from functools import partial
+from .models import User, UserProfile, Shop, Item, Restock, Sale, Tombstone
+from .alerts import refresh_low_stock
+from . import rollups, ticker
+from .analysis import invalidate_inventory_analysis
+from .catalog import bump_catalog_version
+from .chatbot import forget_index
+from .authentication import forget_user
+from .permissions import invalidate_shop_owner
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def clear_cached_user(sender, instance, **kwargs):
+    # Token lookups hold the User object itself; reload it after any change
+    forget_user(instance.pk)
+
+@receiver(post_save, sender=Sale)
+def add_sale_to_rollup(sender, instance, created, **kwargs):
+    if created:
+        rollups.record_sale(instance)
+        ticker.publish_sales_on_commit(instance.shop_id, [instance])
+
+@receiver(post_delete, sender=Sale)
+def remove_sale_from_rollup(sender, instance, **kwargs):
+    rollups.remove_sale(instance)
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Restock)
+@receiver(post_delete, sender=Restock)
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def shop_data_changed(sender, instance, **kwargs):
+    # Drop the cached analysis only once the write is visible to other readers
+    transaction.on_commit(partial(invalidate_inventory_analysis, instance.shop_id))
+    bump_catalog_version(instance.shop_id)
+
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def clear_shop_owner(sender, instance, **kwargs):
+    invalidate_shop_owner(instance.pk)
+
+@receiver(post_save, sender=Shop)
+def shop_changed(sender, instance, created, **kwargs):
+    # Its time zone decides which day the dated lists show, its threshold the low-stock flags
+    if not created:
+        bump_catalog_version(instance.pk)
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def clear_item_name_index(sender, instance, **kwargs):
+    # The chatbot resolves product names from an in-memory index of the shop's items
+    transaction.on_commit(partial(forget_index, instance.shop_id))
+
+@receiver(post_save, sender=Item)
+def refresh_item_low_stock(sender, instance, **kwargs):
+    # Saving an item can change its quantity or reorder level
+    refresh_low_stock([instance.pk])
+
+@receiver(post_save, sender=Shop)
+def refresh_shop_low_stock(sender, instance, created, **kwargs):
+    # The shop's threshold may have changed
+    if not created:
+        refresh_low_stock(shop_id=instance.pk)
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Restock)
+@receiver(post_delete, sender=Sale)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Lets offline clients drop their copy. Only for deletes that started at the
+    # shop's data: when a shop or its owner is deleted, the shop row goes in the
+    # same transaction and the tombstone would point at nothing.
+    origin_model = origin._meta.model if isinstance(origin, Model) else getattr(origin, 'model', None)
+    if origin_model not in (Item, Restock, Sale):
+        return
+    Tombstone.objects.create(shop_id=instance.shop_id, model=sender._meta.model_name, object_id=instance.pk)
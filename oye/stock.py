@@ -0,0 +1,147 @@
+"""
+Stock ledger: every change to Item.quantity goes through here.
+
+Quantities are changed with a single conditional UPDATE (`quantity = quantity - n
+WHERE quantity >= n`) instead of a read-modify-write in Python, so concurrent
+checkouts can neither lose updates nor sell stock that is no longer there.
+"""
+from collections import defaultdict
+from functools import partial, reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from . import rollups, ticker
+from .alerts import refresh_low_stock
+from .analysis import invalidate_inventory_analysis
+from .catalog import bump_catalog_version
+from .models import Item, Restock, Sale
+
+
+class InsufficientStock(Exception):
+    def __init__(self, message="Not enough items in stock.", items=()):
+        super().__init__(message)
+        self.items = list(items)
+
+
+class UnknownItems(Exception):
+    def __init__(self, item_ids):
+        super().__init__("Items do not exist or do not belong to this shop.")
+        self.item_ids = list(item_ids)
+
+
+def _check_quantity(quantity):
+    if quantity <= 0:
+        raise ValueError("Quantity must be a positive number.")
+
+
+def take_stock(item, quantity):
+    """Remove `quantity` units of `item`, raising InsufficientStock if there are not enough."""
+    _check_quantity(quantity)
+    # One transaction with the flag refresh: an error there must not leave the stock taken
+    with transaction.atomic():
+        updated = Item.objects.filter(pk=item.pk, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            raise InsufficientStock(f"Not enough {item} in stock.")
+        refresh_low_stock([item.pk])
+
+
+def put_stock(item, quantity):
+    """Add `quantity` units of `item` back into stock."""
+    _check_quantity(quantity)
+    with transaction.atomic():
+        Item.objects.filter(pk=item.pk).update(
+            quantity=F('quantity') + quantity,
+            updated_at=timezone.now(),
+        )
+        refresh_low_stock([item.pk])
+
+
+def sell(shop, item, quantity, payment_method='cash', customer=None, client_id=None):
+    """Take the stock and record the sale in one transaction."""
+    with transaction.atomic():
+        take_stock(item, quantity)
+        return Sale.objects.create(
+            shop=shop,
+            item=item,
+            quantity=quantity,
+            total_price=item.selling_price * quantity,
+            cost_price=item.cost_price * quantity,
+            payment_method=payment_method,
+            customer=customer,
+            client_id=client_id,
+        )
+
+
+def restock(shop, item, quantity, total_price=None):
+    """Put the stock back and record the restock in one transaction."""
+    if total_price is None:
+        total_price = item.cost_price * quantity
+    with transaction.atomic():
+        put_stock(item, quantity)
+        return Restock.objects.create(shop=shop, item=item, quantity=quantity, total_price=total_price)
+
+
+def sell_basket(shop, lines, payment_method='cash', customer=None):
+    """
+    Sell a basket of `(item_id, quantity)` lines as one transaction.
+
+    Runs a constant number of queries however long the basket is: one SELECT for
+    the items, one guarded UPDATE for all the stock and one INSERT for the sales.
+    Either every line is sold or none is.
+    """
+    quantities = defaultdict(int)
+    for item_id, quantity in lines:
+        _check_quantity(quantity)
+        quantities[item_id] += quantity
+    if not quantities:
+        return []
+
+    with transaction.atomic():
+        items = Item.objects.select_for_update().filter(shop=shop).in_bulk(list(quantities))
+        missing = [item_id for item_id in quantities if item_id not in items]
+        if missing:
+            raise UnknownItems(missing)
+
+        short = [item_id for item_id, quantity in quantities.items() if items[item_id].quantity < quantity]
+        if short:
+            raise InsufficientStock(items=short)
+
+        # The per-line quantity guards make the UPDATE skip any row another checkout
+        # drained since the SELECT; a short row count then rolls the whole basket back
+        updated = Item.objects.filter(
+            reduce(or_, (Q(pk=item_id, quantity__gte=quantity) for item_id, quantity in quantities.items()))
+        ).update(
+            quantity=Case(
+                *(When(pk=item_id, then=F('quantity') - quantity) for item_id, quantity in quantities.items()),
+                default=F('quantity'),
+            ),
+            updated_at=timezone.now(),
+        )
+        if updated != len(quantities):
+            raise InsufficientStock()
+        refresh_low_stock(quantities)
+
+        sales = Sale.objects.bulk_create([
+            Sale(
+                shop=shop,
+                item=items[item_id],
+                quantity=quantity,
+                total_price=items[item_id].selling_price * quantity,
+                cost_price=items[item_id].cost_price * quantity,
+                payment_method=payment_method,
+                customer=customer,
+            )
+            for item_id, quantity in quantities.items()
+        ])
+        # bulk_create skips the post_save signals that keep these up to date
+        rollups.record_sales(sales)
+        transaction.on_commit(partial(invalidate_inventory_analysis, shop.pk))
+        bump_catalog_version(shop.pk)
+        ticker.publish_sales_on_commit(shop.pk, sales)
+    return sales
@@ -0,0 +1,157 @@
+"""
+Delta sync for offline point-of-sale clients.
+
+A client keeps the opaque token from its last sync and asks for what changed
+since: items by updated_at, sales by sold_at, restocks by restocked_at and
+tombstones for deletions, each read through a (shop, timestamp) index, so a
+resync costs as much as the change rather than the shop's history.
+
+The token holds a (timestamp, id) position per kind. Timestamps are taken when
+a row is written but become visible when its transaction commits, so once a
+kind is caught up its position is held SYNC_OVERLAP behind the time of the
+sync. Rows in that window are sent again; clients apply changes by id.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import stock
+from .models import Item, Restock, Sale, Tombstone
+from .readers import FastReadSerializer, item_reader, restock_reader, sale_reader
+from .serializers import TombstoneSerializer
+
+SYNC_OVERLAP = timedelta(seconds=30)
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 5000
+TOKEN_VERSION = 'v1'
+
+tombstone_reader = FastReadSerializer(TombstoneSerializer)
+
+
+def _sources(shop_id):
+    return [
+        ('items', Item.objects.filter(shop_id=shop_id), 'updated_at', item_reader),
+        ('sales', Sale.objects.filter(shop_id=shop_id), 'sold_at', sale_reader),
+        ('restocks', Restock.objects.filter(shop_id=shop_id), 'restocked_at', restock_reader),
+        ('deleted', Tombstone.objects.filter(shop_id=shop_id), 'deleted_at', tombstone_reader),
+    ]
+
+
+def encode_token(positions):
+    data = {key: [at.isoformat(), pk and str(pk)] for key, (at, pk) in positions.items()}
+    raw = f'{TOKEN_VERSION}|{json.dumps(data, separators=(",", ":"))}'
+    return base64.urlsafe_b64encode(raw.encode()).decode('ascii')
+
+
+def decode_token(token):
+    """The positions a token stands for; raises ValueError for anything that is not a token."""
+    try:
+        version, data = base64.urlsafe_b64decode(token.encode('ascii')).decode().split('|', 1)
+        if version != TOKEN_VERSION:
+            raise ValueError
+        positions = {}
+        for key, (at, pk) in json.loads(data).items():
+            at = datetime.fromisoformat(at)
+            if timezone.is_naive(at):
+                raise ValueError
+            positions[key] = (at, pk and uuid.UUID(pk))
+    except (UnicodeError, ValueError, TypeError, AttributeError, binascii.Error):
+        raise ValueError("Invalid sync token.")
+    return positions
+
+
+def _after(field, at, pk):
+    if pk is None:
+        return Q(**{f'{field}__gte': at})
+    return Q(**{f'{field}__gt': at}) | Q(**{field: at, 'id__gt': pk})
+
+
+def _next_position(position, horizon, page=None):
+    """
+    Where a kind resumes. A caught-up kind resumes at `horizon`, before which
+    every write has committed. A full `page` of (timestamp, id) bounds resumes
+    after its last row, or at `horizon` when the page runs past it and some of
+    its rows came before it; either way past at least one row it sent.
+    """
+    if page is not None:
+        first, last = page
+        if last[0] < horizon or first[0] >= horizon:
+            return last
+        return (horizon, None)
+    if position is None or position[0] < horizon:
+        return (horizon, None)
+    return position
+
+
+def changes_since(shop_id, positions=None, limit=DEFAULT_LIMIT):
+    """
+    Everything in the shop written after the token's `positions` (everything,
+    without one), at most `limit` rows of each kind. With `has_more` the client
+    should call again straight away with the returned token.
+    """
+    positions = positions or {}
+    horizon = timezone.now() - SYNC_OVERLAP
+    changes = {}
+    next_positions = {}
+    has_more = False
+    for key, queryset, field, reader in _sources(shop_id):
+        position = positions.get(key)
+        if position is not None:
+            queryset = queryset.filter(_after(field, *position))
+        columns = dict.fromkeys([*reader.columns, 'id', field])
+        rows = list(queryset.values(*columns).order_by(field, 'id')[:limit + 1])
+        page = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            page = ((rows[0][field], rows[0]['id']), (rows[-1][field], rows[-1]['id']))
+            has_more = True
+        next_positions[key] = _next_position(position, horizon, page)
+        changes[key] = reader.serialize(rows)
+    return {'token': encode_token(next_positions), 'has_more': has_more, **changes}
+
+
+def upload_sales(shop, lines):
+    """
+    Record sales made offline, each identified by its client_id. A client_id
+    already recorded is reported as a duplicate rather than sold twice, so an
+    upload can be retried as often as needed. Returns one result per line.
+    """
+    existing = dict(
+        Sale.objects.filter(shop=shop, client_id__in=[line['client_id'] for line in lines]).values_list('client_id', 'id')
+    )
+    items = Item.objects.filter(shop=shop).in_bulk({line['item_id'] for line in lines})
+
+    results = []
+    with transaction.atomic():
+        for line in lines:
+            client_id = line['client_id']
+            result = {'client_id': client_id}
+            results.append(result)
+            if client_id in existing:
+                result.update(status='duplicate', sale_id=existing[client_id])
+                continue
+            item = items.get(line['item_id'])
+            if item is None:
+                result.update(status='rejected', error="Item does not exist in this shop.")
+                continue
+            try:
+                sale = stock.sell(shop, item, line['quantity'], line['payment_method'], line.get('customer'),
+                                  client_id=client_id)
+            except stock.InsufficientStock as e:
+                result.update(status='rejected', error=str(e))
+            except IntegrityError:
+                # Another upload of the same sale got in first
+                result.update(
+                    status='duplicate',
+                    sale_id=Sale.objects.filter(shop=shop, client_id=client_id).values_list('id', flat=True).first(),
+                )
+            else:
+                existing[client_id] = sale.pk
+                result.update(status='created', sale_id=sale.pk)
+    return results
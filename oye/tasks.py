@@ -0,0 +1,252 @@
+"""
+Durable background tasks, kept in the Task table.
+
+    @task(max_attempts=3)
+    def send_email(subject, message, recipient_list): ...
+
+    enqueue(send_email, subject=..., message=..., recipient_list=[...])
+
+enqueue() only inserts a row, in the caller's transaction: the task runs if
+and only if the write it follows commits, and a request never waits on the
+slow side effect itself. `manage.py run_tasks` claims due tasks and runs
+them on a thread or process pool; a task that raises is retried with
+exponential backoff until it has had `max_attempts` attempts, and a task whose
+worker died is run again once its lock expires. Tasks may therefore run more
+than once and should be safe to repeat. Arguments must be JSON-serializable,
+and are cleared once a task is done or has failed for good; queue ids rather
+than secrets, and let the task read or make what it needs.
+
+run_pending_tasks() runs whatever is due in the calling process, for tests
+(with Django's locmem email backend) and scripts.
+"""
+import logging
+import os
+import random
+import socket
+import statistics
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+DEFAULT_MAX_ATTEMPTS = 5
+# Retry n waits about BACKOFF_BASE * 2 ** (n - 1) seconds, at most BACKOFF_MAX
+BACKOFF_BASE = 2
+BACKOFF_MAX = 3600
+
+
+def _setting(name, default):
+    return getattr(settings, f'TASK_{name}', default)
+
+
+def task(func=None, *, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register `func` as a task; usable bare or with options."""
+    def register(func):
+        func.task_name = name or f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(func, *, delay=None, run_at=None, **kwargs):
+    """Queue a call of the task `func` (or its registered name) with `kwargs`; returns the Task."""
+    name = func if isinstance(func, str) else getattr(func, 'task_name', None)
+    if name not in TASKS:
+        raise ValueError(f"{func!r} is not a registered task.")
+    now = timezone.now()
+    if run_at is None:
+        run_at = now + delay if delay is not None else now
+    return Task.objects.create(
+        name=name, kwargs=kwargs, run_at=run_at, enqueued_at=now, max_attempts=TASKS[name].max_attempts,
+    )
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after `attempts` failed attempts, with jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def default_worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(limit, worker=None):
+    """
+    Mark up to `limit` due tasks running and return their ids, oldest first.
+    Due means pending with run_at passed, or running past its lock.
+    """
+    now = timezone.now()
+    lock_for = timedelta(seconds=_setting('LOCK_SECONDS', 300))
+    with transaction.atomic():
+        # A task that keeps losing its worker has used up its attempts too
+        Task.objects.filter(status=Task.RUNNING, locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+            status=Task.FAILED, finished_at=now, locked_until=None, last_error="The worker running it was lost.",
+            kwargs={},
+        )
+        # Skip rows another worker is claiming (where the database can); on
+        # SQLite the IMMEDIATE transaction already serializes claims
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Task.PENDING, run_at__lte=now) | Q(status=Task.RUNNING, locked_until__lt=now))
+            .order_by('run_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            Task.objects.filter(id__in=ids).update(
+                status=Task.RUNNING,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                locked_until=now + lock_for,
+                worker=worker or default_worker_name(),
+            )
+    return ids
+
+
+def run_task(task_id):
+    """Run one claimed task and record how it went; returns its final Task row."""
+    row = Task.objects.get(pk=task_id)
+    func = TASKS.get(row.name)
+    try:
+        if func is None:
+            raise LookupError(f"No task is registered as {row.name!r}.")
+        func(**row.kwargs)
+    except Exception:
+        row.last_error = traceback.format_exc()
+        if row.attempts < row.max_attempts and func is not None:
+            row.status = Task.PENDING
+            row.run_at = timezone.now() + timedelta(seconds=backoff(row.attempts))
+            logger.warning("Task %s %s failed, retrying at %s", row.name, row.pk, row.run_at)
+        else:
+            row.status = Task.FAILED
+            row.finished_at = timezone.now()
+            logger.error("Task %s %s failed for good after %s attempts", row.name, row.pk, row.attempts)
+    else:
+        row.status = Task.DONE
+        row.finished_at = timezone.now()
+        row.last_error = ''
+    row.locked_until = None
+    if row.status != Task.PENDING:
+        # Nothing will run it again
+        row.kwargs = {}
+    row.save(update_fields=['status', 'run_at', 'finished_at', 'last_error', 'locked_until', 'kwargs'])
+    return row
+
+
+def _run_in_worker(task_id):
+    close_old_connections()
+    try:
+        return run_task(task_id).status
+    finally:
+        connections.close_all()
+
+
+def _init_worker():
+    # Needed where workers are spawned rather than forked
+    django.setup()
+
+
+def run_pending_tasks(limit=None):
+    """Run every due task in this process, retries that fall due meanwhile included; returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        ids = claim(100 if limit is None else min(100, limit - ran))
+        if not ids:
+            return ran
+        for task_id in ids:
+            run_task(task_id)
+            ran += 1
+    return ran
+
+
+class Worker:
+    """Claims due tasks and runs them on a pool of `concurrency` threads or processes."""
+
+    def __init__(self, concurrency=4, pool='thread', poll_interval=1.0, name=None):
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.name = name or default_worker_name()
+        self.stopping = False
+
+    def stop(self):
+        self.stopping = True
+
+    def _executor(self):
+        if self.pool == 'process':
+            # Forked workers must not inherit this process's open connections
+            connections.close_all()
+            return ProcessPoolExecutor(max_workers=self.concurrency, initializer=_init_worker)
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='task')
+
+    def run(self, once=False, on_task=None):
+        """
+        Run tasks until stop() (or, with `once`, until none is due); returns
+        how many ran. `on_task(task_id, status)` is called as each finishes.
+        """
+        ran = 0
+        in_flight = {}
+        with self._executor() as executor:
+            while True:
+                for future in [future for future in in_flight if future.done()]:
+                    task_id = in_flight.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception:
+                        # The task stays running until its lock expires, then runs again
+                        logger.exception("Worker could not run task %s", task_id)
+                        status = None
+                    ran += 1
+                    if on_task is not None:
+                        on_task(task_id, status)
+
+                claimed = []
+                if not self.stopping and len(in_flight) < self.concurrency:
+                    claimed = claim(self.concurrency - len(in_flight), self.name)
+                    for task_id in claimed:
+                        in_flight[executor.submit(_run_in_worker, task_id)] = task_id
+                if not in_flight and (self.stopping or (once and not claimed)):
+                    return ran
+                if in_flight:
+                    wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                elif not claimed:
+                    time.sleep(self.poll_interval)
+
+
+def queue_stats(since=None):
+    """
+    Counts per status, the age of the oldest due task, and the latency
+    percentiles (seconds from due to started) of tasks finished since `since`.
+    """
+    now = timezone.now()
+    since = since or now - timedelta(hours=1)
+    counts = dict.fromkeys(dict(Task.STATUSES), 0)
+    counts.update(Task.objects.order_by().values_list('status').annotate(count=Count('id')))
+    oldest = (
+        Task.objects.filter(status=Task.PENDING, run_at__lte=now).order_by('run_at').values_list('run_at', flat=True)
+        .first()
+    )
+    latencies = sorted(
+        (started_at - run_at).total_seconds()
+        for started_at, run_at in Task.objects.filter(finished_at__gte=since, started_at__isnull=False)
+        .values_list('started_at', 'run_at')
+    )
+    return {
+        **counts,
+        'oldest_due_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+        'finished': len(latencies),
+        'latency_p50': statistics.median(latencies) if latencies else None,
+        'latency_p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else None,
+    }
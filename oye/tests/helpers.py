@@ -0,0 +1,131 @@
+"""
+Fixtures shared by the tests, the benchmarks and the explain_hotpaths command.
+"""
+import random
+import re
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.db import OperationalError, connection
+
+from oye.models import Item, Restock, Sale, Shop, User
+
+TRANSACTION_SQL = re.compile(r'^(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE SAVEPOINT)', re.I)
+LEGACY_HASHER = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+
+
+def seed_shop(items=100, sales=1000, restocks=0, batch_size=5000):
+    """Create an owner and a shop with `items` items and `sales`/`restocks` rows spread over them."""
+    suffix = uuid.uuid4().hex[:8]
+    owner = User(username=f'bench-{suffix}', email=f'bench-{suffix}@example.com', first_name='Bench', last_name='Owner')
+    owner.set_password('benchmark-password')
+    owner.save()
+    shop = Shop.objects.create(owner=owner, shop_name=f'Bench Shop {suffix}')
+
+    categories = [choice for choice, _ in Item.ITEM_CATEGORIES]
+    item_rows = Item.objects.bulk_create(
+        [
+            Item(
+                shop=shop,
+                item_name=f'Item {n}',
+                category=categories[n % len(categories)],
+                cost_price=Decimal(random.randint(100, 5000)) / 100,
+                selling_price=Decimal(random.randint(5000, 9000)) / 100,
+                quantity=random.randint(0, 500),
+            )
+            for n in range(items)
+        ],
+        batch_size=batch_size,
+    )
+
+    methods = [choice for choice, _ in Sale.PAYMENT_METHODS]
+    for start in range(0, sales, batch_size):
+        batch = []
+        for _ in range(min(batch_size, sales - start)):
+            item = random.choice(item_rows)
+            quantity = random.randint(1, 5)
+            batch.append(Sale(
+                shop=shop,
+                item=item,
+                quantity=quantity,
+                total_price=item.selling_price * quantity,
+                cost_price=item.cost_price * quantity,
+                payment_method=random.choice(methods),
+            ))
+        Sale.objects.bulk_create(batch)
+
+    Restock.objects.bulk_create(
+        [
+            Restock(shop=shop, item=item, quantity=10, total_price=item.cost_price * 10)
+            for item in random.choices(item_rows, k=restocks)
+        ],
+        batch_size=batch_size,
+    )
+    return owner, shop, item_rows
+
+
+def run_threads(worker, threads):
+    """Run `worker(index)` on `threads` threads, each with its own database connection."""
+    def target(index):
+        try:
+            worker(index)
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=target, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def retry_locked(func, attempts=50, on_retry=None):
+    # SQLite raises "database is locked" instead of waiting on a contended write
+    for attempt in range(attempts):
+        try:
+            return func()
+        except OperationalError as e:
+            if 'locked' not in str(e) or attempt == attempts - 1:
+                raise
+            if on_retry is not None:
+                on_retry()
+            time.sleep(0.001 * (attempt + 1))
+
+
+def endpoint_requests(owner, shop, item):
+    """
+    (url name, method, kwargs, body) for every shop-scoped endpoint; their
+    query counts are pinned by oye.tests.test_query_counts.
+    """
+    shop_user = {'shop_id': shop.id, 'user_id': owner.id}
+    return [
+        ('shop-items-list', 'get', shop_user, None),
+        ('shop-item-detail', 'get', {**shop_user, 'item_id': item.id}, None),
+        ('shop-items-by-category', 'get', shop_user, None),
+        ('shop-items-by-category', 'get', shop_user, {'counts': '1'}),
+        ('shop-items-by-category', 'get', shop_user, {'limit': '5'}),
+        ('shop-low-stock', 'get', shop_user, None),
+        ('shop-reorder-suggestions', 'get', shop_user, {'due': '1'}),
+        ('shop-stock-alerts', 'get', shop_user, None),
+        ('shop-restocks-list', 'get', shop_user, None),
+        ('shop-sales-list', 'get', shop_user, None),
+        ('shop-sales-for-day', 'get', shop_user, None),
+        ('shop-sales-for-year', 'get', shop_user, None),
+        ('shop-sales-series', 'get', shop_user, None),
+        ('shop-sales-series', 'get', shop_user, {'bucket': 'hour', 'from': '2024-01-01', 'to': '2024-01-07'}),
+        ('inventory-analysis', 'get', shop_user, None),
+        ('catalog-analysis', 'get', shop_user, None),
+        ('catalog-analysis', 'get', shop_user, {'days': '30', 'abc': 'C', 'order': 'stock_value'}),
+        ('create-item', 'post', shop_user, {'item_name': 'Bench item', 'category': 'other', 'quantity': 5}),
+        ('sale-create', 'post', {**shop_user, 'item_id': item.id}, {'quantity': 1, 'payment_method': 'cash'}),
+        ('restock-create', 'post', {**shop_user, 'item_id': item.id}, {'quantity': 1, 'total_price': '1.00'}),
+        ('basket-checkout', 'post', shop_user, {'lines': [{'item_id': str(item.id), 'quantity': 1}]}),
+        ('shop-sync', 'get', shop_user, None),
+        ('shop-sync-sales', 'post', shop_user, {'sales': [
+            {'client_id': str(uuid.uuid5(uuid.NAMESPACE_URL, str(shop.id))), 'item_id': str(item.id), 'quantity': 1},
+        ]}),
+    ]
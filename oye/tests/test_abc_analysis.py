@@ -0,0 +1,50 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from oye.abc_analysis import analyse_catalog
+from oye.tests.helpers import seed_shop
+from oye.models import Item, SalesDailyRollup
+
+
+class CatalogAnalysisTests(TestCase):
+    def setUp(self):
+        _, self.shop, _ = seed_shop(items=0, sales=0)
+        _, other_shop, _ = seed_shop(items=0, sales=0)
+        self.items = [
+            Item.objects.create(shop=self.shop, item_name=name, cost_price=Decimal('1.00'),
+                                selling_price=Decimal('2.00'), quantity=10)
+            for name in ('Rice', 'Beans', 'Salt', 'Oil')
+        ]
+        today = timezone.localdate()
+        # Rice makes 85% of the revenue, Beans 10%, Salt 5%, Oil nothing
+        self.add_rollup(self.items[0], today, 85)
+        self.add_rollup(self.items[1], today, 10)
+        self.add_rollup(self.items[2], today - timedelta(days=10), 5)
+        # Another shop's sales of an item do not count here
+        stranger = Item.objects.create(shop=other_shop, item_name='Rice', quantity=1)
+        self.add_rollup(stranger, today, 1000)
+
+    def add_rollup(self, item, date, revenue):
+        SalesDailyRollup.objects.create(
+            shop=item.shop, item=item, date=date, payment_method='cash',
+            quantity=revenue, revenue=Decimal(revenue), cost=Decimal(revenue) / 2,
+        )
+
+    def classes(self, analysis):
+        return {row['item_name']: (row['abc_class'], row['units_sold']) for row in analysis.items(analysis.select())}
+
+    def test_every_item_is_classed_by_its_revenue(self):
+        analysis = analyse_catalog(self.shop.pk)
+        self.assertEqual(self.classes(analysis), {
+            'Rice': ('A', 85), 'Beans': ('B', 10), 'Salt': ('C', 5), 'Oil': ('C', 0),
+        })
+        self.assertEqual(analysis.summary()['revenue'], 100)
+
+    def test_only_sales_since_the_date_count(self):
+        analysis = analyse_catalog(self.shop.pk, since=timezone.localdate() - timedelta(days=1))
+        self.assertEqual(len(analysis), 4)
+        self.assertEqual(self.classes(analysis)['Salt'], ('C', 0))
+        self.assertEqual(analysis.summary()['revenue'], 95)
@@ -0,0 +1,48 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+
+from oye.alerts import alert_events, alerts_version, notify_alerts, refresh_low_stock, wait_for_alerts
+from oye.tests.helpers import seed_shop
+from oye.models import Item
+from oye.pagination import StockAlertFeedPagination
+
+
+class AlertNotificationTests(TestCase):
+    def setUp(self):
+        _, self.shop, _ = seed_shop(items=2, sales=0)
+        _, self.other_shop, _ = seed_shop(items=0, sales=0)
+        Item.objects.filter(shop=self.shop).update(quantity=100, is_low_stock=False)
+        self.items = list(Item.objects.filter(shop=self.shop).order_by('item_name'))
+
+    def run_out_of(self, item):
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.filter(pk=item.pk).update(quantity=0)
+            refresh_low_stock([item.pk])
+
+    def test_only_the_shop_of_the_alerts_is_woken(self):
+        version = alerts_version(self.shop.pk)
+        notify_alerts([self.other_shop.pk])
+        self.assertFalse(wait_for_alerts(self.shop.pk, version, 0.05))
+        self.run_out_of(self.items[0])
+        self.assertTrue(wait_for_alerts(self.shop.pk, version, 0))
+
+    async def test_stream_replays_the_feed_then_pushes_new_alerts(self):
+        await sync_to_async(self.run_out_of)(self.items[0])
+        events = alert_events(self.shop.pk, None, StockAlertFeedPagination(), seconds=10)
+        try:
+            self.assertEqual(await anext(events), 'retry: 2000\n\n')
+            self.assertIn('event: low', await anext(events))
+            pending = asyncio.ensure_future(anext(events))
+            await asyncio.sleep(0.1)
+            self.assertFalse(pending.done())
+            await sync_to_async(notify_alerts)([self.other_shop.pk])
+            await asyncio.sleep(0.1)
+            self.assertFalse(pending.done())
+            await sync_to_async(self.run_out_of)(self.items[1])
+            # Pushed straight away rather than at the next POLL_INTERVAL
+            event = await asyncio.wait_for(pending, 1)
+            self.assertIn(f'"item":"{self.items[1].pk}"', event.replace(' ', ''))
+        finally:
+            await events.aclose()
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from oye.analysis import compute_inventory_analysis, inventory_analysis
+from oye.tests.helpers import seed_shop
+from oye.models import Item, Restock, Sale
+
+
+class InventoryAnalysisTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner, self.shop, _ = seed_shop(items=0, sales=0)
+        # Another shop's rows must not count
+        seed_shop(items=2, sales=20, restocks=5)
+        self.rice, self.beans, self.salt = [
+            Item.objects.create(shop=self.shop, item_name=name, cost_price=Decimal(cost),
+                                selling_price=Decimal(price), quantity=quantity, reorder_level=reorder_level)
+            for name, cost, price, quantity, reorder_level in (
+                ('Rice', '1.50', '2.00', 10, None),
+                ('Beans', '0.80', '1.25', 2, None),
+                # Low on stock by its own reorder level, not the shop's threshold of 10
+                ('Salt', '0.20', '0.50', 40, 50),
+            )
+        ]
+        self.sell(self.rice, 3)
+        self.sell(self.rice, 2)
+        self.sell(self.beans, 1)
+        Restock.objects.create(shop=self.shop, item=self.rice, quantity=12, total_price=Decimal('18.00'))
+        Restock.objects.create(shop=self.shop, item=self.salt, quantity=30, total_price=Decimal('6.00'))
+
+    def sell(self, item, quantity):
+        Sale.objects.create(shop=self.shop, item=item, quantity=quantity, payment_method='cash',
+                            total_price=item.selling_price * quantity, cost_price=item.cost_price * quantity)
+
+    def test_figures_match_the_hand_computed_catalog(self):
+        analysis = compute_inventory_analysis(self.shop.pk)
+        self.assertEqual(analysis, {
+            'total_items': 10 + 2 + 40,
+            'total_restocked': 12 + 30,
+            'total_sold': 3 + 2 + 1,
+            # Rice: 5 x (2.00 - 1.50), Beans: 1 x (1.25 - 0.80)
+            'total_profit': Decimal('2.50') + Decimal('0.45'),
+            'items_to_restock': 2,
+            'most_bought_item': {'item__item_name': 'Rice', 'total_quantity': 5},
+            # Salt never sold, so it is not the least bought item
+            'least_bought_item': {'item__item_name': 'Beans', 'total_quantity': 1},
+        })
+
+    def test_a_shop_without_sales(self):
+        _, shop, _ = seed_shop(items=1, sales=0)
+        analysis = compute_inventory_analysis(shop.pk)
+        self.assertEqual((analysis['total_sold'], analysis['total_profit']), (0, 0))
+        self.assertIsNone(analysis['most_bought_item'])
+        self.assertIsNone(analysis['least_bought_item'])
+
+    def test_the_view_serves_the_cached_analysis_until_a_sale(self):
+        url = reverse('inventory-analysis', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+        data = self.client.get(url).json()
+        self.assertEqual((data['total_sold'], data['total_profit']), (6, '2.95'))
+        self.assertEqual(inventory_analysis(self.shop.pk), compute_inventory_analysis(self.shop.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(self.salt, 4)
+        data = self.client.get(url).json()
+        self.assertEqual((data['total_sold'], data['total_profit']), (10, '4.15'))
+        self.assertEqual(data['least_bought_item'], {'item__item_name': 'Beans', 'total_quantity': '1'})
@@ -0,0 +1,69 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+
+from oye.tests.helpers import seed_shop
+
+# Each async endpoint and the sync view it mirrors
+TWINS = {
+    'async-shop-items-list': 'shop-items-list',
+    'async-shop-sales-list': 'shop-sales-list',
+    'async-shop-sales-for-day': 'shop-sales-for-day',
+    'async-shop-sales-for-week': 'shop-sales-for-week',
+    'async-shop-sales-for-month': 'shop-sales-for-month',
+    'async-shop-sales-for-year': 'shop-sales-for-year',
+    'async-inventory-analysis': 'inventory-analysis',
+}
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner, self.shop, _ = seed_shop(items=5, sales=40, restocks=5)
+        self.kwargs = {'shop_id': self.shop.pk, 'user_id': self.owner.pk}
+
+    async def assertSameAsSync(self, async_name, sync_name, kwargs, data=None):
+        response = await AsyncClient().get(reverse(async_name, kwargs=kwargs), data)
+        expected = await sync_to_async(self.client.get)(reverse(sync_name, kwargs=kwargs), data)
+        self.assertEqual(response.status_code, expected.status_code)
+        body = response.json()
+        if isinstance(body, dict) and body.get('next'):
+            # The same cursor, on the async twin's own URL
+            body['next'] = body['next'].replace('/async/', '/', 1)
+        self.assertEqual(body, expected.json())
+        self.assertEqual(response.get('Deprecation'), expected.get('Deprecation'))
+        return response
+
+    async def test_items_list(self):
+        await self.assertSameAsSync('async-shop-items-list', 'shop-items-list', self.kwargs)
+
+    async def test_sales_list(self):
+        response = await self.assertSameAsSync('async-shop-sales-list', 'shop-sales-list', self.kwargs, {'page_size': 7})
+        self.assertEqual(len(response.json()['results']), 7)
+
+    async def test_sales_for_day(self):
+        await self.assertSameAsSync('async-shop-sales-for-day', 'shop-sales-for-day', self.kwargs)
+
+    async def test_sales_for_week(self):
+        await self.assertSameAsSync('async-shop-sales-for-week', 'shop-sales-for-week', self.kwargs)
+
+    async def test_sales_for_month(self):
+        await self.assertSameAsSync('async-shop-sales-for-month', 'shop-sales-for-month', self.kwargs)
+
+    async def test_sales_for_year(self):
+        await self.assertSameAsSync('async-shop-sales-for-year', 'shop-sales-for-year', self.kwargs)
+
+    async def test_inventory_analysis(self):
+        await self.assertSameAsSync('async-inventory-analysis', 'inventory-analysis', self.kwargs)
+
+    async def test_errors_match_the_sync_views(self):
+        stranger = {'shop_id': self.shop.pk, 'user_id': uuid.uuid4()}
+        missing = {'shop_id': uuid.uuid4(), 'user_id': self.owner.pk}
+        for async_name, sync_name in TWINS.items():
+            for kwargs in (stranger, missing):
+                with self.subTest(async_name, kwargs=kwargs):
+                    response = await self.assertSameAsSync(async_name, sync_name, kwargs)
+                    self.assertIn(response.status_code, (403, 404))
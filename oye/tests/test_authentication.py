@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.exceptions import AuthenticationFailed
+
+from oye.authentication import TokenAuthentication, TokenCache, _digest, issue_token, revoke_token, token_cache
+from oye.tests.helpers import seed_shop
+from oye.models import AuthToken
+from oye.utils import password_reset_token
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = seed_shop(items=0, sales=0)[0]
+        self.key = issue_token(self.user)
+        self.auth = TokenAuthentication()
+
+    def test_only_the_digest_is_stored(self):
+        self.assertFalse(AuthToken.objects.filter(key=self.key).exists())
+        self.assertTrue(AuthToken.objects.filter(key=_digest(self.key), user=self.user).exists())
+
+    def test_a_cached_token_needs_no_query(self):
+        self.assertEqual(self.auth.authenticate_credentials(self.key).pk, self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.auth.authenticate_credentials(self.key)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_unknown_and_revoked_tokens_are_refused(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials('not-a-token')
+        self.auth.authenticate_credentials(self.key)
+        revoke_token(self.key)
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_expired_tokens_are_refused_and_deleted(self):
+        AuthToken.objects.filter(key=_digest(self.key)).update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaisesMessage(AuthenticationFailed, "Token has expired."):
+            self.auth.authenticate_credentials(self.key)
+        self.assertFalse(AuthToken.objects.filter(key=_digest(self.key)).exists())
+
+    def test_a_cache_entry_never_outlives_its_token(self):
+        AuthToken.objects.filter(key=_digest(self.key)).update(expires_at=timezone.now() + timedelta(seconds=0.2))
+        self.auth.authenticate_credentials(self.key)
+        time.sleep(0.3)
+        with self.assertRaisesMessage(AuthenticationFailed, "Token has expired."):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_inactive_users_are_refused(self):
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_login_logout_round_trip(self):
+        response = self.client.post(
+            reverse('login'), {'username': self.user.username, 'password': 'benchmark-password'},
+            content_type='application/json',
+        )
+        key = response.json()['token']
+        headers = {'HTTP_AUTHORIZATION': f'Token {key}'}
+        self.assertEqual(self.client.get(reverse('user-account-update'), **headers).status_code, 200)
+        self.assertEqual(self.client.post(reverse('logout'), **headers).status_code, 200)
+        self.assertEqual(self.client.get(reverse('user-account-update'), **headers).status_code, 401)
+
+    def test_public_endpoints_ignore_a_stale_token(self):
+        stale = {'HTTP_AUTHORIZATION': f'Token {self.key}'}
+        revoke_token(self.key)
+        uidb64 = urlsafe_base64_encode(force_bytes(self.user.pk))
+        requests = {
+            'login': (reverse('login'), {'username': self.user.username, 'password': 'benchmark-password'}, 200),
+            'register': (reverse('user-registration'), {
+                'username': 'newcomer', 'email': 'newcomer@example.com', 'first_name': 'New', 'last_name': 'Comer',
+                'password': 'new-password', 'password_confirmation': 'new-password',
+            }, 201),
+            'reset request': (reverse('password_reset_request'), {'email': self.user.email}, 200),
+            'reset': (reverse('password_reset', args=[uidb64, password_reset_token.make_token(self.user)]),
+                      {'new_password': 'reset-password', 'confirm_password': 'reset-password'}, 200),
+        }
+        for name, (url, data, expected) in requests.items():
+            with self.subTest(name):
+                response = self.client.post(url, data, content_type='application/json', **stale)
+                self.assertEqual(response.status_code, expected, response.content)
+
+
+class TokenCacheTests(TestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_entries_expire_after_the_shorter_ttl(self):
+        cache = TokenCache(ttl=60)
+        cache.set('token', 'user', ttl=0)
+        self.assertIsNone(cache.get('token'))
+        cache.set('token', 'user', ttl=3600)
+        self.assertEqual(cache.get('token'), 'user')
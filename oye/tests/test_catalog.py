@@ -0,0 +1,44 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from oye import stock
+from oye.tests.helpers import seed_shop
+from oye.catalog import dated_catalog_etag, get_catalog_version
+from oye.models import Item
+
+
+class CatalogVersionTests(TestCase):
+    def setUp(self):
+        _, self.shop, _ = seed_shop(items=1, sales=0)
+        self.item = Item.objects.get(shop=self.shop)
+        Item.objects.filter(pk=self.item.pk).update(quantity=self.shop.low_stock_threshold, is_low_stock=False)
+
+    def bumps(self, func):
+        before = get_catalog_version(self.shop.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            func()
+        return get_catalog_version(self.shop.pk) - before
+
+    def test_a_low_stock_flag_flip_bumps_the_version_once(self):
+        self.assertEqual(self.bumps(lambda: stock.take_stock(self.item, 1)), 1)
+        self.assertTrue(Item.objects.get(pk=self.item.pk).is_low_stock)
+
+    def test_shop_changes_bump_the_version(self):
+        self.shop.timezone = 'Pacific/Auckland'
+        self.assertEqual(self.bumps(self.shop.save), 1)
+
+    def test_dated_etag_turns_over_at_the_shops_midnight(self):
+        self.shop.timezone = 'Pacific/Auckland'
+        self.shop.save()
+        request = RequestFactory().get('/sales/series/')
+
+        def etag_at(hour, minute):
+            now = datetime(2026, 1, 1, hour, minute, tzinfo=dt_timezone.utc)
+            with mock.patch('django.utils.timezone.now', return_value=now):
+                return dated_catalog_etag(request, self.shop.pk)
+
+        # 23:00 and 00:30 in Auckland, 10:00 and 11:30 in the project's UTC
+        self.assertNotEqual(etag_at(10, 0), etag_at(11, 30))
+        self.assertEqual(etag_at(11, 30), etag_at(12, 0))
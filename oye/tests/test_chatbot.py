@@ -0,0 +1,144 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from oye import chatbot
+from oye.chatbot import CommandError, CommandRunner, NameIndex, UnknownProduct, parse_message
+from oye.models import Item, Sale
+from oye.tests.helpers import seed_shop
+
+
+class ParseMessageTests(TestCase):
+    def test_one_command_per_line(self):
+        commands = parse_message('@sales 2 Rice to Ada: card\n\n  @add 5 Long Beans\n@inventory Rice\n')
+        self.assertEqual([(command.line, command.name) for command in commands],
+                         [(1, 'sales'), (3, 'add'), (4, 'inventory')])
+        self.assertEqual(commands[0].args,
+                         {'quantity': 2, 'product': 'Rice', 'customer': 'Ada', 'payment_method': 'card'})
+        self.assertEqual(commands[1].args, {'quantity': 5, 'product': 'Long Beans'})
+        self.assertEqual(commands[2].args, {'quantity': None, 'product': 'Rice'})
+
+    def test_new_products_get_their_prices_at_the_column_scale(self):
+        command, = parse_message('@new "Palm Oil" Grocery 4 1.5 2 Red, 1 litre')
+        self.assertEqual(command.args, {
+            'item_name': 'Palm Oil', 'category': 'grocery', 'quantity': 4, 'cost_price': Decimal('1.50'),
+            'selling_price': Decimal('2.00'), 'description': 'Red, 1 litre',
+        })
+        self.assertEqual(str(command.args['selling_price']), '2.00')
+
+    def test_errors_name_their_line(self):
+        messages = {
+            '@sales 2 Rice\n@sell 2 Rice': (2, "Invalid command: @sell 2 Rice"),
+            '@add 1 Rice\n\n@sales 1 Rice: cheque': (3, "Unknown payment method 'cheque'"),
+            '@new Rice food 1 1 2': (1, "Unknown category 'food'"),
+            '@add Rice': (1, "Invalid command: @add Rice"),
+        }
+        for message, (line, error) in messages.items():
+            with self.subTest(message):
+                with self.assertRaises(CommandError) as raised:
+                    parse_message(message)
+                self.assertEqual(raised.exception.line, line)
+                self.assertTrue(str(raised.exception).startswith(error), str(raised.exception))
+
+    def test_only_allowed_commands_parse(self):
+        parse_message('@new Rice grocery 1 1 2', allowed={'new'})
+        with self.assertRaisesMessage(CommandError, "Invalid command: @sales 1 Rice"):
+            parse_message('@new Rice grocery 1 1 2\n@sales 1 Rice', allowed={'new'})
+
+    def test_empty_and_oversized_messages_are_refused(self):
+        with self.assertRaises(CommandError):
+            parse_message(' \n ')
+        with self.assertRaisesMessage(CommandError, f"At most {chatbot.MAX_COMMANDS} commands"):
+            parse_message('@inventory Rice\n' * (chatbot.MAX_COMMANDS + 1))
+
+
+class NameIndexTests(TestCase):
+    def setUp(self):
+        self.index = NameIndex([(1, 'Rice A'), (2, 'Rice B'), (3, 'Beans'), (4, 'Sugar'), (5, 'Salt')])
+
+    def test_exact_names_ignore_case_and_spacing(self):
+        self.assertEqual(self.index.resolve('  rice   A '), 1)
+        self.assertEqual(self.index.resolve('SALT'), 5)
+
+    def test_a_unique_prefix_resolves(self):
+        self.assertEqual(self.index.resolve('bea'), 3)
+        self.assertEqual(self.index.resolve('su'), 4)
+
+    def test_an_ambiguous_prefix_lists_the_candidates(self):
+        with self.assertRaises(UnknownProduct) as raised:
+            self.index.resolve('rice')
+        self.assertIn("Did you mean Rice A, Rice B?", str(raised.exception))
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_a_close_spelling_resolves(self):
+        self.assertEqual(self.index.resolve('sugr'), 4)
+        self.assertEqual(self.index.resolve('beens'), 3)
+
+    def test_spellings_as_close_to_two_names_are_refused(self):
+        # 'rice c' is as close to 'rice a' as to 'rice b': within FUZZY_MARGIN, so no guess
+        with self.assertRaises(UnknownProduct) as raised:
+            self.index.resolve('rice c')
+        self.assertIn("Rice A", str(raised.exception))
+        self.assertIn("Rice B", str(raised.exception))
+
+    def test_unknown_names_are_refused(self):
+        with self.assertRaisesMessage(UnknownProduct, "No product called 'flour' in this shop."):
+            self.index.resolve('flour')
+
+    def test_a_name_shared_by_two_items_is_refused(self):
+        self.index.add(6, 'beans ')
+        with self.assertRaisesMessage(CommandError, "2 products are called 'Beans'"):
+            self.index.resolve('Beans')
+
+
+class CommandRunnerTests(TestCase):
+    def setUp(self):
+        chatbot._indexes.clear()
+        self.owner, self.shop, _ = seed_shop(items=0, sales=0)
+        self.rice = Item.objects.create(shop=self.shop, item_name='Rice', quantity=10,
+                                        cost_price=Decimal('1.00'), selling_price=Decimal('1.50'))
+        self.url = reverse('chatbot', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+
+    def post(self, message, url=None):
+        response = self.client.post(url or self.url, json.dumps({'message': message}), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_commands_run_in_order(self):
+        results = CommandRunner(self.shop).run(parse_message('@sales 4 rice\n@add 2 Rice\n@inventory rice'))
+        self.assertEqual(results[0]['total_amount'], Decimal('6.00'))
+        self.assertEqual(results[2]['message'], "📊 Rice stock: 8 left")
+
+    def test_a_failing_line_rolls_back_the_whole_message(self):
+        status, data = self.post('@new Beans grocery 5 1 2\n@sales 2 Beans\n@add 3 Rice\n@sales 50 Rice')
+        self.assertEqual((status, data), (400, {'error': "Not enough Rice in stock.", 'line': 4}))
+        self.assertFalse(Item.objects.filter(shop=self.shop, item_name='Beans').exists())
+        self.assertFalse(Sale.objects.filter(shop=self.shop).exists())
+        self.assertEqual(Item.objects.get(pk=self.rice.pk).quantity, 10)
+        # Nor does the rolled-back item linger in the shop's name index
+        with self.assertRaises(UnknownProduct):
+            chatbot.get_index(self.shop.pk).resolve('Beans')
+
+    def test_unknown_products_name_their_line(self):
+        status, data = self.post('@sales 1 Rice\n@sales 1 Flour')
+        self.assertEqual(status, 404)
+        self.assertEqual(data['line'], 2)
+        self.assertFalse(Sale.objects.filter(shop=self.shop).exists())
+
+    def test_a_product_created_earlier_in_the_message_can_be_sold(self):
+        status, data = self.post('@new Beans grocery 5 1 2\n@sales 1 Beans: card')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['results'][1]['total_amount'], '2.00')
+        sale = Sale.objects.get(shop=self.shop)
+        self.assertEqual((sale.total_price, sale.cost_price, sale.payment_method),
+                         (Decimal('2.00'), Decimal('1.00'), 'card'))
+        self.assertEqual(Item.objects.get(shop=self.shop, item_name='Beans').quantity, 4)
+
+    def test_the_new_product_endpoint_only_creates_products(self):
+        url = reverse('add_new_product', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+        status, data = self.post('@sales 1 Rice', url)
+        self.assertEqual((status, data), (400, {'error': "Invalid command: @sales 1 Rice"}))
+        status, data = self.post('@new Beans grocery 5 1 2', url)
+        self.assertEqual(status, 200)
+        self.assertEqual(data['item_id'], str(Item.objects.get(shop=self.shop, item_name='Beans').pk))
@@ -0,0 +1,15 @@
+from contextlib import nullcontext
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class ExplainHotpathsTests(TestCase):
+    def test_no_endpoint_scans_a_hot_table(self):
+        out = StringIO()
+        # Against the test database rather than a throwaway one of its own
+        with mock.patch('oye.management.commands.explain_hotpaths.benchmark_database', nullcontext):
+            call_command('explain_hotpaths', shops=3, items=50, sales=300, stdout=out)
+        self.assertIn("No full scans of hot tables.", out.getvalue())
@@ -0,0 +1,31 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from oye.tests.helpers import seed_shop
+from oye.models import ReorderSuggestion
+
+
+class ComputeReorderPointsCommandTests(TestCase):
+    def setUp(self):
+        _, self.shop, _ = seed_shop(items=5, sales=50)
+
+    def call(self, *args):
+        call_command('compute_reorder_points', '--shop', str(self.shop.pk), '--processes', '1', *args,
+                     stdout=StringIO(), stderr=StringIO())
+
+    def test_forecasts_every_item_of_the_shop(self):
+        self.call()
+        self.assertEqual(ReorderSuggestion.objects.filter(item__shop=self.shop).count(), 5)
+
+    def test_fails_when_a_shop_fails(self):
+        with mock.patch('oye.forecasting.compute_shop_reorder_points', side_effect=RuntimeError('boom')):
+            with self.assertRaisesMessage(CommandError, '1 of 1 shops failed.'):
+                self.call()
+
+    def test_rejects_sizes_below_one(self):
+        for option in ('--history-days', '--chunk-size', '--processes'):
+            with self.subTest(option), self.assertRaisesMessage(CommandError, 'must be at least 1, not 0'):
+                call_command('compute_reorder_points', option, '0')
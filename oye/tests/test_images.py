@@ -0,0 +1,73 @@
+import io
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from PIL import Image
+
+from oye import tasks
+from oye.authentication import issue_token
+from oye.tests.helpers import seed_shop
+from oye.models import UserProfile
+
+
+def photo(width, height):
+    """A JPEG with the EXIF a phone writes, GPS position included."""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    exif[0x8825] = {1: 'N', 2: (5.0, 36.0, 0.0)}
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class ProfilePictureTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name, PROFILE_PICTURE_ORIGINAL_SIZE=300)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.owner, _, _ = seed_shop(items=0, sales=0)
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {issue_token(self.owner)}'}
+
+    def upload(self, content):
+        body = encode_multipart(BOUNDARY, {'profile.profile_picture': SimpleUploadedFile('me.jpg', content)})
+        return self.client.patch(reverse('user-account-update'), body, content_type=MULTIPART_CONTENT, **self.headers)
+
+    def test_only_metadata_free_renditions_are_kept_and_served(self):
+        response = self.upload(photo(800, 400))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn('profile_picture', response.json()['profile'])
+        upload = UserProfile.objects.get(user=self.owner).profile_picture.name
+        self.assertTrue(default_storage.exists(upload))
+
+        self.assertEqual(tasks.run_pending_tasks(), 1)
+        profile = UserProfile.objects.get(user=self.owner)
+        self.assertFalse(profile.profile_picture)
+        self.assertFalse(default_storage.exists(upload))
+        # Turned upright, then bounded to PROFILE_PICTURE_ORIGINAL_SIZE
+        original = profile.renditions['original']
+        self.assertEqual((original['width'], original['height']), (150, 300))
+        for name, rendition in profile.renditions.items():
+            for path in (rendition['webp'], rendition['jpeg']):
+                with self.subTest(path=path), default_storage.open(path) as file:
+                    image = Image.open(file)
+                    self.assertFalse(image.getexif())
+                    self.assertNotIn('exif', image.info)
+
+        data = self.client.get(reverse('user-profile-detail', kwargs={'user_id': self.owner.pk})).json()
+        self.assertNotIn('profile_picture', data)
+        self.assertTrue(data['renditions']['original']['webp'].startswith('http://testserver/media/'))
+
+    def test_a_picture_replaced_before_its_task_runs_is_only_deleted(self):
+        self.upload(photo(200, 200))
+        first = UserProfile.objects.get(user=self.owner).profile_picture.name
+        self.upload(photo(300, 300))
+        self.assertEqual(tasks.run_pending_tasks(), 2)
+        profile = UserProfile.objects.get(user=self.owner)
+        self.assertEqual(profile.renditions['original']['width'], 300)
+        self.assertFalse(default_storage.exists(first))
@@ -0,0 +1,125 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from oye.tests.helpers import seed_shop
+from oye.importers import import_items, read_rows
+from oye.models import Item, StockAlert
+
+
+def csv_rows(text):
+    return read_rows(io.StringIO(text), 'csv')
+
+
+class ImportItemsTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, _ = seed_shop(items=0, sales=0)
+
+    def test_rows_are_created_and_bad_rows_reported(self):
+        report = import_items(self.shop, csv_rows(
+            "item_name,category,cost_price,selling_price,quantity\n"
+            "Rice,Grocery,10.50,12.00,40\n"
+            ",other,1,2,3\n"
+            "Soap,other,abc,2,3\n"
+            "Milk,not-a-category,1,2,3\n"
+            "Oil,other,5,7,-1\n"
+        ))
+        self.assertEqual((report.created, report.updated, report.failed), (1, 0, 4))
+        self.assertEqual([error['line'] for error in report.errors], [3, 4, 5, 6])
+        rice = Item.objects.get(shop=self.shop)
+        self.assertEqual((rice.item_name, rice.category, rice.quantity), ('Rice', 'grocery', 40))
+
+    def test_prices_that_are_not_finite_numbers_are_reported(self):
+        report = import_items(self.shop, csv_rows(
+            "item_name,cost_price,selling_price\n"
+            "Rice,1,nan\n"
+            "Beans,NaN,2\n"
+            "Salt,sNaN,2\n"
+            "Oil,1,Infinity\n"
+            "Soap,-inf,2\n"
+        ))
+        self.assertEqual((report.created, report.failed), (0, 5))
+        self.assertEqual([error['error'] for error in report.errors], [
+            "selling_price must be a number.", "cost_price must be a number.", "cost_price must be a number.",
+            "selling_price must be a number.", "cost_price must be a number.",
+        ])
+
+    def test_jsonl_lines_that_are_not_objects_are_reported(self):
+        rows = read_rows(io.StringIO('{"item_name": "Rice"}\n\n[1, 2]\nnot json\n'), 'jsonl')
+        report = import_items(self.shop, rows)
+        self.assertEqual((report.created, report.failed), (1, 2))
+        self.assertEqual([error['line'] for error in report.errors], [3, 4])
+
+    def test_upsert_updates_items_by_name_and_the_last_row_wins(self):
+        import_items(self.shop, csv_rows("item_name,quantity\nRice,5\n"))
+        rice = Item.objects.get(shop=self.shop)
+        report = import_items(self.shop, csv_rows("item_name,quantity\nRice,7\nBeans,3\nRice,9\n"), upsert=True)
+        self.assertEqual((report.created, report.updated), (1, 2))
+        rice_after = Item.objects.get(shop=self.shop, item_name='Rice')
+        self.assertEqual((rice_after.pk, rice_after.quantity, rice_after.created_at), (rice.pk, 9, rice.created_at))
+
+    def test_imported_items_get_their_low_stock_flags_and_alerts(self):
+        rows = [(n, {'item_name': f'Item {n}', 'quantity': n % 2 * 100}) for n in range(40)]
+        import_items(self.shop, rows, chunk_size=15)
+        self.assertEqual(Item.objects.filter(shop=self.shop, is_low_stock=True).count(), 20)
+        self.assertEqual(StockAlert.objects.filter(shop=self.shop, kind=StockAlert.LOW).count(), 20)
+
+        recovered = [(n, {'item_name': f'Item {n}', 'quantity': 100}) for n in range(40)]
+        import_items(self.shop, recovered, upsert=True, chunk_size=15)
+        self.assertFalse(Item.objects.filter(shop=self.shop, is_low_stock=True).exists())
+        self.assertEqual(StockAlert.objects.filter(shop=self.shop, kind=StockAlert.RECOVERED).count(), 20)
+
+    def test_low_stock_items_cost_no_extra_queries_per_item(self):
+        def queries(quantity):
+            _, shop, _ = seed_shop(items=0, sales=0)
+            rows = [(n, {'item_name': f'Item {n}', 'quantity': quantity}) for n in range(300)]
+            with CaptureQueriesContext(connection) as captured:
+                import_items(shop, rows, chunk_size=100)
+            return len(captured)
+
+        in_stock, all_low = queries(100), queries(0)
+        # Per chunk: one UPDATE for the flags and the alert INSERT batches
+        self.assertLessEqual(all_low - in_stock, 3 * 5)
+
+    def test_refreshing_a_chunk_leaves_the_rest_of_the_shop_alone(self):
+        import_items(self.shop, [(1, {'item_name': 'Old', 'quantity': 0})])
+        # A flag the import did not write stays as it is, whatever it says
+        Item.objects.filter(shop=self.shop).update(is_low_stock=False)
+        import_items(self.shop, [(1, {'item_name': 'New', 'quantity': 100})])
+        self.assertFalse(Item.objects.get(shop=self.shop, item_name='Old').is_low_stock)
+
+
+class ImportItemsViewTests(TestCase):
+    def test_an_uploaded_file_is_imported(self):
+        owner, shop, _ = seed_shop(items=0, sales=0)
+        upload = SimpleUploadedFile('items.csv', b"item_name,quantity\nRice,4\nBeans,x\n")
+        response = self.client.post(
+            reverse('import-items', kwargs={'shop_id': shop.id, 'user_id': owner.id}), {'file': upload},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['created'], response.json()['failed']), (1, 1))
+
+    def test_a_file_that_is_not_utf8_reports_how_far_it_was_imported(self):
+        owner, shop, _ = seed_shop(items=0, sales=0)
+        url = reverse('import-items', kwargs={'shop_id': shop.id, 'user_id': owner.id})
+        good_rows = ''.join(f"Item {n},1\n" for n in range(3000))
+        # cp1252/latin-1 encodes é as a lone 0xe9 byte
+        upload = SimpleUploadedFile('items.csv', f"item_name,quantity\n{good_rows}Café,2\n".encode('cp1252'))
+        response = self.client.post(url, {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report['failed'], 1)
+        self.assertGreater(report['created'], 0)
+        self.assertEqual(report['created'], Item.objects.filter(shop=shop).count())
+        error = report['errors'][0]
+        self.assertEqual(error['line'], report['created'] + 2)
+        self.assertIn(f"nothing from line {report['created'] + 2} on was imported", error['error'])
+
+        upload = SimpleUploadedFile('items.csv', "item_name,quantity\nCafé,2\n".encode('latin-1'))
+        report = self.client.post(url, {'file': upload}).json()
+        self.assertEqual((report['created'], report['failed']), (0, 1))
+        self.assertEqual(report['errors'][0]['line'], 1)
@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from oye.tests.helpers import seed_shop
+from oye.models import Item
+
+
+class ItemsByCategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # seed_shop spreads the items over every category in turn
+        self.owner, self.shop, _ = seed_shop(items=45, sales=0)
+        self.url = reverse('shop-items-by-category', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+        self.expected = defaultdict(list)
+        for item_id, category in Item.objects.filter(shop=self.shop).order_by('item_name', 'id').values_list('id', 'category'):
+            self.expected[category].append(str(item_id))
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_every_item_is_listed_under_its_category_by_name(self):
+        groups = self.get()
+        self.assertEqual(list(groups), sorted(self.expected))
+        self.assertEqual({category: [item['id'] for item in items] for category, items in groups.items()}, self.expected)
+
+    def test_counts_only(self):
+        self.assertEqual(self.get(counts='1'), {category: len(ids) for category, ids in self.expected.items()})
+
+    def test_pages_within_every_category(self):
+        groups = self.get(limit='2', offset='1')
+        self.assertEqual(set(groups), set(self.expected))
+        for category, group in groups.items():
+            self.assertEqual(group['count'], len(self.expected[category]))
+            self.assertEqual([item['id'] for item in group['results']], self.expected[category][1:3])
+
+    def count_queries(self):
+        counts = []
+        for params in ({}, {'counts': '1'}, {'limit': '2'}):
+            self.get(**params)  # warm the owner cache
+            with CaptureQueriesContext(connection) as queries:
+                self.get(**params)
+            counts.append(len(queries))
+        return counts
+
+    def test_queries_do_not_grow_with_the_categories(self):
+        Item.objects.filter(shop=self.shop).exclude(category='other').delete()
+        one_category = self.count_queries()
+        _, _, more_items = seed_shop(items=45, sales=0)
+        Item.objects.filter(pk__in=[item.pk for item in more_items]).update(shop=self.shop)
+        self.assertEqual(len(self.get(counts='1')), len(Item.ITEM_CATEGORIES))
+        self.assertEqual(self.count_queries(), one_category)
@@ -0,0 +1,129 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from oye.tests.helpers import seed_shop
+from oye.exports import SALE_EXPORT_FIELDS
+from oye.models import Sale
+from oye.pagination import KeysetPagination
+
+
+def cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+class SalePaginationTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, _ = seed_shop(items=2, sales=9)
+        # Five sales share one timestamp, so pages must split inside a tie
+        sold_at = datetime(2026, 3, 10, 9, 0, tzinfo=dt_timezone.utc)
+        sale_ids = list(Sale.objects.filter(shop=self.shop).values_list('id', flat=True))
+        Sale.objects.filter(id__in=sale_ids[:5]).update(sold_at=sold_at)
+        for n, sale_id in enumerate(sale_ids[5:], 1):
+            Sale.objects.filter(id=sale_id).update(sold_at=sold_at - timedelta(minutes=n))
+        self.url = reverse('shop-sales-list', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+
+    def expected_ids(self):
+        return [str(pk) for pk in Sale.objects.filter(shop=self.shop).order_by('-sold_at', '-id').values_list('id', flat=True)]
+
+    def test_pages_split_ties_without_duplicates_or_gaps(self):
+        for page_size in (1, 2, 3, 4):
+            with self.subTest(page_size=page_size):
+                seen, url, data = [], self.url, {'page_size': page_size}
+                while url:
+                    response = self.client.get(url, data)
+                    self.assertEqual(response.status_code, 200)
+                    page = response.json()
+                    self.assertLessEqual(len(page['results']), page_size)
+                    seen.extend(sale['id'] for sale in page['results'])
+                    url, data = page['next'], None
+                self.assertEqual(seen, self.expected_ids())
+
+    def test_an_invalid_cursor_is_not_found(self):
+        sale = Sale.objects.filter(shop=self.shop).first()
+        sold_at, sale_id = sale.sold_at.isoformat(), sale.id
+        self.assertEqual(self.client.get(self.url, {'cursor': cursor(f'{sold_at}|{sale_id}')}).status_code, 200)
+        cursors = {
+            'not base64': 'not-base64!',
+            'not ascii': cursor('2026-03-10T09:00:00+00:00|é'),
+            'one field': cursor(sold_at),
+            'three fields': cursor(f'{sold_at}|{sale_id}|{sale_id}'),
+            'bad timestamp': cursor(f'yesterday|{sale_id}'),
+            'bad id': cursor(f'{sold_at}|42'),
+        }
+        for name, value in cursors.items():
+            with self.subTest(name):
+                response = self.client.get(self.url, {'cursor': value})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()['detail'], KeysetPagination.invalid_cursor_message)
+
+    def test_page_size_is_clamped(self):
+        sizes = {'0': 1, '-5': 1, 'many': 9, '4': 4}
+        for page_size, expected in sizes.items():
+            with self.subTest(page_size=page_size):
+                response = self.client.get(self.url, {'page_size': page_size})
+                self.assertEqual(len(response.json()['results']), expected)
+
+    def test_page_size_is_capped_at_the_maximum(self):
+        owner, shop, _ = seed_shop(items=1, sales=KeysetPagination.max_page_size + 5)
+        url = reverse('shop-sales-list', kwargs={'shop_id': shop.pk, 'user_id': owner.pk})
+        page = self.client.get(url, {'page_size': 5000}).json()
+        self.assertEqual(len(page['results']), KeysetPagination.max_page_size)
+        self.assertIsNotNone(page['next'])
+
+
+class SaleExportTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, _ = seed_shop(items=2, sales=5)
+        self.url = reverse('shop-sales-list', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+        self.sales = list(Sale.objects.filter(shop=self.shop).order_by('-sold_at', '-id'))
+
+    def export(self, export_format):
+        response = self.client.get(self.url, {'export': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'], f'attachment; filename="sales-{self.shop.pk}.{export_format}"'
+        )
+        return response, b''.join(response.streaming_content).decode()
+
+    def assertRowMatchesSale(self, row, sale):
+        self.assertEqual(row['id'], str(sale.id))
+        self.assertEqual(row['shop'], str(self.shop.pk))
+        self.assertEqual(row['item'], str(sale.item_id))
+        self.assertEqual(int(row['quantity']), sale.quantity)
+        self.assertEqual(Decimal(row['total_price']), sale.total_price)
+        self.assertEqual(Decimal(row['profit']), sale.total_price - sale.cost_price)
+        self.assertEqual(row['payment_method'], sale.payment_method)
+        self.assertTrue(row['sold_at'].endswith('Z'))
+        self.assertEqual(datetime.fromisoformat(row['sold_at']), sale.sold_at)
+
+    def test_ndjson_export(self):
+        response, body = self.export('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertTrue(body.endswith('\n'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), len(self.sales))
+        for row, sale in zip(rows, self.sales):
+            self.assertEqual(list(row), SALE_EXPORT_FIELDS)
+            self.assertRowMatchesSale(row, sale)
+
+    def test_csv_export(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        reader = csv.reader(io.StringIO(body))
+        self.assertEqual(next(reader), SALE_EXPORT_FIELDS)
+        rows = [dict(zip(SALE_EXPORT_FIELDS, row)) for row in reader]
+        self.assertEqual(len(rows), len(self.sales))
+        for row, sale in zip(rows, self.sales):
+            self.assertRowMatchesSale(row, sale)
+
+    def test_an_unknown_export_format_is_rejected(self):
+        response = self.client.get(self.url, {'export': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,44 @@
+from django.contrib.auth.hashers import identify_hasher
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from oye.tests.helpers import LEGACY_HASHER, seed_shop
+from oye.models import User
+
+
+class PasswordStorageTests(TestCase):
+    def register(self, password, confirmation=None):
+        return self.client.post(reverse('user-registration'), {
+            'username': 'ama', 'email': 'ama@example.com', 'first_name': 'Ama', 'last_name': 'Mensah',
+            'password': password, 'password_confirmation': confirmation or password,
+        }, content_type='application/json')
+
+    def test_a_registered_user_has_a_valid_hash(self):
+        self.assertEqual(self.register('correct horse battery').status_code, 201)
+        user = User.objects.get(username='ama')
+        self.assertGreater(len(user.password), 100)
+        self.assertLessEqual(len(user.password), User._meta.get_field('password').max_length)
+        user.full_clean()
+        self.assertTrue(user.check_password('correct horse battery'))
+
+    def test_the_raw_password_length_is_checked(self):
+        for password in ('short', 'x' * 101):
+            with self.subTest(length=len(password)):
+                response = self.register(password)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('password', response.json())
+        self.assertFalse(User.objects.filter(username='ama').exists())
+
+    @override_settings(PASSWORD_REHASH_ASYNC=False)
+    def test_a_legacy_hash_is_replaced_on_login(self):
+        with override_settings(PASSWORD_HASHERS=[LEGACY_HASHER]):
+            user = seed_shop(items=0, sales=0)[0]
+        response = self.client.post(
+            reverse('login'), {'username': user.username, 'password': 'benchmark-password'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, 'scrypt')
+        user.full_clean()
+        self.assertTrue(user.check_password('benchmark-password'))
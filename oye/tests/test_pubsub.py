@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase
+
+from oye import ticker
+from oye.tests.helpers import seed_shop
+from oye.models import Sale
+from oye.pubsub import InProcessBroker, get_broker
+
+
+async def receive(subscription):
+    return await asyncio.wait_for(anext(subscription), timeout=1)
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    def test_a_message_fans_out_to_every_subscriber_of_its_channel(self):
+        broker = InProcessBroker()
+        published = []
+
+        async def scenario():
+            async with broker.subscribe('a') as first, broker.subscribe('a') as second, \
+                    broker.subscribe('b') as other:
+                # Published from another thread, as request threads do
+                publisher = threading.Thread(target=lambda: published.append(broker.publish('a', b'hello')))
+                publisher.start()
+                publisher.join()
+                self.assertEqual(await receive(first), b'hello')
+                self.assertEqual(await receive(second), b'hello')
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(anext(other), timeout=0.05)
+            self.assertFalse(broker.has_subscribers('a'))
+            self.assertEqual(broker.publish('a', b'nobody listens'), 0)
+
+        asyncio.run(scenario())
+        self.assertEqual(published, [2])
+
+    def test_a_slow_subscriber_loses_its_oldest_messages(self):
+        broker = InProcessBroker(queue_size=2)
+
+        async def scenario():
+            async with broker.subscribe('a') as subscription:
+                for n in range(5):
+                    broker.publish('a', n)
+                await asyncio.sleep(0)
+                return [await receive(subscription), await receive(subscription)], subscription.dropped
+
+        self.assertEqual(asyncio.run(scenario()), ([3, 4], 3))
+
+
+class SalesTickerTests(TestCase):
+    def setUp(self):
+        _, self.shop, self.items = seed_shop(items=1, sales=0)
+
+    def sell(self):
+        item = self.items[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            return Sale.objects.create(shop=self.shop, item=item, quantity=2, payment_method='cash',
+                                       total_price=item.selling_price * 2, cost_price=item.cost_price * 2)
+
+    async def test_a_committed_sale_reaches_the_shops_dashboards(self):
+        channel = ticker.sales_channel(self.shop.pk)
+        async with get_broker().subscribe(channel) as first, get_broker().subscribe(channel) as second:
+            sale = await sync_to_async(self.sell)()
+            for subscription in (first, second):
+                event, data = (await receive(subscription)).split(b'\n')[:2]
+                self.assertEqual(event, b'event: sales')
+                data = json.loads(data.removeprefix(b'data: '), parse_float=Decimal)
+                self.assertEqual([line['id'] for line in data['sales']], [str(sale.pk)])
+                self.assertEqual(data['total_amount'], sale.total_price)
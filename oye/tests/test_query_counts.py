@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from oye.tests.helpers import TRANSACTION_SQL, endpoint_requests, seed_shop
+from oye.models import Item, Shop
+
+# Fewest queries each endpoint needs once the shop owner is cached. List
+# endpoints read the shop's catalog version for their ETag, and writes bump it
+# once per transaction.
+QUERY_BUDGETS = {
+    'shop-items-list': 2,
+    'shop-item-detail': 1,
+    'shop-items-by-category': 2,
+    'shop-low-stock': 2,
+    'shop-reorder-suggestions': 1,
+    'shop-stock-alerts': 1,
+    'shop-restocks-list': 2,
+    'shop-sales-list': 2,
+    'shop-sales-for-day': 3,
+    'shop-sales-for-year': 3,
+    # The shop's time zone and catalog version, then one GROUP BY
+    'shop-sales-series': 2,
+    'inventory-analysis': 0,
+    # The catalog version keys the cached arrays; then the names of the listed items
+    'catalog-analysis': 3,
+    # One indexed range read per kind of change
+    'shop-sync': 4,
+    # A retried upload: the shop, its items and the client_ids already recorded
+    'shop-sync-sales': 3,
+    # The new item starts below its reorder level, so it also flips its flag and records an alert
+    'create-item': 4,
+    'sale-create': 5,
+    'restock-create': 5,
+    'basket-checkout': 7,
+}
+
+
+class QueryCountTests(TestCase):
+    """Every shop endpoint runs exactly its budgeted number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.shop, item_rows = seed_shop(items=100, sales=1000, restocks=100)
+        cls.item = item_rows[0]
+        Item.objects.filter(pk=cls.item.pk).update(quantity=1_000_000)
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, send, url, body):
+        # On-commit work (the catalog version bump) is part of a write's cost
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = send(url, body, content_type='application/json')
+        # Transaction control statements are not round trips worth budgeting
+        return response, [query['sql'] for query in queries if not TRANSACTION_SQL.match(query['sql'])]
+
+    def test_every_endpoint_is_budgeted(self):
+        names = {name for name, _, _, _ in endpoint_requests(self.owner, self.shop, self.item)}
+        self.assertEqual(names - QUERY_BUDGETS.keys(), set())
+
+    def test_endpoints_run_their_budgeted_queries(self):
+        client = Client()
+        for name, method, kwargs, body in endpoint_requests(self.owner, self.shop, self.item):
+            label = f"{name}?{urlencode(body)}" if method == 'get' and body else name
+            with self.subTest(label):
+                url = reverse(name, kwargs=kwargs)
+                send = getattr(client, method)
+                send(url, body, content_type='application/json')  # warm the owner and analysis caches
+                response, queries = self.count_queries(send, url, body)
+                self.assertLess(response.status_code, 300)
+                self.assertEqual(len(queries), QUERY_BUDGETS[name], '\n'.join(queries))
+
+
+class ShopOwnerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.shop, (cls.item,) = seed_shop(items=1, sales=0)
+        cls.stranger, _, _ = seed_shop(items=0, sales=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_other_users_are_refused(self):
+        client = Client()
+        for name, method, kwargs, body in endpoint_requests(self.stranger, self.shop, self.item):
+            with self.subTest(name):
+                response = getattr(client, method)(reverse(name, kwargs=kwargs), body, content_type='application/json')
+                self.assertEqual(response.status_code, 403)
+
+    def test_a_new_owner_is_seen_at_once(self):
+        url = reverse('shop-items-list', kwargs={'shop_id': self.shop.id, 'user_id': self.stranger.id})
+        self.assertEqual(Client().get(url).status_code, 403)
+        # The cached owner id goes with the save
+        shop = Shop.objects.get(pk=self.shop.pk)
+        shop.owner = self.stranger
+        shop.save()
+        self.assertEqual(Client().get(url).status_code, 200)
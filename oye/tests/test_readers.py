@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from oye.models import Item, Restock, Sale
+from oye.readers import item_reader, restock_reader, sale_reader
+from oye.renderers import FastJSONRenderer
+from oye.serializers import ItemSerializer, RestockSerializer, SaleSerializer
+from oye.tests.helpers import seed_shop
+
+READERS = (
+    ('items', item_reader, ItemSerializer, Item),
+    ('sales', sale_reader, SaleSerializer, Sale),
+    ('restocks', restock_reader, RestockSerializer, Restock),
+)
+
+
+class FastReaderTests(TestCase):
+    def setUp(self):
+        _, self.shop, _ = seed_shop(items=0, sales=0)
+        plain = Item.objects.create(shop=self.shop, item_name='Plain', quantity=3)
+        described = Item.objects.create(
+            shop=self.shop, item_name='Described', description='Long grain', quantity=40, reorder_level=12,
+            cost_price=Decimal('0.1'), selling_price=Decimal('12345678.99'),
+        )
+        # Prices of every scale, stored as given rather than as two-place decimals
+        Sale.objects.bulk_create([
+            Sale(shop=self.shop, item=plain, quantity=1, total_price=Decimal('5'), cost_price=Decimal('2.5'),
+                 payment_method='cash'),
+            Sale(shop=self.shop, item=described, quantity=2, total_price=Decimal('0.10'), cost_price=Decimal('0'),
+                 payment_method='card', customer='Ada', client_id=uuid.uuid4()),
+            Sale(shop=self.shop, item=described, quantity=7, total_price=Decimal('99999999.99'),
+                 cost_price=Decimal('0.01'), payment_method='online'),
+        ])
+        Restock.objects.bulk_create([
+            Restock(shop=self.shop, item=plain, quantity=10, total_price=Decimal('7')),
+            Restock(shop=self.shop, item=described, quantity=1, total_price=Decimal('1234.5')),
+        ])
+        # Microseconds, and a time that is another day in some time zones
+        sold_at = datetime(2026, 3, 9, 23, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        Sale.objects.filter(shop=self.shop, payment_method='card').update(sold_at=sold_at)
+
+    def assertSameBytes(self):
+        for name, reader, serializer_class, model in READERS:
+            queryset = model.objects.filter(shop=self.shop).order_by('pk')
+            expected = serializer_class(queryset, many=True).data
+            rows = reader.serialize(reader.values(queryset))
+            with self.subTest(name):
+                self.assertEqual(len(rows), queryset.count())
+                self.assertEqual(JSONRenderer().render(rows), JSONRenderer().render(expected))
+                self.assertEqual(FastJSONRenderer().render(rows), FastJSONRenderer().render(expected))
+
+    def test_rows_render_exactly_as_the_serializers(self):
+        self.assertSameBytes()
+
+    @override_settings(TIME_ZONE='Africa/Lagos')
+    def test_datetimes_render_in_the_current_time_zone(self):
+        self.assertSameBytes()
+        sale = sale_reader.serialize(sale_reader.values(Sale.objects.filter(shop=self.shop, payment_method='card')))
+        self.assertEqual(sale[0]['sold_at'], '2026-03-10T00:30:15.123456+01:00')
+
+    def test_null_fields_and_decimal_scale(self):
+        item = item_reader.serialize(item_reader.values(Item.objects.filter(item_name='Plain')))[0]
+        self.assertEqual((item['description'], item['reorder_level']), (None, None))
+        sales = {
+            sale['payment_method']: sale
+            for sale in sale_reader.serialize(sale_reader.values(Sale.objects.filter(shop=self.shop)))
+        }
+        self.assertEqual((sales['cash']['total_price'], sales['cash']['cost_price']), ('5.00', '2.50'))
+        self.assertEqual(sales['online']['total_price'], '99999999.99')
+        self.assertIsNone(sales['cash']['client_id'])
+        restocks = restock_reader.serialize(restock_reader.values(Restock.objects.filter(shop=self.shop)))
+        self.assertEqual(sorted(restock['total_price'] for restock in restocks), ['1234.50', '7.00'])
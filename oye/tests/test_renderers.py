@@ -0,0 +1,77 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from oye.renderers import FastJSONParser, FastJSONRenderer
+
+SAMPLES = {
+    'decimals': [Decimal('12.50'), Decimal('0.1'), Decimal('-3'), Decimal('1E+2')],
+    'aware datetime': datetime.datetime(2026, 3, 10, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'offset datetime': datetime.datetime(2026, 3, 10, 9, 30, tzinfo=ZoneInfo('Africa/Lagos')),
+    'naive datetime': datetime.datetime(2026, 3, 10, 9, 30),
+    'date': datetime.date(2026, 3, 10),
+    'time': datetime.time(9, 30, 15, 5),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy string': gettext_lazy('Cash'),
+    'line separators': 'one\u2028two\u2029three',
+    'nested': {'total': Decimal('2.00'), 'at': [datetime.date(2026, 1, 1)], 'none': None, 'ok': True, 'n': 1.5},
+    'integer keys': {1: 'one', 2: 'two'},
+    'big integer': 2 ** 70,
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_drf(self):
+        for name, data in SAMPLES.items():
+            with self.subTest(name):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_matches_drf(self):
+        context = {'indent': 2}
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLES['nested'], renderer_context=context),
+            JSONRenderer().render(SAMPLES['nested'], renderer_context=context),
+        )
+
+    def test_non_finite_decimals_are_refused_like_drf(self):
+        for value in (Decimal('NaN'), Decimal('Infinity'), Decimal('-Infinity')):
+            for data in (value, [None, {'total': value}]):
+                with self.subTest(data=data):
+                    with self.assertRaises(ValueError):
+                        JSONRenderer().render(data)
+                    with self.assertRaises(ValueError):
+                        FastJSONRenderer().render(data)
+
+    def test_non_finite_floats_render_as_null(self):
+        # The documented difference: DRF raises, orjson writes null
+        for value in (float('nan'), float('inf'), -float('inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'ratio': value})
+                self.assertEqual(FastJSONRenderer().render({'ratio': value}), b'{"ratio":null}')
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), parser_context={})
+
+    def test_parsed_data_matches_drf(self):
+        for body in (b'{"a": [1, 2.5, "x\\u2028"], "b": null, "c": true}', b'[]', '{"name": "Café"}'.encode()):
+            with self.subTest(body=body):
+                self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_invalid_bodies_are_refused_like_drf(self):
+        for body in (b'{"a": NaN}', b'{"a": Infinity}', b'{"a": ', b'\xff'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(JSONParser(), body)
+                with self.assertRaises(ParseError):
+                    self.parse(FastJSONParser(), body)
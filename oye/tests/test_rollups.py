@@ -0,0 +1,119 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from oye import rollups
+from oye.tests.helpers import seed_shop
+from oye.models import Sale, SalesDailyRollup
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=dt_timezone.utc)
+WINDOWS = {'shop-sales-for-day': 1, 'shop-sales-for-week': 7, 'shop-sales-for-month': 30, 'shop-sales-for-year': 365}
+
+
+def at(when):
+    return mock.patch('django.utils.timezone.now', return_value=when)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, self.items = seed_shop(items=2, sales=0)
+        self.kwargs = {'shop_id': self.shop.pk, 'user_id': self.owner.pk}
+
+    def sell(self, when, item=None, quantity=2, payment_method='cash'):
+        item = item or self.items[0]
+        with at(when):
+            return Sale.objects.create(
+                shop=self.shop, item=item, quantity=quantity, payment_method=payment_method,
+                total_price=item.selling_price * quantity, cost_price=item.cost_price * quantity,
+            )
+
+    def raw_totals(self, days):
+        sales = Sale.objects.filter(shop=self.shop, sold_at__gte=rollups.window_start(days))
+        totals = sales.aggregate(total_amount=Sum('total_price'), total_profit=Sum(F('total_price') - F('cost_price')))
+        return {name: value or 0 for name, value in totals.items()}
+
+    def assertWindowsMatchSales(self):
+        with at(NOW):
+            for name, days in WINDOWS.items():
+                with self.subTest(name):
+                    expected = self.raw_totals(days)
+                    self.assertEqual(rollups.window_totals(self.shop.pk, days), expected)
+                    data = self.client.get(reverse(name, kwargs=self.kwargs)).json()
+                    self.assertEqual(Decimal(str(data['total_amount'])), expected['total_amount'])
+                    self.assertEqual(Decimal(str(data['total_profit'])), expected['total_profit'])
+
+    def seed_sales(self):
+        return [
+            self.sell(datetime(2026, 3, 10, 9, 0, tzinfo=dt_timezone.utc)),
+            self.sell(datetime(2026, 3, 10, 11, 0, tzinfo=dt_timezone.utc), quantity=1, payment_method='card'),
+            self.sell(datetime(2026, 3, 6, 9, 0, tzinfo=dt_timezone.utc), item=self.items[1]),
+            self.sell(datetime(2026, 2, 20, 9, 0, tzinfo=dt_timezone.utc), quantity=5),
+            self.sell(datetime(2025, 6, 1, 9, 0, tzinfo=dt_timezone.utc), item=self.items[1], quantity=3),
+        ]
+
+    def test_record_sale_adds_to_one_row_per_day_item_and_payment_method(self):
+        self.sell(datetime(2026, 3, 10, 9, 0, tzinfo=dt_timezone.utc))
+        self.sell(datetime(2026, 3, 10, 11, 0, tzinfo=dt_timezone.utc), quantity=3)
+        rollup = SalesDailyRollup.objects.get(shop=self.shop)
+        self.assertEqual((rollup.date, rollup.quantity), (date(2026, 3, 10), 5))
+        self.assertEqual(rollup.revenue, self.items[0].selling_price * 5)
+        self.assertEqual(rollup.cost, self.items[0].cost_price * 5)
+
+        self.sell(datetime(2026, 3, 10, 12, 0, tzinfo=dt_timezone.utc), payment_method='card')
+        self.assertEqual(SalesDailyRollup.objects.filter(shop=self.shop).count(), 2)
+
+    def test_window_totals_match_the_sales_after_creates(self):
+        self.seed_sales()
+        self.assertWindowsMatchSales()
+
+    def test_window_totals_match_the_sales_after_a_delete(self):
+        sales = self.seed_sales()
+        sales[0].delete()
+        sales[3].delete()
+        self.assertWindowsMatchSales()
+        rollup = SalesDailyRollup.objects.get(shop=self.shop, date=date(2026, 2, 20))
+        self.assertEqual((rollup.quantity, rollup.revenue, rollup.cost), (0, 0, 0))
+
+    def test_window_totals_match_the_sales_after_a_rebuild(self):
+        self.seed_sales()
+        expected = list(SalesDailyRollup.objects.filter(shop=self.shop).values_list(
+            'date', 'item_id', 'payment_method', 'quantity', 'revenue', 'cost').order_by('date', 'item_id', 'payment_method'))
+        SalesDailyRollup.objects.filter(shop=self.shop).update(quantity=0, revenue=0, cost=0)
+
+        out = StringIO()
+        call_command('rebuild_sales_rollups', shop=str(self.shop.pk), stdout=out)
+        self.assertIn(f'Rebuilt {len(expected)} daily sales rollup rows.', out.getvalue())
+        rebuilt = list(SalesDailyRollup.objects.filter(shop=self.shop).values_list(
+            'date', 'item_id', 'payment_method', 'quantity', 'revenue', 'cost').order_by('date', 'item_id', 'payment_method'))
+        self.assertEqual(rebuilt, expected)
+        self.assertWindowsMatchSales()
+
+    def test_the_year_window_starts_at_midnight_364_days_ago(self):
+        self.sell(datetime(2025, 3, 11, 0, 0, tzinfo=dt_timezone.utc))
+        self.sell(datetime(2025, 3, 10, 23, 59, 59, tzinfo=dt_timezone.utc), quantity=7)
+        with at(NOW):
+            self.assertEqual(rollups.window_start(365), datetime(2025, 3, 11, tzinfo=dt_timezone.utc))
+            totals = rollups.window_totals(self.shop.pk, 365)
+        self.assertEqual(totals['total_amount'], self.items[0].selling_price * 2)
+        self.assertWindowsMatchSales()
+
+    @override_settings(TIME_ZONE='Africa/Lagos')
+    def test_days_are_split_in_the_project_time_zone(self):
+        # 23:30 UTC is already the next day in Lagos (UTC+1), 22:30 UTC is not
+        self.sell(datetime(2026, 3, 9, 23, 30, tzinfo=dt_timezone.utc))
+        self.sell(datetime(2026, 3, 9, 22, 30, tzinfo=dt_timezone.utc), quantity=3)
+        dates = dict(SalesDailyRollup.objects.filter(shop=self.shop).values_list('quantity', 'date'))
+        self.assertEqual(dates, {2: date(2026, 3, 10), 3: date(2026, 3, 9)})
+        with at(NOW):
+            self.assertEqual(rollups.window_totals(self.shop.pk, 1)['total_amount'], self.items[0].selling_price * 2)
+        self.assertWindowsMatchSales()
+
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        self.assertEqual(dict(SalesDailyRollup.objects.filter(shop=self.shop).values_list('quantity', 'date')), dates)
+        self.assertWindowsMatchSales()
@@ -0,0 +1,118 @@
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+
+from oye import stock
+from oye.tests.helpers import retry_locked, run_threads, seed_shop
+from oye.models import Item, Restock, Sale
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, (self.item, self.other) = seed_shop(items=2, sales=0)
+        Item.objects.filter(shop=self.shop).update(quantity=10)
+        self.item.refresh_from_db()
+        self.other.refresh_from_db()
+
+    def quantity(self, item):
+        return Item.objects.get(pk=item.pk).quantity
+
+    def test_sell_takes_the_stock_and_records_the_sale(self):
+        sale = stock.sell(self.shop, self.item, 4)
+        self.assertEqual(self.quantity(self.item), 6)
+        self.assertEqual(sale.quantity, 4)
+        self.assertEqual(sale.total_price, self.item.selling_price * 4)
+
+    def test_sell_refuses_more_than_is_in_stock(self):
+        with self.assertRaises(stock.InsufficientStock):
+            stock.sell(self.shop, self.item, 11)
+        self.assertEqual(self.quantity(self.item), 10)
+        self.assertFalse(Sale.objects.filter(item=self.item).exists())
+
+    def test_non_positive_quantities_are_rejected(self):
+        for quantity in (0, -3):
+            with self.assertRaises(ValueError):
+                stock.sell(self.shop, self.item, quantity)
+            with self.assertRaises(ValueError):
+                stock.restock(self.shop, self.item, quantity)
+        self.assertEqual(self.quantity(self.item), 10)
+
+    def test_restock_puts_the_stock_back(self):
+        restock = stock.restock(self.shop, self.item, 5)
+        self.assertEqual(self.quantity(self.item), 15)
+        self.assertEqual(restock.total_price, self.item.cost_price * 5)
+        self.assertEqual(Restock.objects.filter(item=self.item).count(), 1)
+
+    def test_basket_lines_of_the_same_item_are_merged(self):
+        sales = stock.sell_basket(self.shop, [(self.item.pk, 2), (self.other.pk, 1), (self.item.pk, 3)])
+        self.assertEqual(sorted(sale.quantity for sale in sales), [1, 5])
+        self.assertEqual(self.quantity(self.item), 5)
+        self.assertEqual(self.quantity(self.other), 9)
+
+    def test_basket_is_sold_whole_or_not_at_all(self):
+        with self.assertRaises(stock.InsufficientStock) as raised:
+            stock.sell_basket(self.shop, [(self.item.pk, 2), (self.other.pk, 11)])
+        self.assertEqual(raised.exception.items, [self.other.pk])
+        self.assertEqual(self.quantity(self.item), 10)
+        self.assertFalse(Sale.objects.filter(shop=self.shop).exists())
+
+    def test_basket_refuses_items_of_another_shop(self):
+        _, _, (foreign,) = seed_shop(items=1, sales=0)
+        with self.assertRaises(stock.UnknownItems) as raised:
+            stock.sell_basket(self.shop, [(self.item.pk, 1), (foreign.pk, 1)])
+        self.assertEqual(raised.exception.item_ids, [foreign.pk])
+        self.assertEqual(self.quantity(self.item), 10)
+
+
+class StockContentionTests(TransactionTestCase):
+    """Threads racing for the same stock must sell exactly what there is, never more."""
+    threads = 8
+    stock_level = 60
+
+    def setUp(self):
+        self.owner, self.shop, self.items = seed_shop(items=2, sales=0)
+        Item.objects.filter(shop=self.shop).update(quantity=self.stock_level)
+        for item in self.items:
+            item.refresh_from_db()
+
+    def race(self, buy):
+        def worker(index):
+            # Keep buying until the stock runs out
+            while True:
+                try:
+                    retry_locked(buy, attempts=500)
+                except stock.InsufficientStock:
+                    return
+
+        run_threads(worker, self.threads)
+
+    def assertSoldOut(self, sold_per_item):
+        for item in self.items:
+            quantity = Item.objects.get(pk=item.pk).quantity
+            sold = Sale.objects.filter(item=item).aggregate(total=Sum('quantity'))['total'] or 0
+            self.assertGreaterEqual(quantity, 0)
+            self.assertEqual(sold + quantity, self.stock_level)
+            self.assertEqual(sold, sold_per_item)
+
+    def test_concurrent_stock_takes_never_oversell(self):
+        # Outside a transaction, so only the UPDATE's own guard stands between the threads
+        item = self.items[0]
+        taken = []
+
+        def take():
+            stock.take_stock(item, 1)
+            taken.append(1)
+
+        self.race(take)
+        self.assertEqual(len(taken), self.stock_level)
+        self.assertEqual(Item.objects.get(pk=item.pk).quantity, 0)
+
+    def test_concurrent_sales_never_oversell(self):
+        item = self.items[0]
+        self.race(lambda: stock.sell(self.shop, item, 1))
+        self.items = [item]
+        self.assertSoldOut(self.stock_level)
+
+    def test_concurrent_baskets_never_oversell(self):
+        lines = [(item.pk, 2) for item in self.items]
+        self.race(lambda: stock.sell_basket(self.shop, lines))
+        self.assertSoldOut(self.stock_level)
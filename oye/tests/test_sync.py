@@ -0,0 +1,99 @@
+import uuid
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from oye import stock, sync
+from oye.tests.helpers import seed_shop
+from oye.models import Item, Restock, Sale
+
+
+class ChangesSinceTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, _ = seed_shop(items=5, sales=20, restocks=5)
+        # A past older than the sync overlap, as a shop's history would be
+        earlier = timezone.now() - timedelta(days=1)
+        Item.objects.filter(shop=self.shop).update(quantity=1000, updated_at=earlier)
+        Sale.objects.filter(shop=self.shop).update(sold_at=earlier)
+        Restock.objects.filter(shop=self.shop).update(restocked_at=earlier)
+        self.item = Item.objects.filter(shop=self.shop).first()
+
+    def resync(self, token):
+        return sync.changes_since(self.shop.pk, sync.decode_token(token))
+
+    def test_first_sync_returns_everything(self):
+        changes = sync.changes_since(self.shop.pk)
+        self.assertFalse(changes['has_more'])
+        self.assertEqual(
+            [len(changes[key]) for key in ('items', 'sales', 'restocks', 'deleted')], [5, 20, 5, 0]
+        )
+
+    def test_resync_returns_only_what_changed(self):
+        token = sync.changes_since(self.shop.pk)['token']
+        sale = stock.sell(self.shop, self.item, 1)
+        changes = self.resync(token)
+        self.assertEqual([row['id'] for row in changes['sales']], [str(sale.pk)])
+        self.assertEqual([row['id'] for row in changes['items']], [str(self.item.pk)])
+        self.assertEqual(changes['restocks'], [])
+
+    def test_deletes_come_back_as_tombstones(self):
+        token = sync.changes_since(self.shop.pk)['token']
+        item_id = self.item.pk
+        self.item.delete()
+        deleted = self.resync(token)['deleted']
+        self.assertIn({'model': 'item', 'object_id': str(item_id)},
+                      [{'model': row['model'], 'object_id': row['object_id']} for row in deleted])
+
+    def test_paging_by_token_sends_every_row(self):
+        seen, token = set(), None
+        for _ in range(20):
+            changes = sync.changes_since(self.shop.pk, token and sync.decode_token(token), limit=3)
+            seen.update(row['id'] for row in changes['sales'])
+            token = changes['token']
+            if not changes['has_more']:
+                break
+        self.assertFalse(changes['has_more'])
+        self.assertEqual(seen, {str(pk) for pk in Sale.objects.filter(shop=self.shop).values_list('pk', flat=True)})
+
+    def test_a_caught_up_token_resends_only_the_overlap(self):
+        token = sync.changes_since(self.shop.pk)['token']
+        changes = self.resync(token)
+        self.assertEqual([len(changes[key]) for key in ('items', 'sales', 'restocks', 'deleted')], [0, 0, 0, 0])
+
+    def test_a_bad_token_is_rejected(self):
+        url = reverse('shop-sync', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+        for token in ('nonsense', sync.encode_token({})[:-2] + '!!'):
+            with self.subTest(token):
+                response = self.client.get(url, {'since': token})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('since', response.json())
+
+
+class UploadSalesTests(TestCase):
+    def setUp(self):
+        self.owner, self.shop, _ = seed_shop(items=1, sales=0)
+        self.item = Item.objects.get(shop=self.shop)
+        Item.objects.filter(pk=self.item.pk).update(quantity=3)
+        self.url = reverse('shop-sync-sales', kwargs={'shop_id': self.shop.pk, 'user_id': self.owner.pk})
+
+    def upload(self, lines):
+        response = self.client.post(self.url, {'sales': lines}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [result['status'] for result in response.json()['results']]
+
+    def line(self, quantity=1, item_id=None):
+        return {'client_id': str(uuid.uuid4()), 'item_id': str(item_id or self.item.pk), 'quantity': quantity}
+
+    def test_a_retried_upload_sells_nothing_twice(self):
+        lines = [self.line(), self.line()]
+        self.assertEqual(self.upload(lines), ['created', 'created'])
+        self.assertEqual(self.upload(lines + [self.line()]), ['duplicate', 'duplicate', 'created'])
+        self.assertEqual(Sale.objects.filter(shop=self.shop).count(), 3)
+        self.assertEqual(Item.objects.get(pk=self.item.pk).quantity, 0)
+
+    def test_lines_that_cannot_be_sold_are_rejected_alone(self):
+        statuses = self.upload([self.line(quantity=5), self.line(item_id=uuid.uuid4()), self.line(quantity=2)])
+        self.assertEqual(statuses, ['rejected', 'rejected', 'created'])
+        self.assertEqual(Item.objects.get(pk=self.item.pk).quantity, 1)
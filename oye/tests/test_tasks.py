@@ -0,0 +1,104 @@
+import re
+from datetime import timedelta
+
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from oye import tasks
+from oye.tests.helpers import seed_shop
+from oye.models import Task, User
+
+failures_left = {}
+
+
+@tasks.task(name='oye.tests.flaky', max_attempts=3)
+def flaky(key):
+    if failures_left.get(key, 0) > 0:
+        failures_left[key] -= 1
+        raise RuntimeError(f"{key} failed")
+
+
+class TaskQueueTests(TestCase):
+    def make_due(self):
+        Task.objects.filter(status=Task.PENDING).update(run_at=timezone.now())
+
+    def test_only_registered_tasks_are_queued(self):
+        with self.assertRaises(ValueError):
+            tasks.enqueue(print, value=1)
+
+    def test_a_task_is_queued_only_if_its_transaction_commits(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            tasks.enqueue(flaky, key='rolled back')
+            raise RuntimeError
+        self.assertEqual(tasks.run_pending_tasks(), 0)
+
+    def test_a_failing_task_is_retried_with_backoff(self):
+        failures_left['twice'] = 2
+        queued = tasks.enqueue(flaky, key='twice')
+        before = timezone.now()
+        self.assertEqual(tasks.run_pending_tasks(), 1)
+        row = Task.objects.get(pk=queued.pk)
+        self.assertEqual((row.status, row.attempts, row.kwargs), (Task.PENDING, 1, {'key': 'twice'}))
+        self.assertGreaterEqual(row.run_at, before + timedelta(seconds=tasks.BACKOFF_BASE / 2))
+        self.assertIn('twice failed', row.last_error)
+        # Not due yet
+        self.assertEqual(tasks.run_pending_tasks(), 0)
+        for _ in range(2):
+            self.make_due()
+            tasks.run_pending_tasks()
+        row = Task.objects.get(pk=queued.pk)
+        self.assertEqual((row.status, row.attempts, row.last_error), (Task.DONE, 3, ''))
+
+    def test_a_task_out_of_attempts_fails_for_good_and_forgets_its_arguments(self):
+        failures_left['always'] = 10
+        queued = tasks.enqueue(flaky, key='always')
+        for _ in range(3):
+            self.make_due()
+            tasks.run_pending_tasks()
+        row = Task.objects.get(pk=queued.pk)
+        self.assertEqual((row.status, row.attempts, row.kwargs), (Task.FAILED, 3, {}))
+        self.assertIn('always failed', row.last_error)
+
+    def test_a_task_whose_worker_died_runs_again_after_its_lock(self):
+        queued = tasks.enqueue(flaky, key='lost')
+        self.assertEqual(tasks.claim(10, 'dead-worker'), [queued.pk])
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.filter(pk=queued.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.claim(10, 'new-worker'), [queued.pk])
+        row = tasks.run_task(queued.pk)
+        self.assertEqual((row.status, row.attempts, row.worker, row.kwargs), (Task.DONE, 2, 'new-worker', {}))
+
+    def test_a_task_that_keeps_losing_its_worker_fails(self):
+        queued = tasks.enqueue(flaky, key='cursed')
+        Task.objects.filter(pk=queued.pk).update(
+            status=Task.RUNNING, attempts=3, locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(tasks.claim(10), [])
+        row = Task.objects.get(pk=queued.pk)
+        self.assertEqual((row.status, row.kwargs), (Task.FAILED, {}))
+
+
+class PasswordResetEmailTests(TestCase):
+    def setUp(self):
+        self.owner, _, _ = seed_shop(items=0, sales=0)
+
+    def test_the_reset_link_is_made_by_the_worker_and_works(self):
+        response = self.client.post(reverse('password_reset_request'), {'email': self.owner.email},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Task.objects.values_list('kwargs', flat=True)), [{'user_id': str(self.owner.pk)}])
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(tasks.run_pending_tasks(), 1)
+        self.assertEqual(list(Task.objects.values_list('status', 'kwargs')), [(Task.DONE, {})])
+        [message] = mail.outbox
+        self.assertEqual(message.to, [self.owner.email])
+        reset_path = re.search(r'http://[^/]+(/reset-password/\S+/)', message.body).group(1)
+
+        response = self.client.post(reset_path, {'new_password': 'a-new-password', 'confirm_password': 'a-new-password'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(User.objects.get(pk=self.owner.pk).check_password('a-new-password'))
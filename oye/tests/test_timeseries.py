@@ -0,0 +1,55 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from oye.tests.helpers import seed_shop
+
+
+def at(hour, minute=0):
+    return mock.patch('django.utils.timezone.now', return_value=datetime(2026, 3, 10, hour, minute, tzinfo=dt_timezone.utc))
+
+
+class SalesSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner, self.shop, _ = seed_shop(items=3, sales=30)
+        self.kwargs = {'shop_id': self.shop.pk, 'user_id': self.owner.pk}
+        self.url = reverse('shop-sales-series', kwargs=self.kwargs)
+
+    def test_default_window_runs_through_the_current_bucket(self):
+        with at(10, 15):
+            data = self.client.get(self.url, {'bucket': 'hour'}).json()
+        self.assertEqual(data['to'], '2026-03-10T11:00:00+00:00')
+        self.assertEqual(data['from'], '2026-02-09T00:00:00+00:00')
+        self.assertEqual(data['series'][-1]['start'], '2026-03-10T10:00:00+00:00')
+
+    def test_a_cached_response_is_replayed_only_within_its_window(self):
+        with at(10, 15):
+            response = self.client.get(self.url, {'bucket': 'hour'})
+        etag = response['ETag']
+        with at(10, 45):
+            self.assertEqual(self.client.get(self.url, {'bucket': 'hour'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with at(11, 5):
+            response = self.client.get(self.url, {'bucket': 'hour'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['to'], '2026-03-10T12:00:00+00:00')
+
+    def test_a_time_zone_change_invalidates_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.shop.timezone = 'Africa/Lagos'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['timezone'], 'Africa/Lagos')
+
+    def test_fixed_windows_are_deprecated_for_the_series(self):
+        for name in ('shop-sales-for-day', 'shop-sales-for-year', 'async-shop-sales-for-week'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, kwargs=self.kwargs))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['Deprecation'].startswith('@'))
+                self.assertEqual(response['Link'], f'<http://testserver{self.url}>; rel="successor-version"')
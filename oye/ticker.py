@@ -0,0 +1,67 @@
+"""
+Live sales ticker.
+
+Every committed sale is published to its shop's channel together with the
+shop's running totals for today, in the same shape as the day view. The event
+is rendered once per write, so a sale costs one totals query however many
+dashboards are watching, and nothing at all when nobody is.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from . import rollups
+from .pubsub import get_broker
+from .renderers import FastJSONRenderer
+from .serializers import SaleSerializer
+
+HEARTBEAT_SECONDS = 15
+
+_renderer = FastJSONRenderer()
+
+
+def sales_channel(shop_id):
+    return f'oye:sales:{shop_id}'
+
+
+def render_event(event, data):
+    return b'event: ' + event.encode() + b'\ndata: ' + _renderer.render(data) + b'\n\n'
+
+
+def day_totals(shop_id):
+    totals = rollups.window_totals(shop_id, 1)
+    return {'total_amount': totals['total_amount'], 'total_profit': totals['total_profit']}
+
+
+def publish_sales(shop_id, sales):
+    """Push committed sales of one shop to its watchers."""
+    broker = get_broker()
+    channel = sales_channel(shop_id)
+    if not broker.has_subscribers(channel):
+        return 0
+    data = day_totals(shop_id)
+    data['sales'] = SaleSerializer(sales, many=True).data
+    return broker.publish(channel, render_event('sales', data))
+
+
+def publish_sales_on_commit(shop_id, sales):
+    """Push the sales once the current transaction commits."""
+    def publish():
+        publish_sales(shop_id, sales)
+
+    # robust: a failed push must not turn a committed sale into an error. A
+    # named function rather than a partial, as Django logs failures by __qualname__.
+    transaction.on_commit(publish, robust=True)
+
+
+async def sales_events(shop_id):
+    """Server-sent events for a shop: today's totals, then every new sale as it commits."""
+    async with get_broker().subscribe(sales_channel(shop_id)) as subscription:
+        # Subscribed before reading the totals, so no sale can fall in between
+        yield render_event('totals', await sync_to_async(day_totals)(shop_id))
+        while True:
+            try:
+                yield await asyncio.wait_for(anext(subscription), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b': keep-alive\n\n'
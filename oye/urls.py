@@ -1,13 +1,20 @@
 from django.urls import path 
-from .views import (UserRegistrationView, login, PasswordResetRequestView, PasswordResetView, ShopUpdateView, SaleCreateView, 
+from .views import (UserRegistrationView, login, logout, PasswordResetRequestView, PasswordResetView, ShopUpdateView, SaleCreateView, 
                     ShopItemDetailView, ShopItemsByCategoryView, InventoryAnalysisView, chatbot_view, add_new_product_view,
                     ShopSalesListView, ShopSalesForDayView, ShopSalesForWeekView, ShopSalesForMonthView, ShopSalesForYearView,
                     ItemCreateView, ShopListView, UserShopsListView, ShopItemsListView, RestockCreateView, ShopRestocksListView,
-                    RegisterShopView, UserAccountUpdateView, UserListView, UserDetailView, UserProfileDetailView)
+                    RegisterShopView, UserAccountUpdateView, UserListView, UserDetailView, UserProfileDetailView,
+                    BasketCheckoutView, ItemImportView, ShopLowStockListView, StockAlertFeedView, ShopChangesView,
+                    OfflineSalesUploadView, ShopSalesSeriesView, CatalogAnalysisView,
+                    ShopReorderSuggestionsView,
+                    sales_ticker_view, async_shop_items_list, async_shop_sales_list, async_shop_sales_for_day,
+                    async_shop_sales_for_week, async_shop_sales_for_month, async_shop_sales_for_year,
+                    async_inventory_analysis)
 
 urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='user-registration'),
     path('login/', login, name='login'),
+    path('logout/', logout, name='logout'),
     path('password_reset/', PasswordResetRequestView.as_view(), name='password_reset_request'),
     path('reset-password/<uidb64>/<token>/', PasswordResetView.as_view(), name='password_reset'),
     path('account/update/', UserAccountUpdateView.as_view(), name='user-account-update'),
@@ -19,20 +26,39 @@ urlpatterns = [
     path('shops/update/<uuid:pk>/', ShopUpdateView.as_view(), name='update-shop'),
     path('shops/update/<uuid:pk>/<uuid:user_id>/', ShopUpdateView.as_view(), name='update-shop'),
     path('items/create/<uuid:shop_id>/<uuid:user_id>/', ItemCreateView.as_view(), name='create-item'),
+    path('items/import/<uuid:shop_id>/<uuid:user_id>/', ItemImportView.as_view(), name='import-items'),
     path('shops/<uuid:shop_id>/item/<uuid:user_id>/<uuid:item_id>/', ShopItemDetailView.as_view(), name='shop-item-detail'),
     path('shops/', ShopListView.as_view(), name='shop-list'),
     path('shops/<uuid:shop_id>/items/<uuid:user_id>/', ShopItemsListView.as_view(), name='shop-items-list'),
     path('shops/<uuid:shop_id>/restock/<uuid:user_id>/<uuid:item_id>/', RestockCreateView.as_view(), name='restock-create'),
     path('shops/<uuid:shop_id>/restocks/<uuid:user_id>/', ShopRestocksListView.as_view(), name='shop-restocks-list'),
     path('shops/<uuid:shop_id>/sales/<uuid:user_id>/<uuid:item_id>/', SaleCreateView.as_view(), name='sale-create'),
+    path('shops/<uuid:shop_id>/basket/<uuid:user_id>/', BasketCheckoutView.as_view(), name='basket-checkout'),
     path('shops/<uuid:shop_id>/sales/<uuid:user_id>/', ShopSalesListView.as_view(), name='shop-sales-list'),
+    path('shops/<uuid:shop_id>/sales/live/<uuid:user_id>/', sales_ticker_view, name='shop-sales-live'),
     path('shops/<uuid:shop_id>/sales/day/<uuid:user_id>/', ShopSalesForDayView.as_view(), name='shop-sales-for-day'),
     path('shops/<uuid:shop_id>/sales/week/<uuid:user_id>/', ShopSalesForWeekView.as_view(), name='shop-sales-for-week'),
     path('shops/<uuid:shop_id>/sales/month/<uuid:user_id>/', ShopSalesForMonthView.as_view(), name='shop-sales-for-month'),
     path('shops/<uuid:shop_id>/sales/year/<uuid:user_id>/', ShopSalesForYearView.as_view(), name='shop-sales-for-year'),
+    path('shops/<uuid:shop_id>/sales/series/<uuid:user_id>/', ShopSalesSeriesView.as_view(), name='shop-sales-series'),
     path('shops/<uuid:shop_id>/items/<uuid:user_id>/categories/', ShopItemsByCategoryView.as_view(), name='shop-items-by-category'),
+    path('shops/<uuid:shop_id>/items/<uuid:user_id>/low-stock/', ShopLowStockListView.as_view(), name='shop-low-stock'),
+    path('shops/<uuid:shop_id>/items/<uuid:user_id>/reorder/', ShopReorderSuggestionsView.as_view(), name='shop-reorder-suggestions'),
+    path('shops/<uuid:shop_id>/alerts/<uuid:user_id>/', StockAlertFeedView.as_view(), name='shop-stock-alerts'),
+    path('shops/<uuid:shop_id>/sync/<uuid:user_id>/', ShopChangesView.as_view(), name='shop-sync'),
+    path('shops/<uuid:shop_id>/sync/<uuid:user_id>/sales/', OfflineSalesUploadView.as_view(), name='shop-sync-sales'),
     path('shops/<uuid:shop_id>/inventory-analysis/<uuid:user_id>/', InventoryAnalysisView.as_view(), name='inventory-analysis'),
+    path('shops/<uuid:shop_id>/catalog-analysis/<uuid:user_id>/', CatalogAnalysisView.as_view(), name='catalog-analysis'),
     path('chatbot/<uuid:shop_id>/<uuid:item_id>/<uuid:user_id>/', chatbot_view, name='chatbot_with_item'),
     path('chatbot/<uuid:shop_id>/<uuid:user_id>/', chatbot_view, name='chatbot'),
     path('new/<uuid:shop_id>/<uuid:user_id>/', add_new_product_view, name='add_new_product'),
-]
\ No newline at end of file
+
+    # Async read endpoints, same responses as above (serve with inventory.asgi)
+    path('async/shops/<uuid:shop_id>/items/<uuid:user_id>/', async_shop_items_list, name='async-shop-items-list'),
+    path('async/shops/<uuid:shop_id>/sales/<uuid:user_id>/', async_shop_sales_list, name='async-shop-sales-list'),
+    path('async/shops/<uuid:shop_id>/sales/day/<uuid:user_id>/', async_shop_sales_for_day, name='async-shop-sales-for-day'),
+    path('async/shops/<uuid:shop_id>/sales/week/<uuid:user_id>/', async_shop_sales_for_week, name='async-shop-sales-for-week'),
+    path('async/shops/<uuid:shop_id>/sales/month/<uuid:user_id>/', async_shop_sales_for_month, name='async-shop-sales-for-month'),
+    path('async/shops/<uuid:shop_id>/sales/year/<uuid:user_id>/', async_shop_sales_for_year, name='async-shop-sales-for-year'),
+    path('async/shops/<uuid:shop_id>/inventory-analysis/<uuid:user_id>/', async_inventory_analysis, name='async-inventory-analysis'),
+]
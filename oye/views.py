@@ -1,45 +1,74 @@
-from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.decorators import api_view
-from rest_framework import generics    
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import generics
-from django.shortcuts import get_object_or_404
-from datetime import datetime, timedelta
-from django.db.models import Sum
-from django.db.models import Sum, F, ExpressionWrapper, DecimalField
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError
+from rest_framework.request import Request
+from django.db.models import F, Count, Window
+from django.db.models.functions import RowNumber
 from django.views.decorators.csrf import csrf_exempt
-import re
+from django.views.decorators.http import condition
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from rest_framework.parsers import MultiPartParser
+from django.db import transaction
+import io
+import time
+import os
 import json
-from django.http import JsonResponse
-
-
-
+import zoneinfo
+from functools import wraps
+from itertools import groupby
+from operator import itemgetter
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import urlsafe_base64_decode
 
 from .serializers import (UserRegistrationSerializer, ShopSerializer, UserListSerializer, ItemSerializer,
                           RestockSerializer, SaleSerializer, InventoryAnalysisSerializer,
-                          PasswordResetSerializer, UserAccountUpdateSerializer, UserProfileSerializer)
-
-from .models import User, Shop, UserProfile, Item, Restock, Sale
-
-
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import force_bytes
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_decode
+                          PasswordResetSerializer, UserAccountUpdateSerializer, UserProfileSerializer,
+                          BasketSerializer, StockAlertSerializer, OfflineSalesUploadSerializer,
+                          SalesSeriesPointSerializer, SalesSeriesTotalsSerializer,
+                          CatalogAnalysisSummarySerializer, CatalogAnalysisItemSerializer,
+                          ReorderSuggestionSerializer)
+
+from .models import User, Shop, UserProfile, Item, Restock, Sale, StockAlert, ReorderSuggestion
+from . import abc_analysis, chatbot, rollups, stock, sync, ticker, timeseries
+from .alerts import MAX_WAIT, POLL_INTERVAL, alerts_version, stream_alerts, wait_for_alerts
+from .catalog import catalog_etag, dated_catalog_etag, window_etag
+from .analysis import ainventory_analysis, inventory_analysis
+from .authentication import TokenAuthentication, issue_token, revoke_token, revoke_user_tokens
+from .exports import EXPORT_FORMATS, stream_sales
+from .importers import IMPORT_FORMATS, import_items, read_rows
+from .pagination import SaleCursorPagination, StockAlertFeedPagination
+from .readers import FastListMixin, item_reader, reorder_reader, restock_reader, sale_reader
+from .renderers import FastJSONRenderer
+from .jobs import send_password_reset
+from .tasks import enqueue
+from .permissions import ShopOwnerMixin, acheck_shop_owner, check_shop_owner
 from .utils import password_reset_token
-from django.contrib.auth import get_user_model
-from django.template.loader import render_to_string
-from django.core.mail import EmailMessage
-from rest_framework.decorators import api_view
-from rest_framework.generics import ListAPIView
-from rest_framework import viewsets
-from django.core.mail import send_mail
+
+def get_int_param(request, name, default=None):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise ValidationError({name: 'Must be a whole number of at least 0.'})
+    return value
 
 
 class UserRegistrationView(APIView):
+    # Public: a stale token sent along must not turn the request into a 401
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
     def post(self, request, *args, **kwargs):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
@@ -57,15 +86,18 @@ class UserRegistrationView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
 def login(request):
     username = request.data.get('username')
     password = request.data.get('password')
 
     user = User.objects.filter(username=username).first()
 
-    if user and user.check_password(password):
+    if user and user.is_active and user.check_password(password):
         return Response(
             {'message': 'Login successful', 
+             'token': issue_token(user),
              'user_id': user.id, 
              'username': username, 
              'first_name': user.first_name,
@@ -75,21 +107,37 @@ def login(request):
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    if request.data.get('all'):
+        revoke_user_tokens(request.user.pk)
+    else:
+        revoke_token(request.auth)
+    return Response({'message': 'Logged out'}, status=status.HTTP_200_OK)
+
+
 class UserAccountUpdateView(generics.RetrieveUpdateAPIView):
     queryset = User.objects.all()
     serializer_class = UserAccountUpdateSerializer
 
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
     def get_object(self):
-        user_id = self.kwargs.get('pk')
-        user = User.objects.get(pk=user_id)
-        if user != self.request.user:
+        user_id = self.kwargs.get('pk', self.request.user.pk)
+        if str(user_id) != str(self.request.user.pk):
             raise PermissionDenied("You do not have permission to update this user.")
-        return user
+        return self.request.user
 
     def patch(self, request, *args, **kwargs):
         return self.partial_update(request, *args, **kwargs)
 
 class PasswordResetRequestView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
     def post(self, request):
         email = request.data.get('email')
 
@@ -98,29 +146,22 @@ class PasswordResetRequestView(APIView):
         except User.DoesNotExist:
             return Response({'error': 'User with this email does not exist.'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Generate password reset token
-        token = password_reset_token.make_token(user)
-
-        # Build password reset URL
-        uid = urlsafe_base64_encode(force_bytes(user.pk))
-        reset_url = f'http://127.0.0.1:8000/reset-password/{uid}/{token}/'
-
-        # Send password reset email
-        subject = 'Password Reset Request'
-        message = f'Hi {user.email},\n\nPlease click the following link to reset your password:\n{reset_url}'
-        send_mail(subject, message, 'richmond.kessie@kintampo-hrc.org', [email])
+        # Send password reset email, from a task worker: the SMTP round trip can take seconds
+        enqueue(send_password_reset, user_id=str(user.pk))
 
         return Response({'message': 'Password reset email has been sent.'}, status=status.HTTP_200_OK)
 
 
 class PasswordResetView(APIView):
     serializer_class = PasswordResetSerializer  # Define the serializer class
+    authentication_classes = []
+    permission_classes = [AllowAny]
 
     def post(self, request, uidb64, token):
         try:
             uid = urlsafe_base64_decode(uidb64).decode()
             user = User.objects.get(pk=uid)
-        except (TypeError, ValueError, OverflowError, Register.DoesNotExist):
+        except (TypeError, ValueError, OverflowError, User.DoesNotExist):
             user = None
         
         if user is not None and password_reset_token.check_token(user, token):
@@ -128,6 +169,7 @@ class PasswordResetView(APIView):
             if serializer.is_valid():
                 user.set_password(serializer.validated_data['new_password'])
                 user.save()
+                revoke_user_tokens(user.pk)
                 return Response({'message': 'Password has been reset'}, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
@@ -152,14 +194,11 @@ class ShopUpdateView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         shop_id = self.kwargs.get('pk')
         user_id = self.kwargs.get('user_id')
-        shop = Shop.objects.get(pk=shop_id)
-        user = User.objects.get(pk=user_id)
-        if shop.owner != user:
-            raise PermissionDenied("You do not have permission to update this shop.")
-        return shop
+        check_shop_owner(shop_id, user_id, "You do not have permission to update this shop.")
+        return Shop.objects.select_related('owner').get(pk=shop_id)
     
 class ShopListView(generics.ListAPIView):
-    queryset = Shop.objects.all()
+    queryset = Shop.objects.select_related('owner')
     serializer_class = ShopSerializer
 
 
@@ -181,7 +220,7 @@ class UserShopsListView(generics.ListAPIView):
 
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
-        return Shop.objects.filter(owner_id=user_id)
+        return Shop.objects.filter(owner_id=user_id).select_related('owner')
 
 class UserProfileDetailView(generics.RetrieveAPIView):
     queryset = UserProfile.objects.all()
@@ -189,550 +228,562 @@ class UserProfileDetailView(generics.RetrieveAPIView):
     lookup_field = 'user_id'
 
 
-class ItemCreateView(generics.CreateAPIView):
+class ItemCreateView(ShopOwnerMixin, generics.CreateAPIView):
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
+    permission_denied_message = "You do not have permission to add items to this shop."
 
     def perform_create(self, serializer):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
+        serializer.save(shop_id=self.shop_id)
+    
+class ItemImportView(ShopOwnerMixin, APIView):
+    """Bulk-create (or with upsert=true, update) a shop's items from an uploaded CSV or JSONL file."""
+    parser_classes = [MultiPartParser]
+    permission_denied_message = "You do not have permission to add items to this shop."
 
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise PermissionDenied("User does not exist.")
+    def post(self, request, shop_id, user_id):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
+        file_format = request.data.get('format') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            return Response({'error': f'Unsupported import format: {file_format}'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if shop.owner != user:
-            raise PermissionDenied("You do not have permission to add items to this shop.")
+        upsert = str(request.data.get('upsert', '')).lower() in ('1', 'true', 'yes')
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        report = import_items(self.get_shop(), read_rows(stream, file_format), upsert=upsert)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
 
-        serializer.save(shop=shop)
-    
-class ShopItemsListView(generics.ListAPIView):
+
+@method_decorator(condition(etag_func=catalog_etag), name='get')
+class ShopItemsListView(ShopOwnerMixin, FastListMixin, generics.ListAPIView):
     serializer_class = ItemSerializer
+    fast_serializer = item_reader
+    permission_denied_message = "You do not have permission to view items for this shop."
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        # Debugging statements
-        print(f"Shop owner ID: {shop.owner.id} (type: {type(shop.owner.id)})")
-        print(f"User ID from URL: {user_id} (type: {type(user_id)})")
-
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view items for this shop.")
-
-        return Item.objects.filter(shop=shop)
+        return Item.objects.filter(shop_id=self.shop_id)
     
-class ShopItemDetailView(generics.RetrieveAPIView):
+class ShopItemDetailView(ShopOwnerMixin, generics.RetrieveAPIView):
     serializer_class = ItemSerializer
-    lookup_field = 'item_id'
+    lookup_field = 'id'
+    lookup_url_kwarg = 'item_id'
+    permission_denied_message = "You do not have permission to view items for this shop."
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view items for this shop.")
-
-        return Item.objects.filter(shop=shop)
+        return Item.objects.filter(shop_id=self.shop_id)
     
     
     
-class RestockCreateView(generics.CreateAPIView):
+class RestockCreateView(ShopOwnerMixin, generics.CreateAPIView):
     queryset = Restock.objects.all()
     serializer_class = RestockSerializer
+    permission_denied_message = "You do not have permission to restock items for this shop."
 
     def perform_create(self, serializer):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
         item_id = self.kwargs.get('item_id')
 
         try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise PermissionDenied("User does not exist.")
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        if shop.owner != user:
-            raise PermissionDenied("You do not have permission to restock items for this shop.")
-
-        try:
-            item = Item.objects.get(id=item_id, shop=shop)
+            item = Item.objects.get(id=item_id, shop_id=self.shop_id)
         except Item.DoesNotExist:
             raise PermissionDenied("Item does not exist or does not belong to this shop.")
 
-        quantity = self.request.data.get('quantity')
-        item.quantity += int(quantity)
-        item.save()
+        quantity = serializer.validated_data['quantity']
+        if quantity <= 0:
+            raise ValidationError("Quantity must be a positive number.")
 
         total_price = self.request.data.get('total_price')
-        serializer.save(shop=shop, item=item, total_price=total_price)
+        with transaction.atomic():
+            stock.put_stock(item, quantity)
+            item.refresh_from_db(fields=['quantity', 'updated_at'])
+            serializer.save(shop_id=self.shop_id, item=item, total_price=total_price)
         
         
-class ShopRestocksListView(generics.ListAPIView):
+@method_decorator(condition(etag_func=catalog_etag), name='get')
+class ShopRestocksListView(ShopOwnerMixin, FastListMixin, generics.ListAPIView):
     serializer_class = RestockSerializer
+    fast_serializer = restock_reader
+    permission_denied_message = "You do not have permission to view restocks for this shop."
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view restocks for this shop.")
-
-        return Restock.objects.filter(shop=shop)
+        return Restock.objects.filter(shop_id=self.shop_id).select_related('item')
     
     
-class SaleCreateView(generics.CreateAPIView):
+class SaleCreateView(ShopOwnerMixin, generics.CreateAPIView):
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
+    permission_denied_message = "You do not have permission to sell items for this shop."
 
     def perform_create(self, serializer):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
         item_id = self.kwargs.get('item_id')
 
-        # Debugging statements
-        print(f"user_id: {user_id}")
-        print(f"shop_id: {shop_id}")
-        print(f"item_id: {item_id}")
-
         try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise PermissionDenied("User does not exist.")
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        if shop.owner != user:
-            raise PermissionDenied("You do not have permission to sell items for this shop.")
-
-        try:
-            item = Item.objects.get(id=item_id, shop=shop)
+            item = Item.objects.get(id=item_id, shop_id=self.shop_id)
         except Item.DoesNotExist:
             raise PermissionDenied("Item does not exist or does not belong to this shop.")
 
-        # Debugging statement
-        print(f"Item: {item}")
+        quantity = serializer.validated_data['quantity']
+        if quantity <= 0:
+            raise ValidationError("Quantity must be a positive number.")
 
-        quantity = self.request.data.get('quantity')
-        if item.quantity < int(quantity):
+        try:
+            with transaction.atomic():
+                stock.take_stock(item, quantity)
+                serializer.save(
+                    shop_id=self.shop_id,
+                    item=item,
+                    total_price=item.selling_price * quantity,
+                    cost_price=item.cost_price * quantity,
+                )
+        except stock.InsufficientStock:
             raise PermissionDenied("Not enough items in stock.")
-
-        total_price = item.selling_price * int(quantity)
-
-        # Update the item's quantity
-        item.quantity -= int(quantity)
-        item.save()
-
-        serializer.save(shop=shop, item=item, total_price=total_price)
         
 
-class ShopSalesListView(generics.ListAPIView):
-    serializer_class = SaleSerializer
+class BasketCheckoutView(ShopOwnerMixin, APIView):
+    """Sell a whole basket of items in one request and one transaction."""
+    permission_denied_message = "You do not have permission to sell items for this shop."
 
-    def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
+    def post(self, request, shop_id, user_id):
+        serializer = BasketSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        basket = serializer.validated_data
         try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
+            sales = stock.sell_basket(
+                self.get_shop(),
+                [(line['item_id'], line['quantity']) for line in basket['lines']],
+                payment_method=basket['payment_method'],
+                customer=basket.get('customer'),
+            )
+        except stock.UnknownItems as e:
+            return Response({'error': str(e), 'items': e.item_ids}, status=status.HTTP_400_BAD_REQUEST)
+        except stock.InsufficientStock as e:
+            return Response({'error': str(e), 'items': e.items}, status=status.HTTP_400_BAD_REQUEST)
 
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view sales for this shop.")
+        return Response({
+            'total_amount': sum(sale.total_price for sale in sales),
+            'sales': SaleSerializer(sales, many=True).data,
+        }, status=status.HTTP_201_CREATED)
 
-        return Sale.objects.filter(shop=shop)
 
-class ShopSalesForDayView(generics.ListAPIView):
+@method_decorator(condition(etag_func=catalog_etag), name='get')
+class ShopSalesListView(ShopOwnerMixin, FastListMixin, generics.ListAPIView):
     serializer_class = SaleSerializer
+    fast_serializer = sale_reader
+    pagination_class = SaleCursorPagination
+    permission_denied_message = "You do not have permission to view sales for this shop."
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view sales for this shop.")
-
-        # Calculate the datetime for 24 hours ago
-        last_24_hours = datetime.now() - timedelta(days=1)
-
-        return Sale.objects.filter(shop=shop, sold_at__gte=last_24_hours)
+        return Sale.objects.filter(shop_id=self.shop_id)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        total_amount = queryset.aggregate(Sum('total_price'))['total_price__sum'] or 0
-        total_profit = queryset.aggregate(
-            total_profit=Sum(ExpressionWrapper(F('total_price') - F('cost_price'), output_field=DecimalField()))
-        )['total_profit'] or 0
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'total_amount': total_amount,
-            'total_profit': total_profit,
-            'sales': serializer.data
-        })
+        # ?export=ndjson|csv streams the full history instead of a page of it
+        export_format = request.query_params.get('export')
+        if export_format is None:
+            return super().list(request, *args, **kwargs)
 
-    
-class ShopSalesForWeekView(generics.ListAPIView):
-    serializer_class = SaleSerializer
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': f'Unsupported export format: {export_format}'}, status=status.HTTP_400_BAD_REQUEST)
 
-    def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
+        queryset = self.get_queryset().order_by(*self.pagination_class.ordering)
+        return stream_sales(queryset, export_format, filename=f"sales-{self.shop_id}")
 
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
+# The fixed windows are superseded by ShopSalesSeriesView (as of 2026-10-18)
+SALES_WINDOWS_DEPRECATION = '@1792281600'
 
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view sales for this shop.")
 
-        # Calculate the datetime for 7 days ago
-        last_7_days = datetime.now() - timedelta(days=7)
+def deprecated_for_series(response, request):
+    """Mark a fixed-window sales response as deprecated and point clients at the sales series."""
+    series_url = request.build_absolute_uri(reverse('shop-sales-series', kwargs=request.resolver_match.kwargs))
+    response['Deprecation'] = SALES_WINDOWS_DEPRECATION
+    response['Link'] = f'<{series_url}>; rel="successor-version"'
+    return response
 
-        return Sale.objects.filter(shop=shop, sold_at__gte=last_7_days)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        total_amount = queryset.aggregate(Sum('total_price'))['total_price__sum'] or 0
-        total_profit = queryset.aggregate(
-            total_profit=Sum(ExpressionWrapper(F('total_price') - F('cost_price'), output_field=DecimalField()))
-        )['total_profit'] or 0
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'total_amount': total_amount,
-            'total_profit': total_profit,
-            'sales': serializer.data 
-        })
-        
-    
-class ShopSalesForMonthView(generics.ListAPIView):
+@method_decorator(condition(etag_func=dated_catalog_etag), name='get')
+class ShopSalesWindowView(ShopOwnerMixin, generics.ListAPIView):
+    """
+    Sales of the last `window_days` calendar days, with totals read from the
+    daily rollups. Deprecated: ShopSalesSeriesView charts any window in the
+    shop's time zone.
+    """
     serializer_class = SaleSerializer
+    pagination_class = SaleCursorPagination
+    permission_denied_message = "You do not have permission to view sales for this shop."
+    window_days = 1
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
+        return Sale.objects.filter(shop_id=self.shop_id, sold_at__gte=rollups.window_start(self.window_days))
 
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
+    def list(self, request, *args, **kwargs):
+        queryset = sale_reader.values(self.get_queryset())
+        totals = rollups.window_totals(self.shop_id, self.window_days)
+        page = self.paginate_queryset(queryset)
+        return deprecated_for_series(Response({
+            'total_amount': totals['total_amount'],
+            'total_profit': totals['total_profit'],
+            'next': self.paginator.get_next_link(),
+            'sales': sale_reader.serialize(page)
+        }), request)
 
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view sales for this shop.")
 
-        # Calculate the datetime for 30 days ago
-        last_30_days = datetime.now() - timedelta(days=30)
+class ShopSalesForDayView(ShopSalesWindowView):
+    window_days = 1
 
-        return Sale.objects.filter(shop=shop, sold_at__gte=last_30_days)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        total_amount = queryset.aggregate(Sum('total_price'))['total_price__sum'] or 0
-        total_profit = queryset.aggregate(
-            total_profit=Sum(ExpressionWrapper(F('total_price') - F('cost_price'), output_field=DecimalField()))
-        )['total_profit'] or 0
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'total_amount': total_amount,
-            'total_profit': total_profit,
-            'sales': serializer.data
-        })
-        
-    
-class ShopSalesForYearView(generics.ListAPIView):
-    serializer_class = SaleSerializer
+class ShopSalesForWeekView(ShopSalesWindowView):
+    window_days = 7
 
-    def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
 
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
+class ShopSalesForMonthView(ShopSalesWindowView):
+    window_days = 30
 
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view sales for this shop.")
 
-        # Calculate the datetime for 365 days ago
-        last_365_days = datetime.now() - timedelta(days=365)
+class ShopSalesForYearView(ShopSalesWindowView):
+    window_days = 365
 
-        return Sale.objects.filter(shop=shop, sold_at__gte=last_365_days)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        total_amount = queryset.aggregate(Sum('total_price'))['total_price__sum'] or 0
-        total_profit = queryset.aggregate(
-            total_profit=Sum(ExpressionWrapper(F('total_price') - F('cost_price'), output_field=DecimalField()))
-        )['total_profit'] or 0
-        serializer = self.get_serializer(queryset, many=True)
+class ShopSalesSeriesView(ShopOwnerMixin, APIView):
+    """
+    Sales, units, revenue and profit per `?bucket=hour|day|week|month` between
+    `?from=` and `?to=` (ISO datetimes, or dates for whole days), bucketed in the
+    shop's time zone or `?tz=`. Defaults to days over the last 30 days, through
+    the end of the current bucket.
+    """
+    permission_denied_message = "You do not have permission to view sales for this shop."
+
+    def get(self, request, shop_id, user_id):
+        params = request.query_params
+        bucket = params.get('bucket', 'day')
+        if bucket not in timeseries.BUCKETS:
+            raise ValidationError({'bucket': f"Must be one of {', '.join(timeseries.BUCKETS)}."})
+        shop_tz, version = Shop.objects.filter(pk=self.shop_id).values_list('timezone', 'catalog_version').get()
+        tz_name = params.get('tz') or shop_tz
+        try:
+            tz = zoneinfo.ZoneInfo(tz_name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise ValidationError({'tz': f'{tz_name} is not a known time zone.'})
+
+        bounds = {}
+        for name in ('from', 'to'):
+            if params.get(name):
+                try:
+                    bounds[name] = timeseries.parse_bound(params[name], tz, end=name == 'to')
+                except ValueError:
+                    raise ValidationError({name: 'Must be an ISO 8601 date or datetime.'})
+        start, end = timeseries.default_window(bucket, tz, bounds.get('to'))
+        start = bounds.get('from') or start
+        if start >= end:
+            raise ValidationError({'from': 'Must be before `to`.'})
+        if timeseries.count_buckets(start, end, bucket) > timeseries.MAX_BUCKETS:
+            raise ValidationError({'bucket': 'Too many buckets; pick a larger bucket or a shorter range.'})
+
+        # Keyed on the window itself, which a default `from` or `to` moves
+        etag = window_etag(request, version, start, end)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        data = timeseries.sales_series(self.shop_id, start, end, bucket, tz)
         return Response({
-            'total_amount': total_amount,
-            'total_profit': total_profit,
-            'sales': serializer.data
-        })
-    
-class ShopItemsByCategoryView(generics.ListAPIView):
+            'bucket': bucket,
+            'timezone': tz.key,
+            'from': start.astimezone(tz).isoformat(),
+            'to': end.astimezone(tz).isoformat(),
+            'totals': SalesSeriesTotalsSerializer(data['totals']).data,
+            'series': SalesSeriesPointSerializer(data['series'], many=True).data,
+        }, headers={'ETag': etag})
+
+
+@method_decorator(condition(etag_func=catalog_etag), name='get')
+class ShopItemsByCategoryView(ShopOwnerMixin, generics.ListAPIView):
+    """
+    The shop's items grouped by category, read with one query. `?counts=1`
+    returns only the number of items in each category; `?limit=<n>` (and
+    `?offset=<m>`) pages within every category and adds each one's total.
+    """
     serializer_class = ItemSerializer
+    permission_denied_message = "You do not have permission to view items for this shop."
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
-
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
-
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view items for this shop.")
+        return Item.objects.filter(shop_id=self.shop_id).order_by('category', 'item_name', 'id')
 
-        return Item.objects.filter(shop=shop).order_by('category')
+    def get_int_param(self, name, default=None):
+        return get_int_param(self.request, name, default)
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        categories = queryset.values_list('category', flat=True).distinct()
-        categorized_items = {category: ItemSerializer(queryset.filter(category=category), many=True).data for category in categories}
+        if request.query_params.get('counts') in ('1', 'true'):
+            counts = queryset.order_by('category').values_list('category').annotate(count=Count('id'))
+            return Response(dict(counts))
+
+        limit = self.get_int_param('limit')
+        offset = self.get_int_param('offset', 0)
+        if limit is None and not offset:
+            # Rows arrive ordered by category, so each group is serialized as it is read
+            rows = item_reader.values(queryset)
+            groups = groupby(rows.iterator(chunk_size=2000), key=itemgetter('category'))
+            return Response({category: item_reader.serialize(items) for category, items in groups})
+
+        # Number the rows within each category so one query returns a page of every category
+        queryset = queryset.annotate(
+            position=Window(RowNumber(), partition_by=F('category'), order_by=[F('item_name').asc(), F('id').asc()]),
+            category_count=Window(Count('id'), partition_by=F('category')),
+        ).filter(position__gt=offset)
+        if limit is not None:
+            queryset = queryset.filter(position__lte=offset + limit)
+        rows = queryset.values(*item_reader.columns, 'category_count')
+        categorized_items = {}
+        for category, items in groupby(rows, key=itemgetter('category')):
+            items = list(items)
+            categorized_items[category] = {
+                'count': items[0]['category_count'],
+                'results': item_reader.serialize(items),
+            }
         return Response(categorized_items)
-    
-class ShopItemsByCategoryView(generics.ListAPIView):
+
+
+@method_decorator(condition(etag_func=catalog_etag), name='get')
+class ShopLowStockListView(ShopOwnerMixin, FastListMixin, generics.ListAPIView):
+    """Items below their reorder level, read straight from the maintained low-stock flag."""
     serializer_class = ItemSerializer
+    fast_serializer = item_reader
+    permission_denied_message = "You do not have permission to view items for this shop."
 
     def get_queryset(self):
-        user_id = self.kwargs.get('user_id')
-        shop_id = self.kwargs.get('shop_id')
+        return Item.objects.filter(shop_id=self.shop_id, is_low_stock=True).order_by('quantity', 'item_name')
 
-        try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
 
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view items for this shop.")
+class ShopReorderSuggestionsView(ShopOwnerMixin, FastListMixin, generics.ListAPIView):
+    """
+    Forecast demand, reorder point and reorder quantity per item, as last
+    computed by `manage.py compute_reorder_points`. `?due=1` keeps the items
+    whose stock is at or below their reorder point.
+    """
+    serializer_class = ReorderSuggestionSerializer
+    fast_serializer = reorder_reader
+    permission_denied_message = "You do not have permission to view items for this shop."
 
-        return Item.objects.filter(shop=shop).order_by('category')
+    def get_queryset(self):
+        queryset = ReorderSuggestion.objects.filter(shop_id=self.shop_id)
+        if self.request.query_params.get('due') in ('1', 'true'):
+            queryset = queryset.filter(item__quantity__lte=F('reorder_point'))
+        return queryset.order_by('item__item_name', 'item_id')
+
+
+class StockAlertFeedView(ShopOwnerMixin, generics.ListAPIView):
+    """
+    Low-stock crossings, oldest first. Poll with the returned `next` link;
+    `?wait=<seconds>` holds an empty poll open until an alert arrives and
+    `?stream=sse` switches to server-sent events.
+    """
+    serializer_class = StockAlertSerializer
+    pagination_class = StockAlertFeedPagination
+    permission_denied_message = "You do not have permission to view alerts for this shop."
+
+    def get_queryset(self):
+        return StockAlert.objects.filter(shop_id=self.shop_id).select_related('item')
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        categories = queryset.values_list('category', flat=True).distinct()
-        categorized_items = {category: ItemSerializer(queryset.filter(category=category), many=True).data for category in categories}
-        return Response(categorized_items)    
+        if request.query_params.get('stream') == 'sse':
+            paginator = self.paginator
+            last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get(paginator.cursor_query_param)
+            position = paginator.decode_position(last_event_id, StockAlert) if last_event_id else None
+            return stream_alerts(self.shop_id, position, paginator)
 
-class InventoryAnalysisView(APIView):
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), MAX_WAIT)
+        except ValueError:
+            raise ValidationError({'wait': 'Must be a number of seconds.'})
+        deadline = time.monotonic() + wait
+        while True:
+            version = alerts_version(self.shop_id)
+            page = self.paginate_queryset(self.get_queryset())
+            remaining = deadline - time.monotonic()
+            if page or remaining <= 0:
+                break
+            wait_for_alerts(self.shop_id, version, min(POLL_INTERVAL, remaining))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class ShopChangesView(ShopOwnerMixin, APIView):
+    """
+    What changed in the shop since `?since=<token>`, for offline POS clients.
+    Without a token it returns everything; keep calling with the returned
+    token while `has_more` is true.
+    """
+    permission_denied_message = "You do not have permission to sync this shop."
 
     def get(self, request, shop_id, user_id):
+        token = request.query_params.get('since')
         try:
-            shop = Shop.objects.get(id=shop_id)
-        except Shop.DoesNotExist:
-            raise PermissionDenied("Shop does not exist.")
+            positions = sync.decode_token(token) if token else None
+        except ValueError as e:
+            raise ValidationError({'since': str(e)})
+        try:
+            limit = min(int(request.query_params.get('limit', sync.DEFAULT_LIMIT)), sync.MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a whole number.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be at least 1.'})
+        return Response(sync.changes_since(self.shop_id, positions, limit))
 
-        if str(shop.owner.id) != str(user_id):
-            raise PermissionDenied("You do not have permission to view inventory for this shop.")
 
-        # Total items in stock
-        total_items = Item.objects.filter(shop=shop).aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0
+class OfflineSalesUploadView(ShopOwnerMixin, APIView):
+    """Upload sales made offline; lines already uploaded are reported as duplicates, not sold again."""
+    permission_denied_message = "You do not have permission to sell items for this shop."
 
-        # Total restocked items
-        total_restocked = Restock.objects.filter(shop=shop).aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0
+    def post(self, request, shop_id, user_id):
+        serializer = OfflineSalesUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = sync.upload_sales(self.get_shop(), serializer.validated_data['sales'])
+        return Response({'results': results})
 
-        # Total sold items
-        total_sold = Sale.objects.filter(shop=shop).aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0
 
-        # Total profit from sales
-        total_profit = Sale.objects.filter(shop=shop).aggregate(
-            total_profit=Sum(F('total_price') - F('cost_price'))
-        )['total_profit'] or 0
+class InventoryAnalysisView(ShopOwnerMixin, APIView):
+    permission_denied_message = "You do not have permission to view inventory for this shop."
 
-        # Items that need restocking (e.g., quantity < 10)
-        items_to_restock = Item.objects.filter(shop=shop, quantity__lt=10).count()
+    def get(self, request, shop_id, user_id):
+        data = inventory_analysis(self.shop_id)
+        serializer = InventoryAnalysisSerializer(data)
+        return Response(serializer.data)
 
-        # Most bought item
-        most_bought_item = Sale.objects.filter(shop=shop).values('item__item_name').annotate(total_quantity=Sum('quantity')).order_by('-total_quantity').first()
 
-        # Least bought item
-        least_bought_item = Sale.objects.filter(shop=shop).values('item__item_name').annotate(total_quantity=Sum('quantity')).order_by('total_quantity').first()
+@method_decorator(condition(etag_func=dated_catalog_etag), name='get')
+class CatalogAnalysisView(ShopOwnerMixin, APIView):
+    """
+    ABC classes, margins, sell-through and stock value of the shop's items,
+    counting the sales of the last `?days=` days (all of them by default).
+    Lists `?limit=` items (50 by default) of `?abc=A|B|C`, largest `?order=` first.
+    """
+    permission_denied_message = "You do not have permission to view inventory for this shop."
+    default_limit = 50
+    max_limit = 1000
 
-        data = {
-            'total_items': total_items,
-            'total_restocked': total_restocked,
-            'total_sold': total_sold,
-            'total_profit': total_profit,
-            'items_to_restock': items_to_restock,
-            'most_bought_item': most_bought_item,
-            'least_bought_item': least_bought_item,
-        }
+    def get(self, request, shop_id, user_id):
+        abc_class = request.query_params.get('abc')
+        if abc_class is not None and abc_class not in abc_analysis.CLASSES:
+            raise ValidationError({'abc': f"Must be one of {', '.join(abc_analysis.CLASSES)}."})
+        order = request.query_params.get('order', 'revenue')
+        if order not in abc_analysis.ORDERINGS:
+            raise ValidationError({'order': f"Must be one of {', '.join(abc_analysis.ORDERINGS)}."})
+        days = get_int_param(request, 'days')
+        limit = min(get_int_param(request, 'limit', self.default_limit), self.max_limit)
+        offset = get_int_param(request, 'offset', 0)
+
+        since = timezone.localdate(rollups.window_start(days)) if days else None
+        analysis = abc_analysis.catalog_analysis(self.shop_id, since)
+        selected = analysis.select(abc_class, order)
+        return Response({
+            'summary': CatalogAnalysisSummarySerializer(analysis.summary()).data,
+            'count': len(selected),
+            'items': CatalogAnalysisItemSerializer(analysis.items(selected[offset:offset + limit]), many=True).data,
+        })
 
-        serializer = InventoryAnalysisSerializer(data)
-        return Response(serializer.data)
+async def sales_ticker_view(request, shop_id, user_id):
+    """
+    Server-sent events with each new sale of the shop and today's running totals.
+    Meant to be served by inventory.asgi, where a watcher costs no thread.
+    """
+    try:
+        await acheck_shop_owner(shop_id, user_id, "You do not have permission to view sales for this shop.")
+    except PermissionDenied as e:
+        return JsonResponse({'detail': str(e.detail)}, status=status.HTTP_403_FORBIDDEN)
+    response = StreamingHttpResponse(ticker.sales_events(shop_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @csrf_exempt
 def chatbot_view(request, shop_id, user_id, item_id=None):
-    if request.method == "POST":
-        data = json.loads(request.body)
-        message = data.get("message", "")
-
-        # Step 1: Detect the @function
-        match = re.match(r"@(\w+)\s+(\d+)\s+(\w+)(?:\s+to\s+(.+?))?(?::\s+(\w+))?$", message)
-        
-        if match:
-            command = match.group(1)  # sales, add, inventory, new, etc.
-            quantity = int(match.group(2))  # Extract quantity
-            product = match.group(3)  # Extract product name
-            customer = match.group(4) if match.group(4) else None  # Extract customer (if available)
-            payment_method = match.group(5) if match.group(5) else "cash"  # Extract payment method (default to 'cash')
-
-            # Step 2: Process the Command
-            if command == "sales" and item_id:
-                return process_sales(shop_id, item_id, user_id, product, quantity, customer, payment_method)
-            elif command == "add" and item_id:
-                return add_to_inventory(shop_id, item_id, user_id, product, quantity)
-            elif command == "inventory" and item_id:
-                return check_inventory(shop_id, item_id, user_id, product)
-            elif command == "new":
-                return add_new_product(shop_id, user_id, product, quantity, customer, payment_method)
-
-        print(f"Invalid command: {message}")
-        return JsonResponse({"error": f"Invalid command: {message}"}, status=400)
-    print(f"Invalid request method: {request.method}")
-    return JsonResponse({"error": f"Invalid request method: {request.method}"}, status=405)
-
-
-def process_sales(shop_id, item_id, user_id, product, quantity, customer, payment_method):
-    try:
-        shop = Shop.objects.get(id=shop_id)
-        if str(shop.owner.id) != str(user_id):
-            return JsonResponse({"error": "You do not have permission to perform this action"}, status=403)
-
-        item = Item.objects.get(id=item_id, shop=shop)
-        if item.quantity < quantity:
-            return JsonResponse({"error": "Not enough stock"}, status=400)
-        item.quantity -= quantity
-        item.save()
-        total_price = item.selling_price * quantity
-        Sale.objects.create(shop=shop, item=item, quantity=quantity, total_price=total_price, customer=customer, payment_method=payment_method)
-        return JsonResponse({"message": f"✅ Sold {quantity} {product} to {customer}.", "total_amount": total_price})
-    except Shop.DoesNotExist:
-        return JsonResponse({"error": "Shop not found"}, status=404)
-    except Item.DoesNotExist:
-        return JsonResponse({"error": "Item not found"}, status=404)
-
-def add_to_inventory(shop_id, item_id, user_id, product, quantity):
+    if request.method != "POST":
+        return JsonResponse({"error": f"Invalid request method: {request.method}"}, status=405)
     try:
-        shop = Shop.objects.get(id=shop_id)
-        if str(shop.owner.id) != str(user_id):
-            return JsonResponse({"error": "You do not have permission to perform this action"}, status=403)
-
-        item = Item.objects.get(id=item_id, shop=shop)
-        item.quantity += quantity
-        item.save()
-        Restock.objects.create(shop=shop, item=item, quantity=quantity, total_price=item.cost_price * quantity)
-        return JsonResponse({"message": f"✅ Added {quantity} {product} to inventory."})
-    except Shop.DoesNotExist:
-        return JsonResponse({"error": "Shop not found"}, status=404)
-    except Item.DoesNotExist:
-        return JsonResponse({"error": "Item not found"}, status=404)
-
-def check_inventory(shop_id, item_id, user_id, product):
-    try:
-        shop = Shop.objects.get(id=shop_id)
-        if str(shop.owner.id) != str(user_id):
-            return JsonResponse({"error": "You do not have permission to perform this action"}, status=403)
-
-        item = Item.objects.get(id=item_id, shop=shop)
-        return JsonResponse({"message": f"📊 {product} stock: {item.quantity} left"})
-    except Shop.DoesNotExist:
-        return JsonResponse({"error": "Shop not found"}, status=404)
-    except Item.DoesNotExist:
-        return JsonResponse({"error": "Item not found"}, status=404)
-
-def add_new_product(shop_id, user_id, item_name, category, description, cost_price, selling_price, quantity):
-    try:
-        shop = Shop.objects.get(id=shop_id)
-        if str(shop.owner.id) != str(user_id):
-            return JsonResponse({"error": "You do not have permission to perform this action"}, status=403)
-
-        item = Item.objects.create(
-            shop=shop,
-            item_name=item_name,
-            category=category,
-            description=description,
-            cost_price=cost_price,
-            selling_price=selling_price,
-            quantity=quantity
-        )
-        return JsonResponse({"message": f"✅ Added new product {item_name} to the shop.", "item_id": item.id})
-    except Shop.DoesNotExist:
-        return JsonResponse({"error": "Shop not found"}, status=404)
-    
+        message = json.loads(request.body).get("message", "")
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    data, status_code = chatbot.handle_message(shop_id, user_id, message, item_id=item_id)
+    return JsonResponse(data, status=status_code)
+
 
 @csrf_exempt
 def add_new_product_view(request, shop_id, user_id):
-    if request.method == "POST":
-        data = json.loads(request.body)
-        message = data.get("message", "")
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+    try:
+        message = json.loads(request.body).get("message", "")
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    data, status_code = chatbot.handle_message(shop_id, user_id, message, allowed={'new'})
+    return JsonResponse(data, status=status_code)
+
+
+# Async variants of the read-heavy endpoints, mounted under async/ for inventory.asgi.
+# They return the same JSON as their DRF counterparts (same readers, same renderer)
+# but await the ORM instead of holding a worker thread for the whole request.
+
+_json_renderer = FastJSONRenderer()
 
-        # Detect the @new command
-        match = re.match(r"@new\s+(\w+)\s+(\w+)\s+(\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(.+)", message)
-        
-        if match:
-            item_name = match.group(1)  # Extract item name
-            category = match.group(2)  # Extract category
-            quantity = int(match.group(3))  # Extract quantity
-            cost_price = float(match.group(4))  # Extract cost price
-            selling_price = float(match.group(5))  # Extract selling price
-            description = match.group(6)  # Extract description
 
+def _json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(_json_renderer.render(data), status=status, content_type='application/json')
+
+
+def async_shop_owner_view(permission_denied_message):
+    """Async counterpart of ShopOwnerMixin for GET-only views taking (request, shop_id)."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, shop_id, user_id, **kwargs):
+            if request.method != 'GET':
+                return _json_response({'detail': f'Method "{request.method}" not allowed.'},
+                                      status=status.HTTP_405_METHOD_NOT_ALLOWED)
             try:
-                shop = Shop.objects.get(id=shop_id)
-                if str(shop.owner.id) != str(user_id):
-                    return JsonResponse({"error": "You do not have permission to perform this action"}, status=403)
-
-                item = Item.objects.create(
-                    shop=shop,
-                    item_name=item_name,
-                    category=category,
-                    description=description,
-                    cost_price=cost_price,
-                    selling_price=selling_price,
-                    quantity=quantity
-                )
-                return JsonResponse({"message": f"✅ Added new product {item_name} to the shop.", "item_id": item.id})
-            except Shop.DoesNotExist:
-                return JsonResponse({"error": "Shop not found"}, status=404)
-        
-        return JsonResponse({"error": "Invalid command"}, status=400)
-    return JsonResponse({"error": "Invalid request method"}, status=405)
\ No newline at end of file
+                await acheck_shop_owner(shop_id, user_id, permission_denied_message)
+                return await view(Request(request), shop_id, **kwargs)
+            except APIException as e:
+                return _json_response({'detail': e.detail}, status=e.status_code)
+        return wrapper
+    return decorator
+
+
+@async_shop_owner_view("You do not have permission to view items for this shop.")
+async def async_shop_items_list(request, shop_id):
+    items = [item async for item in item_reader.values(Item.objects.filter(shop_id=shop_id))]
+    return _json_response(item_reader.serialize(items))
+
+
+@async_shop_owner_view("You do not have permission to view sales for this shop.")
+async def async_shop_sales_list(request, shop_id):
+    paginator = SaleCursorPagination()
+    page = await paginator.apaginate_queryset(sale_reader.values(Sale.objects.filter(shop_id=shop_id)), request)
+    return _json_response({'next': paginator.get_next_link(), 'results': sale_reader.serialize(page)})
+
+
+def async_shop_sales_window(window_days):
+    @async_shop_owner_view("You do not have permission to view sales for this shop.")
+    async def view(request, shop_id):
+        paginator = SaleCursorPagination()
+        totals = await rollups.awindow_totals(shop_id, window_days)
+        sales = Sale.objects.filter(shop_id=shop_id, sold_at__gte=rollups.window_start(window_days))
+        page = await paginator.apaginate_queryset(sale_reader.values(sales), request)
+        return deprecated_for_series(_json_response({
+            'total_amount': totals['total_amount'],
+            'total_profit': totals['total_profit'],
+            'next': paginator.get_next_link(),
+            'sales': sale_reader.serialize(page)
+        }), request)
+    return view
+
+
+async_shop_sales_for_day = async_shop_sales_window(ShopSalesForDayView.window_days)
+async_shop_sales_for_week = async_shop_sales_window(ShopSalesForWeekView.window_days)
+async_shop_sales_for_month = async_shop_sales_window(ShopSalesForMonthView.window_days)
+async_shop_sales_for_year = async_shop_sales_window(ShopSalesForYearView.window_days)
+
+
+@async_shop_owner_view("You do not have permission to view inventory for this shop.")
+async def async_inventory_analysis(request, shop_id):
+    data = await ainventory_analysis(shop_id)
+    return _json_response(InventoryAnalysisSerializer(data).data)